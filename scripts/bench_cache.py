@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.core.cache import TranslationCache
+
+
+class _PerCallCache:
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS translation_cache (
+                    sid TEXT NOT NULL,
+                    system_id TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    PRIMARY KEY (sid, system_id, prompt_version)
+                )
+                """
+            )
+
+    def get(self, sid: str, system_id: str, prompt_version: str) -> str | None:
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT translation FROM translation_cache WHERE sid=? AND system_id=? AND prompt_version=?",
+                (sid, system_id, prompt_version),
+            ).fetchone()
+        return None if row is None else str(row[0])
+
+    def set(
+        self, sid: str, system_id: str, prompt_version: str, translation: str
+    ) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO translation_cache VALUES (?, ?, ?, ?)",
+                (sid, system_id, prompt_version, translation),
+            )
+
+
+def _rows(n: int) -> list[tuple[str, str, str, str]]:
+    return [
+        (f"sid{i:08d}", f"system_{'abc'[i % 3]}", "trans_v1", f"translation {i}")
+        for i in range(n)
+    ]
+
+
+def _bench_per_call(db_path: Path, rows: list[tuple[str, str, str, str]]) -> dict[str, float]:
+    cache = _PerCallCache(db_path)
+    t0 = time.perf_counter()
+    for sid, system_id, prompt_version, translation in rows:
+        cache.set(sid, system_id, prompt_version, translation)
+    t_write = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for sid, system_id, prompt_version, _ in rows:
+        cache.get(sid, system_id, prompt_version)
+    t_read = time.perf_counter() - t0
+    return {"write_sec": t_write, "read_sec": t_read}
+
+
+def _bench_batched(db_path: Path, rows: list[tuple[str, str, str, str]]) -> dict[str, float]:
+    with TranslationCache(db_path) as cache:
+        t0 = time.perf_counter()
+        cache.set_many(rows)
+        t_write = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        found = cache.get_many(row[:3] for row in rows)
+        t_read = time.perf_counter() - t0
+    if len(found) != len(rows):
+        raise RuntimeError("get_many 返回条数与写入不一致")
+    return {"write_sec": t_write, "read_sec": t_read}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="TranslationCache micro-benchmark")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument(
+        "--max-per-call",
+        type=int,
+        default=100000,
+        help="超过该规模时跳过逐条连接的旧路径",
+    )
+    args = parser.parse_args()
+
+    print(f"{'keys':>8} {'path':>10} {'write_s':>10} {'read_s':>10} {'keys/s':>12}")
+    for n in [int(x) for x in args.sizes.split(",") if x.strip()]:
+        rows = _rows(n)
+        with tempfile.TemporaryDirectory() as tmp:
+            results = {"batched": _bench_batched(Path(tmp) / "batched.sqlite3", rows)}
+            if n <= args.max_per_call:
+                results["per_call"] = _bench_per_call(Path(tmp) / "per_call.sqlite3", rows)
+        for name, res in results.items():
+            total = res["write_sec"] + res["read_sec"]
+            print(
+                f"{n:>8} {name:>10} {res['write_sec']:>10.3f} {res['read_sec']:>10.3f} "
+                f"{(2 * n) / max(total, 1e-9):>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.core.columnar import ARTIFACT_COLUMNS, export_parquet, load_columns, parquet_path
+from src.core.io import iter_jsonl, write_jsonl
+from src.pipeline.metrics import JUDGE_COLUMNS
+
+PROJECTIONS = {
+    "translations": ["sid", "system_id", "translation"],
+    "persona_gold": ["sid", "system_id", "OV_gold"],
+    "judge_scores": JUDGE_COLUMNS,
+    "metrics_traditional": ["sid", "system_id", "bleu", "meteor"],
+}
+
+
+def _best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSONL vs Parquet analytics load benchmark")
+    parser.add_argument("--processed", default="data/processed")
+    parser.add_argument("--scale", type=int, default=100, help="把每个产物重复 N 次以放大样本")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'artifact':>19} {'rows':>8} {'jsonl_MB':>9} {'parquet_MB':>10} "
+        f"{'jsonl_load_s':>12} {'parquet_load_s':>14} {'speedup':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for artifact in ARTIFACT_COLUMNS:
+            rows = list(iter_jsonl(Path(args.processed) / f"{artifact}.jsonl"))
+            if not rows:
+                continue
+            rows = rows * max(1, args.scale)
+            jsonl = Path(tmp) / f"{artifact}.jsonl"
+            write_jsonl(jsonl, rows)
+            columns = PROJECTIONS[artifact]
+            jsonl_s = _best_of(args.repeat, lambda: load_columns(jsonl, artifact, columns))
+            export_parquet(jsonl, artifact)
+            parquet_s = _best_of(args.repeat, lambda: load_columns(jsonl, artifact, columns))
+            print(
+                f"{artifact:>19} {len(rows):>8} {jsonl.stat().st_size / 1e6:>9.2f} "
+                f"{parquet_path(jsonl).stat().st_size / 1e6:>10.2f} {jsonl_s:>12.3f} "
+                f"{parquet_s:>14.4f} {jsonl_s / parquet_s:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.core.io import read_jsonl
+from src.pipeline.translate import _hf_translate_batch, _load_hf_model
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HF batched translation throughput")
+    parser.add_argument("--model", default="Helsinki-NLP/opus-mt-zh-en")
+    parser.add_argument("--eval-set", default="data/processed/eval_set.jsonl")
+    parser.add_argument("--limit", type=int, default=128)
+    parser.add_argument("--batch-sizes", default="1,8,32")
+    parser.add_argument("--threads", type=int, default=0, help="torch 线程数，0 表示默认")
+    args = parser.parse_args()
+
+    if args.threads > 0:
+        import torch
+
+        torch.set_num_threads(args.threads)
+    texts = [row["text_zh"] for row in read_jsonl(Path(args.eval_set))][: args.limit]
+    if not texts:
+        raise SystemExit(f"评测集为空: {args.eval_set}")
+    if _load_hf_model(args.model) is None:
+        raise SystemExit(f"无法加载模型: {args.model}")
+    _hf_translate_batch(args.model, texts[:4], batch_size=4)
+
+    print(f"model={args.model} sentences={len(texts)}")
+    print(f"{'batch':>6} {'elapsed_s':>10} {'sent/s':>10} {'failed':>7}")
+    for batch_size in [int(x) for x in args.batch_sizes.split(",") if x.strip()]:
+        t0 = time.perf_counter()
+        results = _hf_translate_batch(args.model, texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - t0
+        failed = sum(1 for r in results if not r)
+        print(
+            f"{batch_size:>6} {elapsed:>10.2f} {len(texts) / max(elapsed, 1e-9):>10.2f} {failed:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.core.icl_index import ICLIndex
+from src.core.io import read_jsonl
+from src.core.schema import METAPHOR_TYPES
+
+
+def _synthetic_bank(n: int, texts: list[str], seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    pool = "".join(texts) or "春风月夜山水花鸟云雨心梦泪光影雪"
+    bank = []
+    for i in range(n):
+        start = rng.randrange(max(1, len(pool) - 40))
+        text = pool[start : start + rng.randint(8, 40)]
+        bank.append(
+            {"sid": f"b{i}", "metaphor_type": rng.choice(METAPHOR_TYPES), "text_zh": text}
+        )
+    return bank
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ICL retrieval index benchmark")
+    parser.add_argument("--eval-set", default="data/processed/eval_set.jsonl")
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=20260215)
+    args = parser.parse_args()
+
+    texts = [row["text_zh"] for row in read_jsonl(Path(args.eval_set))]
+    print(
+        f"{'bank':>8} {'strategy':>10} {'build_s':>8} {'p50_ms':>8} {'p99_ms':>8} {'mean_ms':>8}"
+    )
+    for size in [int(x) for x in args.sizes.split(",") if x.strip()]:
+        bank = _synthetic_bank(size, texts, args.seed)
+        rng = random.Random(args.seed + 1)
+        queries = [rng.choice(bank) for _ in range(args.queries)]
+        for strategy in ("similarity", "first"):
+            t0 = time.perf_counter()
+            index = ICLIndex(bank, seed=args.seed, strategy=strategy)
+            build = time.perf_counter() - t0
+            latencies = []
+            for query in queries:
+                q0 = time.perf_counter()
+                index.select(query["text_zh"], query["metaphor_type"], args.k, {query["sid"]})
+                latencies.append((time.perf_counter() - q0) * 1000)
+            latencies.sort()
+            print(
+                f"{size:>8} {strategy:>10} {build:>8.2f} "
+                f"{latencies[len(latencies) // 2]:>8.3f} "
+                f"{latencies[int(len(latencies) * 0.99) - 1]:>8.3f} "
+                f"{sum(latencies) / len(latencies):>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.core.io import CODEC, CODEC_PREFERENCE, get_codec, iter_jsonl, iter_records, write_jsonl
+from src.core.schema import ARTIFACT_RECORDS
+
+
+def _best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JSONL codec read/write throughput benchmark")
+    parser.add_argument("--processed", default="data/processed")
+    parser.add_argument("--scale", type=int, default=20, help="把每个产物重复 N 次以放大样本")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    codecs = []
+    for name in CODEC_PREFERENCE:
+        try:
+            codecs.append(get_codec(name))
+        except ImportError:
+            print(f"skip {name}: not installed")
+    print(f"default codec: {CODEC.name}")
+    print(
+        f"{'artifact':>13} {'codec':>8} {'MB':>7} {'read_MB/s':>10} "
+        f"{'typed_MB/s':>10} {'write_MB/s':>10}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for artifact, record_type in ARTIFACT_RECORDS.items():
+            src = Path(args.processed) / f"{artifact}.jsonl"
+            rows = list(iter_jsonl(src))
+            if not rows:
+                continue
+            rows = rows * max(1, args.scale)
+            scaled = Path(tmp) / f"{artifact}.jsonl"
+            write_jsonl(scaled, rows, get_codec("json"))
+            for codec in codecs:
+                out = Path(tmp) / f"{artifact}.{codec.name}.jsonl"
+                write_s = _best_of(args.repeat, lambda: write_jsonl(out, rows, codec))
+                written_mb = out.stat().st_size / 1e6
+                mb = scaled.stat().st_size / 1e6
+                read_s = _best_of(args.repeat, lambda: sum(1 for _ in iter_jsonl(scaled, codec)))
+                typed_s = _best_of(
+                    args.repeat,
+                    lambda: sum(1 for _ in iter_records(scaled, record_type, codec)),
+                )
+                print(
+                    f"{artifact:>13} {codec.name:>8} {mb:>7.1f} {mb / read_s:>10.1f} "
+                    f"{mb / typed_s:>10.1f} {written_mb / write_s:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
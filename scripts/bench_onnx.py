@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.core.io import read_jsonl
+
+BACKENDS = ("transformers", "onnx_fp32", "onnx_int8")
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _run_backend(args: argparse.Namespace) -> None:
+    from src.pipeline.onnx_nmt import load_onnx_model, onnx_generate
+    from src.pipeline.translate import _hf_translate_batch, _load_hf_model
+
+    texts = [row["text_zh"] for row in read_jsonl(Path(args.eval_set))][: args.limit]
+    if args.threads > 0:
+        import torch
+
+        torch.set_num_threads(args.threads)
+    rss_base = _peak_rss_mb()
+    t0 = time.perf_counter()
+    if args.worker == "transformers":
+        if _load_hf_model(args.model) is None:
+            raise SystemExit(f"无法加载模型: {args.model}")
+
+        def translate(batch: list[str]) -> list[str | None]:
+            return _hf_translate_batch(args.model, batch, batch_size=args.batch_size)
+
+    else:
+        quantize = "int8" if args.worker == "onnx_int8" else None
+        bundle = load_onnx_model(args.model, quantize, Path(args.onnx_dir))
+        if bundle is None:
+            raise SystemExit(f"无法加载 ONNX 模型: {args.model}")
+
+        def translate(batch: list[str]) -> list[str | None]:
+            return list(onnx_generate(bundle, batch, num_beams=args.num_beams))
+
+    load_sec = time.perf_counter() - t0
+    translate(texts[:2])
+
+    outputs: list[str | None] = []
+    latencies: list[float] = []
+    t0 = time.perf_counter()
+    for start in range(0, len(texts), args.batch_size):
+        b0 = time.perf_counter()
+        outputs.extend(translate(texts[start : start + args.batch_size]))
+        latencies.append(time.perf_counter() - b0)
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    print(
+        json.dumps(
+            {
+                "backend": args.worker,
+                "sentences": len(texts),
+                "load_sec": load_sec,
+                "elapsed_sec": elapsed,
+                "sent_per_sec": len(texts) / max(elapsed, 1e-9),
+                "batch_p50_ms": 1000 * latencies[len(latencies) // 2] if latencies else 0.0,
+                "batch_p95_ms": (
+                    1000 * latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                    if latencies
+                    else 0.0
+                ),
+                "peak_rss_mb": _peak_rss_mb(),
+                "rss_delta_mb": _peak_rss_mb() - rss_base,
+                "outputs": [out or "" for out in outputs],
+            },
+            ensure_ascii=False,
+        )
+    )
+
+
+def _bleu(hyps: list[str], refs: list[str]) -> float | None:
+    try:
+        import sacrebleu
+    except Exception:
+        return None
+    return float(sacrebleu.corpus_bleu(hyps, [refs]).score)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="transformers vs ONNX Runtime translation benchmark")
+    parser.add_argument("--model", default="Helsinki-NLP/opus-mt-zh-en")
+    parser.add_argument("--eval-set", default="data/processed/eval_set.jsonl")
+    parser.add_argument("--limit", type=int, default=128)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--num-beams", type=int, default=1)
+    parser.add_argument("--onnx-dir", default="data/models/onnx")
+    parser.add_argument("--threads", type=int, default=0, help="torch 线程数，0 表示默认")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--worker", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _run_backend(args)
+        return
+
+    results: dict[str, dict] = {}
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        if backend not in BACKENDS:
+            raise SystemExit(f"未知后端: {backend}")
+        cmd = [
+            sys.executable,
+            __file__,
+            "--worker",
+            backend,
+            "--model",
+            args.model,
+            "--eval-set",
+            args.eval_set,
+            "--limit",
+            str(args.limit),
+            "--batch-size",
+            str(args.batch_size),
+            "--num-beams",
+            str(args.num_beams),
+            "--onnx-dir",
+            args.onnx_dir,
+            "--threads",
+            str(args.threads),
+        ]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{backend}: 失败\n{proc.stderr.strip()[-2000:]}", file=sys.stderr)
+            continue
+        results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    baseline = results.get("transformers")
+    print(f"model={args.model} batch_size={args.batch_size} num_beams={args.num_beams}")
+    print(
+        f"{'backend':>13} {'load_s':>7} {'sent/s':>8} {'p50_ms':>8} {'p95_ms':>8} "
+        f"{'rss_mb':>8} {'bleu_vs_tf':>10} {'identical':>9}"
+    )
+    for backend, res in results.items():
+        bleu = "-"
+        identical = "-"
+        if baseline is not None:
+            score = _bleu(res["outputs"], baseline["outputs"])
+            bleu = f"{score:.2f}" if score is not None else "n/a"
+            same = sum(1 for a, b in zip(res["outputs"], baseline["outputs"]) if a == b)
+            identical = f"{same / max(1, len(res['outputs'])):.1%}"
+        print(
+            f"{backend:>13} {res['load_sec']:>7.2f} {res['sent_per_sec']:>8.2f} "
+            f"{res['batch_p50_ms']:>8.1f} {res['batch_p95_ms']:>8.1f} "
+            f"{res['peak_rss_mb']:>8.1f} {bleu:>10} {identical:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.core.icl_index import ICLIndex
+from src.core.io import read_jsonl
+from src.core.llm_client import (
+    ChatRequest,
+    llm_config_from_dict,
+    prefix_share,
+    send_order,
+)
+from src.core.prompts import get_registry
+from src.core.schema import DIMENSIONS
+from src.pipeline import judge_persona, judge_standard
+
+_REPLY = json.dumps(
+    {
+        "scores": {d: 4 for d in DIMENSIONS},
+        "OV": 4,
+        "evidence": {},
+        "rationale": "stand-in",
+        "scores_model": {d: 4 for d in DIMENSIONS},
+        "OV_model": 4,
+    },
+    ensure_ascii=False,
+)
+
+
+class _StandInState:
+    def __init__(self, slots: int, prefill_us: float, decode_ms: float) -> None:
+        self.slots = [""] * max(1, slots)
+        self.lock = threading.Lock()
+        self.slot_free = threading.Semaphore(max(1, slots))
+        self.prefill_us = prefill_us
+        self.decode_ms = decode_ms
+        self.prefill_chars = 0
+        self.cached_chars = 0
+
+    def acquire_slot(self, prompt: str) -> tuple[int, int]:
+        self.slot_free.acquire()
+        with self.lock:
+            best, best_len = 0, -1
+            for idx, cached in enumerate(self.slots):
+                if cached is None:
+                    continue
+                n = 0
+                limit = min(len(cached), len(prompt))
+                while n < limit and cached[n] == prompt[n]:
+                    n += 1
+                if n > best_len:
+                    best, best_len = idx, n
+            self.slots[best] = None
+            self.prefill_chars += len(prompt) - best_len
+            self.cached_chars += best_len
+            return best, best_len
+
+    def release_slot(self, idx: int, prompt: str) -> None:
+        with self.lock:
+            self.slots[idx] = prompt
+        self.slot_free.release()
+
+
+def _make_handler(state: _StandInState) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args: object) -> None:
+            return
+
+        def do_POST(self) -> None:
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            prompt = "".join(
+                str(m.get("role")) + ":" + str(m.get("content")) + "\n"
+                for m in body.get("messages", [])
+            )
+            slot, cached = state.acquire_slot(prompt)
+            try:
+                time.sleep((len(prompt) - cached) * state.prefill_us / 1e6)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                pieces = [_REPLY[i : i + 8] for i in range(0, len(_REPLY), 8)]
+                for i, piece in enumerate(pieces):
+                    if i:
+                        time.sleep(state.decode_ms / 1000)
+                    chunk = {"choices": [{"index": 0, "delta": {"content": piece}}]}
+                    data = f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode()
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+                done = b"data: [DONE]\n\n"
+                self.wfile.write(f"{len(done):x}\r\n".encode() + done + b"\r\n0\r\n\r\n")
+            finally:
+                state.release_slot(slot, prompt)
+
+    return Handler
+
+
+def _stream_once(port: int, request: ChatRequest) -> tuple[float, float]:
+    payload = json.dumps(
+        {
+            "model": "stand-in",
+            "stream": True,
+            "messages": [
+                {"role": "system", "content": request[0]},
+                {"role": "user", "content": request[1]},
+            ],
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    t0 = time.perf_counter()
+    conn.request(
+        "POST",
+        "/v1/chat/completions",
+        body=payload,
+        headers={"Content-Type": "application/json"},
+    )
+    resp = conn.getresponse()
+    ttft = None
+    while True:
+        line = resp.readline()
+        if not line:
+            break
+        if line.startswith(b"data: ") and ttft is None:
+            ttft = time.perf_counter() - t0
+        if line.strip() == b"data: [DONE]":
+            break
+    total = time.perf_counter() - t0
+    conn.close()
+    return ttft if ttft is not None else total, total
+
+
+def _build_requests(processed: Path, prompts_dir: str, k: int, variable_last: bool):
+    registry = get_registry(prompts_dir)
+    registry.register("persona_user", judge_persona._USER_TEMPLATE)
+    registry.register("persona_user_prefix", judge_persona._USER_TEMPLATE_VARIABLE_LAST)
+    template = "persona_user_prefix" if variable_last else "persona_user"
+    rows = read_jsonl(processed / "translations.jsonl")
+    persona: list[ChatRequest] = [
+        (
+            registry.text(judge_persona._persona_prompt_name(p)),
+            judge_persona._user_prompt(registry, row, template),
+        )
+        for row in rows
+        for p in judge_persona.PERSONAS
+    ]
+    bank = read_jsonl(processed / "few_shot_bank.jsonl")
+    if not bank:
+        bank = [
+            {
+                "sid": f"bank{i}",
+                "system_id": row["system_id"],
+                "text_zh": row["text_zh"],
+                "translation": row["translation"],
+                "metaphor_type": ["simile", "implicit", "personification"][i % 3],
+                "scores_gold": {d: 4 for d in DIMENSIONS},
+                "OV_gold": 4,
+            }
+            for i, row in enumerate(rows[:60])
+        ]
+    eval_map = {r["sid"]: r for r in read_jsonl(processed / "eval_set.jsonl")}
+    index = ICLIndex(bank, seed=20260215)
+    system_prompt = registry.text("judge_standard_v1_icl")
+    standard: list[ChatRequest] = []
+    for row in rows:
+        mtype = str(
+            eval_map.get(row["sid"], {})
+            .get("metaphor_meta", {})
+            .get("metaphor_type", "mixed_other")
+        )
+        chosen = [bank[p] for p in index.select(row["text_zh"], mtype, k, {row["sid"]})]
+        head = judge_standard._prompt_head(judge_standard._shot_block(chosen))
+        standard.append(
+            (system_prompt, judge_standard._single_prompt(head, row, variable_last))
+        )
+    return {"judge_persona": persona, "judge_standard": standard}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="prefix-cache request ordering benchmark")
+    parser.add_argument("--processed", default="data/processed")
+    parser.add_argument("--prompts-dir", default="configs/prompts")
+    parser.add_argument("--limit", type=int, default=120)
+    parser.add_argument("--slots", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--prefill-us", type=float, default=40.0, help="每个未命中字符的预填充耗时（微秒）")
+    parser.add_argument("--decode-ms", type=float, default=0.5)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'stage':>15} {'mode':>9} {'share':>6} {'ttft_ms':>8} {'p95_ttft':>8} "
+        f"{'total_s':>8} {'prefill_kchar':>13}"
+    )
+    for mode in ("row_order", "prefix"):
+        variable_last = mode == "prefix"
+        cfg = llm_config_from_dict(
+            {"model": "stand-in", "prefix_ordering": variable_last}
+        )
+        for stage, requests in _build_requests(
+            Path(args.processed), args.prompts_dir, args.k, variable_last
+        ).items():
+            requests = requests[: args.limit]
+            order = send_order(cfg, requests)
+            state = _StandInState(args.slots, args.prefill_us, args.decode_ms)
+            server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(state))
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            port = server.server_address[1]
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+                timings = list(
+                    pool.map(lambda i: _stream_once(port, requests[i]), order)
+                )
+            total = time.perf_counter() - t0
+            server.shutdown()
+            ttfts = sorted(t for t, _ in timings)
+            print(
+                f"{stage:>15} {mode:>9} {prefix_share(requests, order):>6.3f} "
+                f"{1000 * sum(ttfts) / len(ttfts):>8.2f} "
+                f"{1000 * ttfts[int(len(ttfts) * 0.95) - 1]:>8.2f} "
+                f"{total:>8.2f} {state.prefill_chars / 1000:>13.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
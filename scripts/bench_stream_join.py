@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.core.io import iter_jsonl, merge_join, read_jsonl, row_key, write_jsonl
+from src.core.schema import DIMENSIONS
+
+_SYSTEMS = ("system_a", "system_b", "system_c")
+
+
+def _write_artifacts(directory: Path, n_rows: int) -> None:
+    n_sids = max(1, n_rows // len(_SYSTEMS))
+    keys = [(f"{i:016x}", system) for i in range(n_sids) for system in _SYSTEMS]
+    write_jsonl(
+        directory / "translations.jsonl",
+        (
+            {
+                "sid": sid,
+                "system_id": system,
+                "text_zh": "春风又绿江南岸，明月何时照我还。",
+                "translation": "The spring wind greens the southern shore again.",
+            }
+            for sid, system in keys
+        ),
+    )
+    write_jsonl(
+        directory / "judge_scores.jsonl",
+        (
+            {
+                "sid": sid,
+                "system_id": system,
+                "scores_model": {d: 3 + (i % 2) for d in DIMENSIONS},
+                "OV_model": 3 + (i % 2),
+            }
+            for i, (sid, system) in enumerate(keys)
+        ),
+    )
+    write_jsonl(
+        directory / "persona_gold.jsonl",
+        (
+            {
+                "sid": sid,
+                "system_id": system,
+                "scores_gold": {d: 4 for d in DIMENSIONS},
+                "OV_gold": 3 + (i % 3 == 0),
+                "range": {d: 0 for d in DIMENSIONS},
+            }
+            for i, (sid, system) in enumerate(keys)
+        ),
+    )
+
+
+def _dict_join(directory: Path) -> tuple[int, float]:
+    trans_rows = read_jsonl(directory / "translations.jsonl")
+    judge_map = {row_key(r): r for r in read_jsonl(directory / "judge_scores.jsonl")}
+    gold_map = {row_key(r): r for r in read_jsonl(directory / "persona_gold.jsonl")}
+    matched, total = 0, 0.0
+    for row in trans_rows:
+        key = row_key(row)
+        if key in judge_map and key in gold_map:
+            matched += 1
+            total += float(judge_map[key]["OV_model"]) - float(gold_map[key]["OV_gold"])
+    return matched, total
+
+
+def _stream_join(directory: Path) -> tuple[int, float]:
+    joined = merge_join(
+        merge_join(
+            iter_jsonl(directory / "translations.jsonl"),
+            iter_jsonl(directory / "judge_scores.jsonl"),
+        ),
+        iter_jsonl(directory / "persona_gold.jsonl"),
+        left_key=lambda pair: row_key(pair[0]),
+    )
+    matched, total = 0, 0.0
+    for (_, model), gold in joined:
+        if model is not None and gold is not None:
+            matched += 1
+            total += float(model["OV_model"]) - float(gold["OV_gold"])
+    return matched, total
+
+
+def _peak_mb() -> float:
+    status = Path("/proc/self/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child(mode: str, directory: Path) -> None:
+    baseline_mb = _peak_mb()
+    t0 = time.perf_counter()
+    matched, total = (_dict_join if mode == "dict" else _stream_join)(directory)
+    print(
+        json.dumps(
+            {
+                "matched": matched,
+                "checksum": total,
+                "elapsed_sec": time.perf_counter() - t0,
+                "baseline_mb": baseline_mb,
+                "peak_mb": _peak_mb(),
+            }
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="streaming join memory benchmark")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--modes", default="dict,stream")
+    parser.add_argument("--child", default="")
+    parser.add_argument("--dir", default="")
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child, Path(args.dir))
+        return
+
+    print(
+        f"{'rows':>9} {'mode':>7} {'peak_mb':>8} {'delta_mb':>9} {'elapsed_s':>10} {'matched':>9}"
+    )
+    for size in [int(x) for x in args.sizes.split(",") if x.strip()]:
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            _write_artifacts(directory, size)
+            for mode in [m for m in args.modes.split(",") if m.strip()]:
+                proc = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, "--dir", str(directory)],
+                    capture_output=True,
+                    text=True,
+                )
+                if proc.returncode != 0:
+                    print(f"{size:>9} {mode:>7} failed (exit {proc.returncode})")
+                    continue
+                result = json.loads(proc.stdout.strip().splitlines()[-1])
+                print(
+                    f"{size:>9} {mode:>7} {result['peak_mb']:>8.1f} "
+                    f"{result['peak_mb'] - result['baseline_mb']:>9.1f} "
+                    f"{result['elapsed_sec']:>10.2f} {result['matched']:>9}"
+                )
+
+
+if __name__ == "__main__":
+    main()
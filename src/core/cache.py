@@ -1,51 +1,256 @@
 from __future__ import annotations
 
 import sqlite3
+import threading
+import time
 from pathlib import Path
+from typing import Iterable, TypeVar
 
 
-class TranslationCache:
+MetricKey = tuple[str, str, str, str, str]
+StoreT = TypeVar("StoreT", bound="_SQLiteStore")
+
+
+def _open_wal(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class _SQLiteStore:
     def __init__(self, db_path: Path) -> None:
         self.db_path = db_path
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._init_db()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
 
     def _connect(self) -> sqlite3.Connection:
-        return sqlite3.connect(self.db_path)
+        if self._conn is None:
+            self._conn = _open_wal(self.db_path)
+        return self._conn
 
-    def _init_db(self) -> None:
-        with self._connect() as conn:
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __enter__(self: StoreT) -> StoreT:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class _KeyedCache(_SQLiteStore):
+    table: str
+    key_columns: tuple[str, ...]
+    value_column: str
+
+    def __init__(self, db_path: Path, chunk_size: int = 500) -> None:
+        super().__init__(db_path)
+        self.chunk_size = max(1, int(chunk_size))
+        conn = self._connect()
+        columns = ", ".join(
+            f"{name} TEXT NOT NULL" for name in (*self.key_columns, self.value_column)
+        )
+        with self._lock, conn:
             conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS translation_cache (
-                    sid TEXT NOT NULL,
-                    system_id TEXT NOT NULL,
-                    prompt_version TEXT NOT NULL,
-                    translation TEXT NOT NULL,
-                    PRIMARY KEY (sid, system_id, prompt_version)
-                )
-                """
+                f"CREATE TABLE IF NOT EXISTS {self.table} "
+                f"({columns}, PRIMARY KEY ({', '.join(self.key_columns)}))"
+            )
+
+    def get_many(self, keys: Iterable[tuple[str, ...]]) -> dict[tuple[str, ...], str]:
+        unique = list(dict.fromkeys(keys))
+        found: dict[tuple[str, ...], str] = {}
+        lookup = f"{self.table}_lookup"
+        width = len(self.key_columns)
+        conn = self._connect()
+        with self._lock:
+            conn.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {lookup} "
+                f"({', '.join(f'{name} TEXT NOT NULL' for name in self.key_columns)})"
             )
+            select = ", ".join(f"c.{name}" for name in self.key_columns)
+            on = " AND ".join(f"c.{name} = k.{name}" for name in self.key_columns)
+            for start in range(0, len(unique), self.chunk_size):
+                conn.execute(f"DELETE FROM {lookup}")
+                conn.executemany(
+                    f"INSERT INTO {lookup} VALUES ({', '.join('?' * width)})",
+                    unique[start : start + self.chunk_size],
+                )
+                cursor = conn.execute(
+                    f"SELECT {select}, c.{self.value_column} FROM {lookup} AS k "
+                    f"JOIN {self.table} AS c ON {on}"
+                )
+                for row in cursor:
+                    found[tuple(str(value) for value in row[:width])] = str(row[width])
+            conn.commit()
+        return found
+
+    def set_many(self, rows: Iterable[tuple[str, ...]]) -> int:
+        batch = list(rows)
+        columns = (*self.key_columns, self.value_column)
+        sql = (
+            f"INSERT OR REPLACE INTO {self.table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))})"
+        )
+        conn = self._connect()
+        with self._lock:
+            for start in range(0, len(batch), self.chunk_size):
+                with conn:
+                    conn.executemany(sql, batch[start : start + self.chunk_size])
+        return len(batch)
+
+    def count(self) -> int:
+        conn = self._connect()
+        with self._lock:
+            return int(conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0])
+
+
+class TranslationCache(_KeyedCache):
+    table = "translation_cache"
+    key_columns = ("sid", "system_id", "prompt_version")
+    value_column = "translation"
 
     def get(self, sid: str, system_id: str, prompt_version: str) -> str | None:
-        with self._connect() as conn:
-            row = conn.execute(
-                "SELECT translation FROM translation_cache WHERE sid=? AND system_id=? AND prompt_version=?",
-                (sid, system_id, prompt_version),
-            ).fetchone()
-        if row is None:
-            return None
-        return str(row[0])
+        return self.get_many([(sid, system_id, prompt_version)]).get(
+            (sid, system_id, prompt_version)
+        )
 
     def set(
         self, sid: str, system_id: str, prompt_version: str, translation: str
     ) -> None:
-        with self._connect() as conn:
+        self.set_many([(sid, system_id, prompt_version, translation)])
+
+
+class MetricScoreCache(_KeyedCache):
+    table = "metric_score_cache"
+    key_columns = ("sid", "system_id", "ref_hash", "hyp_hash", "backend")
+    value_column = "scores"
+
+    def set_many(self, rows: Iterable[tuple[MetricKey, str]]) -> int:
+        return super().set_many((*key, scores) for key, scores in rows)
+
+
+class ResponseCache(_SQLiteStore):
+    def __init__(
+        self,
+        db_path: Path,
+        ttl_sec: float | None = None,
+        max_entries: int = 200000,
+        evict_every: int = 500,
+    ) -> None:
+        super().__init__(db_path)
+        self.ttl_sec = float(ttl_sec) if ttl_sec else None
+        self.max_entries = max(1, int(max_entries))
+        self.evict_every = max(1, int(evict_every))
+        self._writes = 0
+        self.reset_stats()
+        self._init_db()
+
+    def _init_db(self) -> None:
+        conn = self._connect()
+        with self._lock, conn:
             conn.execute(
                 """
-                INSERT OR REPLACE INTO translation_cache
-                (sid, system_id, prompt_version, translation)
-                VALUES (?, ?, ?, ?)
-                """,
-                (sid, system_id, prompt_version, translation),
+                CREATE TABLE IF NOT EXISTS llm_response_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_response_last_access "
+                "ON llm_response_cache (last_access)"
             )
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        conn = self._connect()
+        with self._lock:
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_response_cache WHERE key=?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if self.ttl_sec is not None and now - float(row[1]) > self.ttl_sec:
+                with conn:
+                    conn.execute("DELETE FROM llm_response_cache WHERE key=?", (key,))
+                self.expired += 1
+                self.misses += 1
+                return None
+            with conn:
+                conn.execute(
+                    "UPDATE llm_response_cache SET last_access=? WHERE key=?",
+                    (now, key),
+                )
+            self.hits += 1
+            return str(row[0])
+
+    def set(self, key: str, response: str) -> None:
+        now = time.time()
+        conn = self._connect()
+        with self._lock:
+            with conn:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO llm_response_cache
+                    (key, response, created_at, last_access)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (key, response, now, now),
+                )
+            self._writes += 1
+            if self._writes % self.evict_every == 0:
+                self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        with conn:
+            if self.ttl_sec is not None:
+                cursor = conn.execute(
+                    "DELETE FROM llm_response_cache WHERE created_at < ?",
+                    (time.time() - self.ttl_sec,),
+                )
+                self.expired += max(0, cursor.rowcount)
+            total = int(conn.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()[0])
+            overflow = total - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    """
+                    DELETE FROM llm_response_cache WHERE key IN (
+                        SELECT key FROM llm_response_cache
+                        ORDER BY last_access ASC LIMIT ?
+                    )
+                    """,
+                    (overflow,),
+                )
+                self.evicted += overflow
+
+    def evict(self) -> None:
+        conn = self._connect()
+        with self._lock:
+            self._evict(conn)
+
+    def stats(self) -> dict[str, int]:
+        conn = self._connect()
+        with self._lock:
+            entries = int(conn.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()[0])
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "entries": entries,
+        }
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from src.core.io import ensure_parent
+
+
+CheckpointKey = tuple[str, str]
+
+
+def fingerprint(payload: Any) -> str:
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class JsonlCheckpoint:
+    def __init__(
+        self, path: Path, stage_fingerprint: str, fsync_every: int = 64
+    ) -> None:
+        self.path = Path(path)
+        self.stage_fingerprint = stage_fingerprint
+        self.fsync_every = max(1, int(fsync_every))
+        self._lock = threading.Lock()
+        self._done: dict[CheckpointKey, tuple[str | None, dict[str, Any]]] = {}
+        self._unsynced = 0
+        self.loaded = 0
+        self.resumed = 0
+        self.appended = 0
+        self.discarded = 0
+        self.truncated_tail = False
+        ensure_parent(self.path)
+        keep = self._load()
+        if keep is None:
+            with self.path.open("w", encoding="utf-8") as f:
+                f.write(json.dumps({"fingerprint": stage_fingerprint}) + "\n")
+        else:
+            with self.path.open("r+b") as f:
+                f.truncate(keep)
+        self._fh = self.path.open("a", encoding="utf-8")
+
+    def _load(self) -> int | None:
+        if not self.path.exists():
+            return None
+        offset = 0
+        with self.path.open("rb") as f:
+            header_line = f.readline()
+            try:
+                header = json.loads(header_line)
+            except ValueError:
+                header = {}
+            if (
+                not header_line.endswith(b"\n")
+                or header.get("fingerprint") != self.stage_fingerprint
+            ):
+                self.discarded = sum(1 for _ in f)
+                return None
+            offset = len(header_line)
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("partial line")
+                    record = json.loads(line)
+                    key = (str(record["key"][0]), str(record["key"][1]))
+                    self._done[key] = (record.get("input"), record["row"])
+                except (ValueError, KeyError, IndexError, TypeError):
+                    self.truncated_tail = True
+                    break
+                offset += len(line)
+        self.loaded = len(self._done)
+        return offset
+
+    def resume(
+        self, key: CheckpointKey, input_hash: str | None = None
+    ) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._done.get(key)
+            if entry is None or (input_hash is not None and entry[0] != input_hash):
+                return None
+            self.resumed += 1
+            return entry[1]
+
+    def append(
+        self, key: CheckpointKey, row: dict[str, Any], input_hash: str | None = None
+    ) -> None:
+        line = json.dumps(
+            {"key": list(key), "input": input_hash, "row": row}, ensure_ascii=False
+        )
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+            self._done[key] = (input_hash, row)
+            self.appended += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                os.fsync(self._fh.fileno())
+                self._unsynced = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh.closed:
+                return
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._fh.close()
+
+    def finalize(self) -> None:
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": True,
+                "path": str(self.path),
+                "loaded": self.loaded,
+                "resumed": self.resumed,
+                "appended": self.appended,
+                "discarded_stale": self.discarded,
+                "truncated_tail": self.truncated_tail,
+            }
+
+
+def checkpoint_config(config: dict[str, Any]) -> dict[str, Any]:
+    cfg = config.get("checkpoint", {}) or {}
+    env = os.getenv("INKSTONE_CHECKPOINT")
+    enabled = env == "1" if env in {"0", "1"} else bool(cfg.get("enabled", False))
+    return {
+        "enabled": enabled,
+        "dir": str(
+            cfg.get("dir") or Path(config["paths"]["data_processed"]) / "checkpoints"
+        ),
+        "fsync_every": max(1, int(cfg.get("fsync_every", 64))),
+        "chunk_size": max(1, int(cfg.get("chunk_size", 64))),
+    }
+
+
+def open_checkpoint(
+    config: dict[str, Any], stage: str, stage_fingerprint: str
+) -> JsonlCheckpoint | None:
+    cfg = checkpoint_config(config)
+    if not cfg["enabled"]:
+        return None
+    return JsonlCheckpoint(
+        Path(cfg["dir"]) / f"{stage}.jsonl",
+        stage_fingerprint,
+        fsync_every=cfg["fsync_every"],
+    )
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import importlib.util
+import math
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+import numpy as np
+
+from src.core.io import Row, iter_jsonl
+from src.core.schema import DIMENSIONS
+
+
+ColumnSpec = tuple[str, str, Callable[[Row], Any]]
+
+DEFAULT_ROW_GROUP_ROWS = 65536
+KEY_COLUMNS = ("sid", "system_id")
+
+
+def _field(name: str) -> Callable[[Row], Any]:
+    return lambda row: row.get(name)
+
+
+def _nested(name: str, dim: str) -> Callable[[Row], Any]:
+    return lambda row: (row.get(name) or {}).get(dim)
+
+
+def _dims(name: str) -> list[ColumnSpec]:
+    return [(f"{name}_{dim}", "int64", _nested(name, dim)) for dim in DIMENSIONS]
+
+
+def _strings(*names: str) -> list[ColumnSpec]:
+    return [(name, "string", _field(name)) for name in names]
+
+
+ARTIFACT_COLUMNS: dict[str, list[ColumnSpec]] = {
+    "translations": _strings(
+        *KEY_COLUMNS, "text_zh", "translation", "prompt_version", "prompt_hash"
+    ),
+    "persona_gold": [
+        *_strings(*KEY_COLUMNS),
+        ("OV_gold", "int64", _field("OV_gold")),
+        *_dims("scores_gold"),
+        *_dims("range"),
+        ("n_personas", "int64", lambda row: len(row.get("persona_outputs") or [])),
+    ],
+    "judge_scores": [
+        *_strings(*KEY_COLUMNS),
+        ("OV_model", "int64", _field("OV_model")),
+        *_dims("scores_model"),
+        *_strings("judge_prompt_version", "judge_mode", "icl_target_mtype"),
+        ("icl_k", "int64", _field("icl_k")),
+    ],
+    "metrics_traditional": [
+        *_strings(*KEY_COLUMNS),
+        ("bleu", "float64", _field("bleu")),
+        ("chrf", "float64", _field("chrf")),
+        ("meteor", "float64", _field("meteor")),
+        *_strings("reference_source"),
+    ],
+}
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def parquet_enabled(config: dict[str, Any]) -> bool:
+    return bool((config.get("artifacts", {}) or {}).get("parquet", False))
+
+
+def parquet_path(jsonl_path: Path) -> Path:
+    return jsonl_path.with_suffix(".parquet")
+
+
+def _specs(artifact: str, columns: Sequence[str] | None) -> list[ColumnSpec]:
+    if artifact not in ARTIFACT_COLUMNS:
+        raise ValueError(f"未知的列式产物: {artifact}（可选 {tuple(ARTIFACT_COLUMNS)}）")
+    specs = ARTIFACT_COLUMNS[artifact]
+    if columns is None:
+        return specs
+    by_name = {spec[0]: spec for spec in specs}
+    missing = [name for name in columns if name not in by_name]
+    if missing:
+        raise KeyError(f"{artifact} 没有列: {missing}")
+    return [by_name[name] for name in columns]
+
+
+def flatten_row(artifact: str, row: Row, columns: Sequence[str] | None = None) -> Row:
+    return {name: get(row) for name, _, get in _specs(artifact, columns)}
+
+
+def _arrow_schema(specs: list[ColumnSpec]) -> Any:
+    import pyarrow as pa
+
+    types = {"string": pa.string(), "int64": pa.int64(), "float64": pa.float64()}
+    return pa.schema([(name, types[dtype]) for name, dtype, _ in specs])
+
+
+def _arrow_table(values: list[list[Any]], schema: Any) -> Any:
+    import pyarrow as pa
+
+    return pa.Table.from_arrays(
+        [pa.array(column, type=t) for column, t in zip(values, schema.types)],
+        schema=schema,
+    )
+
+
+def write_parquet(
+    path: Path,
+    rows: Iterable[Row],
+    artifact: str,
+    row_group_rows: int = DEFAULT_ROW_GROUP_ROWS,
+) -> int:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("artifacts.parquet 需要安装 pyarrow（pip install pyarrow）") from exc
+    specs = _specs(artifact, None)
+    schema = _arrow_schema(specs)
+    row_group_rows = max(1, int(row_group_rows))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    count = 0
+    with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+        batch: list[list[Any]] = [[] for _ in specs]
+        for row in rows:
+            for values, (_, _, get) in zip(batch, specs):
+                values.append(get(row))
+            count += 1
+            if len(batch[0]) >= row_group_rows:
+                writer.write_table(_arrow_table(batch, schema))
+                batch = [[] for _ in specs]
+        if batch[0] or not count:
+            writer.write_table(_arrow_table(batch, schema))
+    tmp_path.replace(path)
+    return count
+
+
+def export_parquet(
+    jsonl_path: Path, artifact: str, row_group_rows: int = DEFAULT_ROW_GROUP_ROWS
+) -> Path:
+    out = parquet_path(jsonl_path)
+    write_parquet(out, iter_jsonl(jsonl_path), artifact, row_group_rows)
+    return out
+
+
+def export_configured(config: dict[str, Any], jsonl_path: Path, artifact: str) -> bool:
+    if not parquet_enabled(config):
+        return False
+    row_group_rows = int(
+        (config.get("artifacts", {}) or {}).get("row_group_rows", DEFAULT_ROW_GROUP_ROWS)
+    )
+    export_parquet(jsonl_path, artifact, row_group_rows)
+    return True
+
+
+def parquet_is_fresh(jsonl_path: Path) -> bool:
+    columnar = parquet_path(jsonl_path)
+    if not columnar.exists() or not parquet_available():
+        return False
+    if not jsonl_path.exists():
+        return True
+    return columnar.stat().st_mtime_ns >= jsonl_path.stat().st_mtime_ns
+
+
+def _numpy_column(values: list[Any], dtype: str) -> np.ndarray:
+    if dtype == "string":
+        return np.array(values, dtype=object)
+    if dtype == "float64" or any(v is None for v in values):
+        return np.array(
+            [math.nan if v is None else float(v) for v in values], dtype=np.float64
+        )
+    return np.array(values, dtype=np.int64)
+
+
+def iter_column_batches(
+    jsonl_path: Path,
+    artifact: str,
+    columns: Sequence[str] | None = None,
+    chunk_rows: int = DEFAULT_ROW_GROUP_ROWS,
+) -> Iterator[dict[str, np.ndarray]]:
+    specs = _specs(artifact, columns)
+    chunk_rows = max(1, int(chunk_rows))
+    if parquet_is_fresh(jsonl_path):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(parquet_path(jsonl_path))
+        for batch in parquet.iter_batches(
+            batch_size=chunk_rows, columns=[name for name, _, _ in specs]
+        ):
+            yield {
+                name: batch.column(i).to_numpy(zero_copy_only=False)
+                for i, name in enumerate(batch.schema.names)
+            }
+        return
+    values: list[list[Any]] = [[] for _ in specs]
+    for row in iter_jsonl(jsonl_path):
+        for column, (_, _, get) in zip(values, specs):
+            column.append(get(row))
+        if len(values[0]) >= chunk_rows:
+            yield {
+                name: _numpy_column(column, dtype)
+                for column, (name, dtype, _) in zip(values, specs)
+            }
+            values = [[] for _ in specs]
+    if values[0]:
+        yield {
+            name: _numpy_column(column, dtype)
+            for column, (name, dtype, _) in zip(values, specs)
+        }
+
+
+def load_columns(
+    jsonl_path: Path, artifact: str, columns: Sequence[str] | None = None
+) -> dict[str, np.ndarray]:
+    specs = _specs(artifact, columns)
+    if parquet_is_fresh(jsonl_path):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(
+            parquet_path(jsonl_path), columns=[name for name, _, _ in specs]
+        )
+        return {name: table.column(name).to_numpy() for name, _, _ in specs}
+    parts = list(iter_column_batches(jsonl_path, artifact, columns))
+    return {
+        name: np.concatenate([part[name] for part in parts])
+        if parts
+        else _numpy_column([], dtype)
+        for name, dtype, _ in specs
+    }
+
+
+def iter_column_rows(
+    jsonl_path: Path,
+    artifact: str,
+    columns: Sequence[str] | None = None,
+    chunk_rows: int = DEFAULT_ROW_GROUP_ROWS,
+) -> Iterator[Row]:
+    for batch in iter_column_batches(jsonl_path, artifact, columns, chunk_rows):
+        names = list(batch)
+        for values in zip(*(batch[name].tolist() for name in names)):
+            yield dict(zip(names, values))
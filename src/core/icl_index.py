@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Iterable
+
+import numpy as np
+
+
+STRATEGIES = ("similarity", "first")
+
+
+def char_ngrams(text: str, ngram_range: tuple[int, int] = (2, 3)) -> dict[str, int]:
+    chars = "".join(text.split())
+    counts: dict[str, int] = {}
+    low, high = ngram_range
+    for n in range(low, high + 1):
+        for i in range(len(chars) - n + 1):
+            gram = chars[i : i + n]
+            counts[gram] = counts.get(gram, 0) + 1
+    if not counts and chars:
+        for ch in chars:
+            counts[ch] = counts.get(ch, 0) + 1
+    return counts
+
+
+class ICLIndex:
+    def __init__(
+        self,
+        bank: list[dict[str, Any]],
+        seed: int = 0,
+        strategy: str = "similarity",
+        ngram_range: tuple[int, int] = (2, 3),
+        max_df: float = 0.2,
+        max_postings: int = 1024,
+        max_query_grams: int = 16,
+    ) -> None:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"未知的 ICL 检索策略: {strategy}（可选 {STRATEGIES}）")
+        self.strategy = strategy
+        self.ngram_range = ngram_range
+        self.max_postings = max(1, int(max_postings))
+        self.max_query_grams = max(1, int(max_query_grams))
+        self.n_docs = len(bank)
+        self.mtypes = [str(ex.get("metaphor_type", "mixed_other")) for ex in bank]
+        self.sids = [str(ex.get("sid")) for ex in bank]
+        self.sid_positions: dict[str, list[int]] = {}
+        for pos, sid in enumerate(self.sids):
+            self.sid_positions.setdefault(sid, []).append(pos)
+
+        self.by_type: dict[str, list[int]] = {}
+        for pos, mtype in enumerate(self.mtypes):
+            self.by_type.setdefault(mtype, []).append(pos)
+
+        rng = np.random.default_rng(seed)
+        self.tiebreak = np.empty(self.n_docs, dtype=np.int64)
+        self.tiebreak[rng.permutation(self.n_docs)] = np.arange(self.n_docs)
+        self.type_codes = {mtype: code for code, mtype in enumerate(sorted(self.by_type))}
+        self.doc_type = np.array(
+            [self.type_codes[mtype] for mtype in self.mtypes], dtype=np.int32
+        )
+        self.fill_order = {
+            mtype: sorted(positions, key=lambda pos: self.tiebreak[pos])
+            for mtype, positions in self.by_type.items()
+        }
+        self.global_fill_order = np.argsort(self.tiebreak, kind="stable")
+
+        self.vocab: dict[str, int] = {}
+        self.idf = np.zeros(0, dtype=np.float64)
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.post_docs = np.zeros(0, dtype=np.int64)
+        self.post_weights = np.zeros(0, dtype=np.float64)
+        if strategy == "similarity" and bank:
+            self._build([str(ex.get("text_zh", "")) for ex in bank], max_df)
+
+    def _build(self, texts: list[str], max_df: float) -> None:
+        feats: list[int] = []
+        docs: list[int] = []
+        tfs: list[int] = []
+        vocab: dict[str, int] = {}
+        for doc, text in enumerate(texts):
+            for gram, count in char_ngrams(text, self.ngram_range).items():
+                feats.append(vocab.setdefault(gram, len(vocab)))
+                docs.append(doc)
+                tfs.append(count)
+        feat_arr = np.asarray(feats, dtype=np.int64)
+        doc_arr = np.asarray(docs, dtype=np.int64)
+        tf_arr = np.asarray(tfs, dtype=np.float64)
+        df = np.bincount(feat_arr, minlength=len(vocab)).astype(np.float64)
+        idf = np.log((1.0 + self.n_docs) / (1.0 + df)) + 1.0
+        idf[df > max(1.0, max_df * self.n_docs)] = 0.0
+        weights = (1.0 + np.log(tf_arr)) * idf[feat_arr] if len(tf_arr) else tf_arr
+        norms = np.sqrt(np.bincount(doc_arr, weights=weights**2, minlength=self.n_docs))
+        weights = weights / np.where(norms > 0, norms, 1.0)[doc_arr]
+
+        keep = weights > 0
+        feat_arr, doc_arr, weights = feat_arr[keep], doc_arr[keep], weights[keep]
+        order = np.lexsort((self.tiebreak[doc_arr], -weights, feat_arr))
+        self.post_docs = doc_arr[order]
+        self.post_weights = weights[order]
+        self.indptr = np.concatenate(
+            [[0], np.cumsum(np.bincount(feat_arr, minlength=len(vocab)))]
+        ).astype(np.int64)
+        self.vocab = vocab
+        self.idf = idf
+
+    def _scores(self, text: str) -> tuple[np.ndarray, np.ndarray, int]:
+        query: list[tuple[float, int]] = []
+        for gram, count in char_ngrams(text, self.ngram_range).items():
+            fid = self.vocab.get(gram)
+            if fid is not None and self.idf[fid] > 0.0:
+                query.append(((1.0 + math.log(count)) * float(self.idf[fid]), fid))
+        if not query:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64), 1
+        q_norm = math.sqrt(sum(w * w for w, _ in query))
+        query.sort(key=lambda item: (-item[0], item[1]))
+        parts_docs: list[np.ndarray] = []
+        parts_weights: list[np.ndarray] = []
+        for q_weight, fid in query[: self.max_query_grams]:
+            start = self.indptr[fid]
+            end = min(self.indptr[fid + 1], start + self.max_postings)
+            parts_docs.append(self.post_docs[start:end])
+            parts_weights.append(self.post_weights[start:end] * (q_weight / q_norm))
+        docs = np.concatenate(parts_docs)
+        dense = np.bincount(
+            docs, weights=np.concatenate(parts_weights), minlength=self.n_docs
+        )
+        return docs, dense[docs], len(parts_docs)
+
+    def _rank(
+        self,
+        docs: np.ndarray,
+        scores: np.ndarray,
+        mask: np.ndarray,
+        excluded: set[int],
+        quota: int,
+        fill: Iterable[int],
+        max_repeats: int = 1,
+    ) -> list[int]:
+        picked: list[int] = []
+        if quota <= 0:
+            return picked
+        cand = docs[mask]
+        cand_scores = scores[mask]
+        if len(cand):
+            top = min(len(cand), (quota + len(excluded)) * max_repeats)
+            if top < len(cand):
+                part = np.argpartition(-cand_scores, top - 1)[:top]
+                threshold = cand_scores[part].min()
+                keep = cand_scores >= threshold
+                cand, cand_scores = cand[keep], cand_scores[keep]
+            order = np.lexsort((self.tiebreak[cand], -cand_scores))
+            for pos in cand[order].tolist():
+                if pos not in excluded and pos not in picked:
+                    picked.append(pos)
+                    if len(picked) >= quota:
+                        return picked
+        seen = set(picked)
+        for pos in fill:
+            pos = int(pos)
+            if pos not in excluded and pos not in seen:
+                picked.append(pos)
+                if len(picked) >= quota:
+                    break
+        return picked
+
+    def _first(self, k: int, excluded: set[int], target_mtype: str) -> list[int]:
+        quota = min(k, max(1, k // 2 + 1))
+        selected: list[int] = []
+        for pos in self.by_type.get(target_mtype, []):
+            if len(selected) >= quota:
+                break
+            if pos not in excluded:
+                selected.append(pos)
+        if len(selected) < k:
+            for pos, mtype in enumerate(self.mtypes):
+                if len(selected) >= k:
+                    break
+                if pos not in excluded and mtype != target_mtype:
+                    selected.append(pos)
+        return selected[:k]
+
+    def select(
+        self,
+        text: str,
+        target_mtype: str,
+        k: int,
+        exclude_sids: Iterable[str] = (),
+    ) -> list[int]:
+        excluded = {
+            pos for sid in exclude_sids for pos in self.sid_positions.get(str(sid), [])
+        }
+        if k <= 0 or not self.n_docs:
+            return []
+        if self.strategy == "first":
+            return self._first(k, excluded, target_mtype)
+        docs, scores, repeats = self._scores(text)
+        code = self.type_codes.get(target_mtype, -1)
+        same_mask = self.doc_type[docs] == code
+        same_quota = (
+            min(k, max(1, k // 2 + 1)) if target_mtype in self.by_type else 0
+        )
+        selected = self._rank(
+            docs,
+            scores,
+            same_mask,
+            excluded,
+            same_quota,
+            self.fill_order.get(target_mtype, []),
+            repeats,
+        )
+        other_fill = (
+            pos for pos in self.global_fill_order if self.doc_type[pos] != code
+        )
+        selected.extend(
+            self._rank(
+                docs,
+                scores,
+                ~same_mask,
+                excluded | set(selected),
+                k - len(selected),
+                other_fill,
+                repeats,
+            )
+        )
+        return selected[:k]
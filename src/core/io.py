@@ -1,35 +1,245 @@
 from __future__ import annotations
 
+import dataclasses
 import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable, Iterator, TypeVar
+
+
+Row = dict[str, Any]
+RowKey = Callable[[Row], Any]
+RecordT = TypeVar("RecordT")
+
+CODEC_PREFERENCE = ("orjson", "msgspec", "json")
+WRITE_BUFFER_BYTES = 1 << 20
+
+
+@dataclass(frozen=True)
+class JsonCodec:
+    name: str
+    loads: Callable[[bytes], Any]
+    dumps: Callable[[Any], bytes]
+    record_decoder: Callable[[type], Callable[[bytes], Any]] | None = None
+
+
+def _to_builtin(obj: Any) -> Any:
+    if hasattr(obj, "item") and callable(obj.item):
+        return obj.item()
+    if hasattr(obj, "tolist") and callable(obj.tolist):
+        return obj.tolist()
+    raise TypeError(f"无法序列化为 JSON 的类型: {type(obj).__name__}")
+
+
+def _stdlib_codec() -> JsonCodec:
+    return JsonCodec(
+        name="json",
+        loads=json.loads,
+        dumps=lambda obj: json.dumps(
+            obj, ensure_ascii=False, default=_to_builtin
+        ).encode("utf-8"),
+    )
+
+
+def _orjson_codec() -> JsonCodec:
+    import orjson
+
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    return JsonCodec(
+        name="orjson",
+        loads=orjson.loads,
+        dumps=lambda obj: orjson.dumps(obj, default=_to_builtin, option=option),
+    )
+
+
+def _msgspec_codec() -> JsonCodec:
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=_to_builtin)
+    decoder = msgspec.json.Decoder()
+    return JsonCodec(
+        name="msgspec",
+        loads=decoder.decode,
+        dumps=encoder.encode,
+        record_decoder=lambda record_type: msgspec.json.Decoder(record_type).decode,
+    )
+
+
+_CODEC_FACTORIES: dict[str, Callable[[], JsonCodec]] = {
+    "orjson": _orjson_codec,
+    "msgspec": _msgspec_codec,
+    "json": _stdlib_codec,
+}
+
+
+@lru_cache(maxsize=None)
+def get_codec(name: str = "auto") -> JsonCodec:
+    if name != "auto":
+        if name not in _CODEC_FACTORIES:
+            raise ValueError(f"未知的 JSON 编解码器: {name}（可选 {CODEC_PREFERENCE}）")
+        return _CODEC_FACTORIES[name]()
+    for candidate in CODEC_PREFERENCE:
+        try:
+            return _CODEC_FACTORIES[candidate]()
+        except ImportError:
+            continue
+    return _stdlib_codec()
+
+
+def _record_codec(default: JsonCodec) -> JsonCodec:
+    pinned = os.getenv("INKSTONE_JSON_CODEC", "auto") != "auto"
+    if pinned or default.record_decoder is not None:
+        return default
+    try:
+        return get_codec("msgspec")
+    except ImportError:
+        return default
+
+
+CODEC = get_codec(os.getenv("INKSTONE_JSON_CODEC", "auto"))
+RECORD_CODEC = _record_codec(CODEC)
 
 
 def ensure_parent(path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
-def read_jsonl(path: Path) -> list[dict[str, Any]]:
+def iter_jsonl(path: Path, codec: JsonCodec | None = None) -> Iterator[Row]:
     if not path.exists():
-        return []
-    rows: list[dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as f:
+        return
+    loads = (codec or CODEC).loads
+    with path.open("rb") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
-            rows.append(json.loads(line))
-    return rows
+            yield loads(line)
 
 
-def write_jsonl(path: Path, rows: Iterable[dict[str, Any]]) -> None:
+@lru_cache(maxsize=None)
+def _record_fields(record_type: type) -> frozenset[str]:
+    return frozenset(f.name for f in dataclasses.fields(record_type))
+
+
+def _record_from_row(record_type: type[RecordT], row: Row) -> RecordT:
+    names = _record_fields(record_type)
+    return record_type(**{k: v for k, v in row.items() if k in names})
+
+
+def iter_records(
+    path: Path, record_type: type[RecordT], codec: JsonCodec | None = None
+) -> Iterator[RecordT]:
+    codec = codec or RECORD_CODEC
+    if codec.record_decoder is not None:
+        decode = codec.record_decoder(record_type)
+        if not path.exists():
+            return
+        with path.open("rb") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield decode(line)
+        return
+    for row in iter_jsonl(path, codec):
+        yield _record_from_row(record_type, row)
+
+
+def read_jsonl(path: Path) -> list[dict[str, Any]]:
+    return list(iter_jsonl(path))
+
+
+def row_key(row: Row) -> tuple[str, str]:
+    return str(row["sid"]), str(row["system_id"])
+
+
+def sid_key(row: Row) -> str:
+    return str(row["sid"])
+
+
+def artifact_order(eval_path: Path, trans_path: Path) -> tuple[RowKey, RowKey]:
+    sid_pos = {str(row["sid"]): i for i, row in enumerate(iter_jsonl(eval_path))}
+    system_pos: dict[str, int] = {}
+    for row in iter_jsonl(trans_path):
+        system_pos.setdefault(str(row["system_id"]), len(system_pos))
+
+    def sid_order(row: Row) -> tuple[int, str]:
+        sid = str(row["sid"])
+        return sid_pos.get(sid, len(sid_pos)), sid
+
+    def row_order(row: Row) -> tuple[int, str, int, str]:
+        system_id = str(row["system_id"])
+        return (
+            *sid_order(row),
+            system_pos.get(system_id, len(system_pos)),
+            system_id,
+        )
+
+    return row_order, sid_order
+
+
+def merge_join(
+    left: Iterable[Row],
+    right: Iterable[Row],
+    left_key: RowKey = row_key,
+    right_key: RowKey = row_key,
+) -> Iterator[tuple[Row, Row | None]]:
+    right_iter = iter(right)
+    pending = next(right_iter, None)
+    matched_key: Any = None
+    matched_row: Row | None = None
+    previous_left: Any = None
+    previous_right: Any = None
+    for row in left:
+        key = left_key(row)
+        if previous_left is not None and key < previous_left:
+            raise ValueError(f"连接输入未按键排序: {previous_left} > {key}")
+        previous_left = key
+        while pending is not None:
+            candidate = right_key(pending)
+            if candidate > key:
+                break
+            if previous_right is not None and candidate < previous_right:
+                raise ValueError(f"连接输入未按键排序: {previous_right} > {candidate}")
+            previous_right = candidate
+            matched_key, matched_row = candidate, pending
+            pending = next(right_iter, None)
+        yield row, matched_row if matched_key == key else None
+
+
+def _write_lines(
+    path: Path, mode: str, rows: Iterable[Any], codec: JsonCodec | None
+) -> int:
     ensure_parent(path)
-    with path.open("w", encoding="utf-8") as f:
+    dumps = (codec or CODEC).dumps
+    parts: list[bytes] = []
+    buffered = 0
+    count = 0
+    with path.open(mode) as f:
         for row in rows:
-            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            if dataclasses.is_dataclass(row) and not isinstance(row, type):
+                row = dataclasses.asdict(row)
+            line = dumps(row) + b"\n"
+            parts.append(line)
+            buffered += len(line)
+            count += 1
+            if buffered >= WRITE_BUFFER_BYTES:
+                f.write(b"".join(parts))
+                parts.clear()
+                buffered = 0
+        if parts:
+            f.write(b"".join(parts))
+    return count
 
 
-def append_jsonl(path: Path, row: dict[str, Any]) -> None:
-    ensure_parent(path)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+def write_jsonl(
+    path: Path, rows: Iterable[dict[str, Any]], codec: JsonCodec | None = None
+) -> int:
+    return _write_lines(path, "wb", rows, codec)
+
+
+def append_jsonl(
+    path: Path, row: dict[str, Any], codec: JsonCodec | None = None
+) -> None:
+    _write_lines(path, "ab", [row], codec)
@@ -1,10 +1,28 @@
 from __future__ import annotations
 
+import hashlib
 import importlib
 import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable, Sequence, TypeVar
+
+from src.core.cache import ResponseCache
+from src.core.rate_limit import estimate_tokens, get_limiter
+from src.core.retry import backoff_delay, classify_error, get_breaker, retry_after_sec
+
+
+_RESPONSE_CACHE: ResponseCache | None = None
+_CLIENTS: dict[tuple[str, str | None, str, float, int], Any] = {}
+_CLIENT_LOCK = threading.Lock()
+_CLIENT_STATS = {"clients_built": 0, "client_reuse": 0}
+
+ChatRequest = tuple[str, str]
+_T = TypeVar("_T")
 
 
 @dataclass(slots=True)
@@ -16,9 +34,21 @@ class LLMConfig:
     temperature: float = 0.2
     timeout: float = 60.0
     max_retries: int = 1
+    pool_size: int = 10
+    max_concurrency: int = 4
+    rpm: float = 0.0
+    tpm: float = 0.0
+    endpoint_max_concurrent: int = 0
+    backoff_base_sec: float = 1.0
+    backoff_max_sec: float = 30.0
+    breaker_threshold: int = 5
+    breaker_cooldown_sec: float = 30.0
+    prefix_ordering: bool = False
 
 
 def llm_config_from_dict(cfg: dict[str, Any]) -> LLMConfig:
+    rate_cfg = cfg.get("rate_limit") or {}
+    retry_cfg = cfg.get("retry") or {}
     return LLMConfig(
         provider=str(cfg.get("provider", "openai_compatible")),
         model=str(cfg.get("model", "")),
@@ -27,9 +57,33 @@ def llm_config_from_dict(cfg: dict[str, Any]) -> LLMConfig:
         temperature=float(cfg.get("temperature", 0.2)),
         timeout=float(cfg.get("timeout", 60.0)),
         max_retries=int(cfg.get("max_retries", 1)),
+        pool_size=int(cfg.get("pool_size", 10)),
+        max_concurrency=int(cfg.get("max_concurrency", 4)),
+        rpm=float(rate_cfg.get("rpm", 0) or 0),
+        tpm=float(rate_cfg.get("tpm", 0) or 0),
+        endpoint_max_concurrent=int(rate_cfg.get("max_concurrent", 0) or 0),
+        backoff_base_sec=float(retry_cfg.get("backoff_base_sec", 1.0)),
+        backoff_max_sec=float(retry_cfg.get("backoff_max_sec", 30.0)),
+        breaker_threshold=int(retry_cfg.get("breaker_threshold", 5)),
+        breaker_cooldown_sec=float(retry_cfg.get("breaker_cooldown_sec", 30.0)),
+        prefix_ordering=bool(cfg.get("prefix_ordering", False)),
     )
 
 
+def _build_http_client(config: LLMConfig) -> Any | None:
+    try:
+        httpx_mod = importlib.import_module("httpx")
+        openai_mod = importlib.import_module("openai")
+        http_client_cls = getattr(openai_mod, "DefaultHttpxClient")
+        limits = httpx_mod.Limits(
+            max_connections=max(1, config.pool_size),
+            max_keepalive_connections=max(1, config.pool_size),
+        )
+        return http_client_cls(limits=limits, timeout=config.timeout)
+    except Exception:
+        return None
+
+
 def _build_client(config: LLMConfig) -> Any:
     if config.provider != "openai_compatible":
         raise ValueError(f"暂不支持的 provider: {config.provider}")
@@ -41,45 +95,177 @@ def _build_client(config: LLMConfig) -> Any:
         return None
     openai_mod = importlib.import_module("openai")
     client_cls = getattr(openai_mod, "OpenAI")
-    kwargs: dict[str, Any] = {"api_key": key, "timeout": config.timeout}
+    kwargs: dict[str, Any] = {
+        "api_key": key,
+        "timeout": config.timeout,
+        "max_retries": 0,
+    }
     if config.base_url:
         kwargs["base_url"] = config.base_url
+    http_client = _build_http_client(config)
+    if http_client is not None:
+        kwargs["http_client"] = http_client
     return client_cls(**kwargs)
 
 
-def chat_text(config: LLMConfig, system_prompt: str, user_prompt: str) -> str | None:
+def _client_key(config: LLMConfig) -> tuple[str, str | None, str, float, int]:
+    return (
+        config.provider,
+        config.base_url,
+        config.api_key_env,
+        config.timeout,
+        config.pool_size,
+    )
+
+
+def endpoint_key(config: LLMConfig) -> str:
+    return f"{config.provider}|{config.base_url or 'default'}"
+
+
+def get_client(config: LLMConfig) -> Any:
+    key = _client_key(config)
+    with _CLIENT_LOCK:
+        client = _CLIENTS.get(key)
+        if client is not None:
+            _CLIENT_STATS["client_reuse"] += 1
+            return client
+        client = _build_client(config)
+        if client is not None:
+            _CLIENTS[key] = client
+            _CLIENT_STATS["clients_built"] += 1
+        return client
+
+
+def client_pool_stats() -> dict[str, int]:
+    with _CLIENT_LOCK:
+        return {"clients": len(_CLIENTS), **_CLIENT_STATS}
+
+
+def close_clients() -> None:
+    with _CLIENT_LOCK:
+        for client in _CLIENTS.values():
+            try:
+                client.close()
+            except Exception:
+                pass
+        _CLIENTS.clear()
+        _CLIENT_STATS["clients_built"] = 0
+        _CLIENT_STATS["client_reuse"] = 0
+
+
+def configure_response_cache(
+    db_path: Path, cfg: dict[str, Any] | None = None
+) -> ResponseCache | None:
+    global _RESPONSE_CACHE
+    cfg = cfg or {}
+    if not bool(cfg.get("enabled", True)):
+        if _RESPONSE_CACHE is not None:
+            _RESPONSE_CACHE.close()
+        _RESPONSE_CACHE = None
+        return None
+    ttl_days = cfg.get("ttl_days")
+    ttl_sec = float(ttl_days) * 86400.0 if ttl_days else None
+    max_entries = int(cfg.get("max_entries", 200000))
+    current = _RESPONSE_CACHE
+    if current is not None and current.db_path == db_path:
+        current.ttl_sec = ttl_sec
+        current.max_entries = max(1, max_entries)
+        current.reset_stats()
+        return current
+    if current is not None:
+        current.close()
+    _RESPONSE_CACHE = ResponseCache(db_path, ttl_sec=ttl_sec, max_entries=max_entries)
+    return _RESPONSE_CACHE
+
+
+def response_cache_stats() -> dict[str, int]:
+    if _RESPONSE_CACHE is None:
+        return {}
+    return _RESPONSE_CACHE.stats()
+
+
+def request_fingerprint(
+    config: LLMConfig,
+    system_prompt: str,
+    user_prompt: str,
+    required_fields: list[str] | None = None,
+) -> str:
+    payload = json.dumps(
+        [
+            config.provider,
+            config.model,
+            config.base_url,
+            config.temperature,
+            system_prompt,
+            user_prompt,
+            sorted(required_fields) if required_fields is not None else None,
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _complete(config: LLMConfig, system_prompt: str, user_prompt: str) -> str | None:
     attempts = max(1, int(config.max_retries) + 1)
-    for _ in range(attempts):
+    endpoint = endpoint_key(config)
+    limiter = get_limiter(
+        endpoint,
+        {
+            "rpm": config.rpm,
+            "tpm": config.tpm,
+            "max_concurrent": config.endpoint_max_concurrent,
+        },
+    )
+    breaker = get_breaker(
+        endpoint,
+        {
+            "failure_threshold": config.breaker_threshold,
+            "cooldown_sec": config.breaker_cooldown_sec,
+        },
+    )
+    tokens = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+    for attempt in range(attempts):
+        if attempt > 0:
+            breaker.record_retry()
+        retry_after: float | None = None
         try:
-            client = _build_client(config)
+            client = get_client(config)
             if client is None:
                 return None
-            response = client.chat.completions.create(
-                model=config.model,
-                temperature=config.temperature,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-            )
+            if not breaker.allow():
+                return None
+            with limiter.acquire(tokens):
+                response = client.chat.completions.create(
+                    model=config.model,
+                    temperature=config.temperature,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                )
             content = response.choices[0].message.content
-            if content is None:
-                continue
-            return str(content).strip()
-        except Exception:
-            continue
+            breaker.record_success()
+            if content is not None:
+                return str(content).strip()
+        except Exception as exc:
+            kind = classify_error(exc)
+            breaker.record_failure(kind)
+            if kind != "retryable":
+                return None
+            retry_after = retry_after_sec(exc)
+        if attempt + 1 < attempts:
+            time.sleep(
+                backoff_delay(
+                    attempt,
+                    config.backoff_base_sec,
+                    config.backoff_max_sec,
+                    retry_after=retry_after,
+                )
+            )
     return None
 
 
-def chat_json(
-    config: LLMConfig,
-    system_prompt: str,
-    user_prompt: str,
-    required_fields: list[str],
-) -> dict[str, Any] | None:
-    text = chat_text(config, system_prompt, user_prompt)
-    if text is None:
-        return None
+def _parse_json(text: str, required_fields: list[str]) -> dict[str, Any] | None:
     try:
         obj = json.loads(text)
     except Exception:
@@ -90,3 +276,120 @@ def chat_json(
         if field not in obj:
             return None
     return obj
+
+
+def chat_text(config: LLMConfig, system_prompt: str, user_prompt: str) -> str | None:
+    cache = _RESPONSE_CACHE
+    key = request_fingerprint(config, system_prompt, user_prompt)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    text = _complete(config, system_prompt, user_prompt)
+    if text is not None and cache is not None:
+        cache.set(key, text)
+    return text
+
+
+def chat_json(
+    config: LLMConfig,
+    system_prompt: str,
+    user_prompt: str,
+    required_fields: list[str],
+) -> dict[str, Any] | None:
+    cache = _RESPONSE_CACHE
+    key = request_fingerprint(config, system_prompt, user_prompt, required_fields)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            obj = _parse_json(cached, required_fields)
+            if obj is not None:
+                return obj
+    text = _complete(config, system_prompt, user_prompt)
+    if text is None:
+        return None
+    obj = _parse_json(text, required_fields)
+    if obj is not None and cache is not None:
+        cache.set(key, text)
+    return obj
+
+
+def prefix_order(requests: Sequence[ChatRequest]) -> list[int]:
+    return sorted(range(len(requests)), key=lambda i: (requests[i][0], requests[i][1]))
+
+
+def send_order(config: LLMConfig, requests: Sequence[ChatRequest]) -> list[int]:
+    if config.prefix_ordering:
+        return prefix_order(requests)
+    return list(range(len(requests)))
+
+
+def _common_prefix(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def prefix_share(
+    requests: Sequence[ChatRequest], order: Sequence[int] | None = None
+) -> float:
+    order = list(range(len(requests))) if order is None else list(order)
+    total = 0
+    shared = 0
+    previous = ""
+    for idx in order:
+        prompt = requests[idx][0] + "\x00" + requests[idx][1]
+        total += len(prompt)
+        shared += _common_prefix(previous, prompt)
+        previous = prompt
+    return round(shared / total, 4) if total else 0.0
+
+
+def _run_many(
+    config: LLMConfig,
+    fn: Callable[[ChatRequest], _T],
+    requests: Sequence[ChatRequest],
+    on_result: Callable[[int, _T], None] | None = None,
+) -> list[_T]:
+    if not requests:
+        return []
+    order = send_order(config, requests)
+
+    def run(index: int) -> _T:
+        out = fn(requests[index])
+        if on_result is not None:
+            on_result(index, out)
+        return out
+
+    workers = max(1, min(int(config.max_concurrency), len(requests)))
+    if workers == 1:
+        outputs = [run(i) for i in order]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(run, order))
+    by_index = dict(zip(order, outputs))
+    return [by_index[i] for i in range(len(requests))]
+
+
+def chat_text_many(
+    config: LLMConfig,
+    requests: Sequence[ChatRequest],
+    on_result: Callable[[int, str | None], None] | None = None,
+) -> list[str | None]:
+    return _run_many(
+        config, lambda req: chat_text(config, req[0], req[1]), requests, on_result
+    )
+
+
+def chat_json_many(
+    config: LLMConfig,
+    requests: Sequence[ChatRequest],
+    required_fields: list[str],
+) -> list[dict[str, Any] | None]:
+    return _run_many(
+        config,
+        lambda req: chat_json(config, req[0], req[1], required_fields),
+        requests,
+    )
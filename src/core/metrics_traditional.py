@@ -1,43 +1,209 @@
 from __future__ import annotations
 
+import hashlib
 import importlib
-from typing import Any
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Sequence
 
+if TYPE_CHECKING:
+    from src.core.cache import MetricScoreCache
 
-def sentence_bleu(reference: str, hypothesis: str) -> float:
+
+ScoreItem = tuple[str, str, str, str]
+
+
+@dataclass(frozen=True)
+class MetricBackends:
+    bleu: str
+    chrf: str
+    meteor: str
+    corpus: str = "sentence_mean"
+    versions: dict[str, str] = field(default_factory=dict)
+    sentence_bleu: Callable[[str, str], float] | None = field(
+        default=None, repr=False, compare=False
+    )
+    sentence_chrf: Callable[[str, str], float] | None = field(
+        default=None, repr=False, compare=False
+    )
+    sentence_meteor: Callable[[str, str], float] | None = field(
+        default=None, repr=False, compare=False
+    )
+    segment_stats: Callable[
+        [list[str], list[str]], tuple[list[list[int]], list[list[int]]]
+    ] | None = field(default=None, repr=False, compare=False)
+    corpus_from_stats: Callable[
+        [list[list[int]], list[list[int]]], tuple[float, float]
+    ] | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def version_tag(self) -> str:
+        return ";".join(
+            [
+                f"bleu={self.bleu}",
+                f"chrf={self.chrf}",
+                f"meteor={self.meteor}",
+                f"corpus={self.corpus}",
+            ]
+            + [f"{name}-{version}" for name, version in sorted(self.versions.items())]
+        )
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "bleu": self.bleu,
+            "chrf": self.chrf,
+            "meteor": self.meteor,
+            "corpus": self.corpus,
+            "versions": dict(self.versions),
+        }
+
+
+def _overlap_bleu(reference: str, hypothesis: str) -> float:
+    ref_tokens = reference.split()
+    hyp_tokens = hypothesis.split()
+    if not ref_tokens or not hyp_tokens:
+        return 0.0
+    overlap = len(set(ref_tokens) & set(hyp_tokens))
+    precision = overlap / max(1, len(hyp_tokens))
+    return round(precision * 100.0, 4)
+
+
+def _overlap_meteor(reference: str, hypothesis: str) -> float:
+    ref_tokens = reference.split()
+    hyp_tokens = hypothesis.split()
+    if not ref_tokens or not hyp_tokens:
+        return 0.0
+    overlap = len(set(ref_tokens) & set(hyp_tokens))
+    recall = overlap / max(1, len(ref_tokens))
+    precision = overlap / max(1, len(hyp_tokens))
+    if recall + precision == 0:
+        return 0.0
+    return (10 * precision * recall) / (recall + 9 * precision)
+
+
+def _overlap_chrf(reference: str, hypothesis: str) -> float:
+    ref_chars = set("".join(reference.split()))
+    hyp_chars = set("".join(hypothesis.split()))
+    if not ref_chars or not hyp_chars:
+        return 0.0
+    overlap = len(ref_chars & hyp_chars)
+    precision = overlap / len(hyp_chars)
+    recall = overlap / len(ref_chars)
+    if precision + recall == 0:
+        return 0.0
+    return round(500.0 * precision * recall / (4 * precision + recall), 4)
+
+
+SegmentStatsFn = Callable[[list[str], list[str]], tuple[list[list[int]], list[list[int]]]]
+CorpusFromStatsFn = Callable[[list[list[int]], list[list[int]]], tuple[float, float]]
+
+
+def _sacrebleu_corpus_fns(
+    corpus_metric: Any, chrf_metric: Any
+) -> tuple[SegmentStatsFn, CorpusFromStatsFn]:
+    def segment_stats(
+        references: list[str], hypotheses: list[str]
+    ) -> tuple[list[list[int]], list[list[int]]]:
+        return tuple(
+            [
+                [int(value) for value in row]
+                for row in metric._extract_corpus_statistics(hypotheses, [references])
+            ]
+            for metric in (corpus_metric, chrf_metric)
+        )
+
+    def corpus_from_stats(
+        bleu_stats: list[list[int]], chrf_stats: list[list[int]]
+    ) -> tuple[float, float]:
+        return (
+            float(corpus_metric._aggregate_and_compute(bleu_stats).score),
+            float(chrf_metric._aggregate_and_compute(chrf_stats).score),
+        )
+
+    probe_bleu, probe_chrf = segment_stats(["a b c"], ["a b d"])
+    corpus_from_stats(probe_bleu, probe_chrf)
+    return segment_stats, corpus_from_stats
+
+
+@lru_cache(maxsize=1)
+def resolve_backends() -> MetricBackends:
+    versions: dict[str, str] = {}
+    bleu_name, chrf_name, meteor_name = "overlap", "overlap", "overlap"
+    corpus_name = "sentence_mean"
+    bleu_fn: Callable[[str, str], float] = _overlap_bleu
+    chrf_fn: Callable[[str, str], float] = _overlap_chrf
+    meteor_fn: Callable[[str, str], float] = _overlap_meteor
+    segment_stats_fn: SegmentStatsFn | None = None
+    corpus_from_stats_fn: CorpusFromStatsFn | None = None
     try:
         sacrebleu_mod = importlib.import_module("sacrebleu")
-        sentence_bleu_fn = getattr(sacrebleu_mod, "sentence_bleu")
-        score_obj = sentence_bleu_fn(hypothesis, [reference])
-        return float(score_obj.score)
-    except Exception:
-        ref_tokens = reference.split()
-        hyp_tokens = hypothesis.split()
-        if not ref_tokens or not hyp_tokens:
-            return 0.0
-        overlap = len(set(ref_tokens) & set(hyp_tokens))
-        precision = overlap / max(1, len(hyp_tokens))
-        return round(precision * 100.0, 4)
+        metrics_mod = importlib.import_module("sacrebleu.metrics")
+        sentence_metric = metrics_mod.BLEU(effective_order=True)
+        corpus_metric = metrics_mod.BLEU()
+        chrf_metric = metrics_mod.CHRF()
+        sentence_metric.sentence_score("a b", ["a b"])
 
+        def sacrebleu_bleu(reference: str, hypothesis: str) -> float:
+            return float(sentence_metric.sentence_score(hypothesis, [reference]).score)
 
-def sentence_meteor(reference: str, hypothesis: str) -> float:
+        def sacrebleu_chrf(reference: str, hypothesis: str) -> float:
+            return float(chrf_metric.sentence_score(hypothesis, [reference]).score)
+
+        bleu_fn, chrf_fn = sacrebleu_bleu, sacrebleu_chrf
+        bleu_name = chrf_name = "sacrebleu"
+        versions["sacrebleu"] = str(getattr(sacrebleu_mod, "__version__", "unknown"))
+        try:
+            segment_stats_fn, corpus_from_stats_fn = _sacrebleu_corpus_fns(
+                corpus_metric, chrf_metric
+            )
+            corpus_name = "sacrebleu_stats"
+        except Exception:
+            pass
+    except Exception:
+        pass
     try:
+        nltk_mod = importlib.import_module("nltk")
         meteor_mod = importlib.import_module("nltk.translate.meteor_score")
         meteor_score_fn = getattr(meteor_mod, "meteor_score")
-        ref_tokens = reference.split()
-        hyp_tokens = hypothesis.split()
-        return float(meteor_score_fn([ref_tokens], hyp_tokens))
+        meteor_score_fn([["the", "cat"]], ["a", "dog"])
+
+        def nltk_meteor(reference: str, hypothesis: str) -> float:
+            return float(meteor_score_fn([reference.split()], hypothesis.split()))
+
+        meteor_fn = nltk_meteor
+        meteor_name = "nltk"
+        versions["nltk"] = str(getattr(nltk_mod, "__version__", "unknown"))
     except Exception:
-        ref_tokens = reference.split()
-        hyp_tokens = hypothesis.split()
-        if not ref_tokens or not hyp_tokens:
-            return 0.0
-        overlap = len(set(ref_tokens) & set(hyp_tokens))
-        recall = overlap / max(1, len(ref_tokens))
-        precision = overlap / max(1, len(hyp_tokens))
-        if recall + precision == 0:
-            return 0.0
-        return (10 * precision * recall) / (recall + 9 * precision)
+        pass
+    return MetricBackends(
+        bleu=bleu_name,
+        chrf=chrf_name,
+        meteor=meteor_name,
+        corpus=corpus_name,
+        versions=versions,
+        sentence_bleu=bleu_fn,
+        sentence_chrf=chrf_fn,
+        sentence_meteor=meteor_fn,
+        segment_stats=segment_stats_fn,
+        corpus_from_stats=corpus_from_stats_fn,
+    )
+
+
+def sentence_bleu(reference: str, hypothesis: str) -> float:
+    return resolve_backends().sentence_bleu(reference, hypothesis)
+
+
+def sentence_chrf(reference: str, hypothesis: str) -> float:
+    return resolve_backends().sentence_chrf(reference, hypothesis)
+
+
+def sentence_meteor(reference: str, hypothesis: str) -> float:
+    return resolve_backends().sentence_meteor(reference, hypothesis)
 
 
 def compute_traditional_row(
@@ -48,3 +214,205 @@ def compute_traditional_row(
         "meteor": sentence_meteor(reference, hypothesis),
         "reference_source": reference_source,
     }
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def score_chunk(pairs: list[tuple[str, str]]) -> list[dict[str, Any]]:
+    backends = resolve_backends()
+    refs = [reference for reference, _ in pairs]
+    hyps = [hypothesis for _, hypothesis in pairs]
+    if backends.segment_stats is not None and pairs:
+        bleu_stats, chrf_stats = backends.segment_stats(refs, hyps)
+    else:
+        bleu_stats = chrf_stats = [None] * len(pairs)
+    return [
+        {
+            "bleu": backends.sentence_bleu(reference, hypothesis),
+            "chrf": backends.sentence_chrf(reference, hypothesis),
+            "meteor": backends.sentence_meteor(reference, hypothesis),
+            "bleu_stats": bleu_stat,
+            "chrf_stats": chrf_stat,
+        }
+        for (reference, hypothesis), bleu_stat, chrf_stat in zip(
+            pairs, bleu_stats, chrf_stats
+        )
+    ]
+
+
+def _score_bulk(
+    pairs: list[tuple[str, str]], workers: int, shard_size: int
+) -> tuple[list[dict[str, Any]], int]:
+    shard_size = max(1, int(shard_size))
+    shards = [pairs[i : i + shard_size] for i in range(0, len(pairs), shard_size)]
+    if workers > 0 and len(shards) > 1:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(shards)), mp_context=ctx
+        ) as pool:
+            scored = [row for part in pool.map(score_chunk, shards) for row in part]
+            return scored, workers
+    return [row for shard in shards for row in score_chunk(shard)], 0
+
+
+class CorpusTotals:
+    def __init__(self) -> None:
+        self.rows = 0
+        self.bleu_sum = 0.0
+        self.chrf_sum = 0.0
+        self.bleu_stats: list[int] | None = None
+        self.chrf_stats: list[int] | None = None
+        self.complete_stats = True
+
+    def add(self, row: dict[str, Any]) -> None:
+        self.rows += 1
+        self.bleu_sum += float(row["bleu"])
+        self.chrf_sum += float(row["chrf"])
+        bleu_stat, chrf_stat = row.get("bleu_stats"), row.get("chrf_stats")
+        if bleu_stat is None or chrf_stat is None:
+            self.complete_stats = False
+            return
+        if self.bleu_stats is None or self.chrf_stats is None:
+            self.bleu_stats, self.chrf_stats = list(bleu_stat), list(chrf_stat)
+            return
+        self.bleu_stats = [a + b for a, b in zip(self.bleu_stats, bleu_stat)]
+        self.chrf_stats = [a + b for a, b in zip(self.chrf_stats, chrf_stat)]
+
+    def scores(self) -> tuple[float, float]:
+        if not self.rows:
+            return 0.0, 0.0
+        backends = resolve_backends()
+        if (
+            backends.corpus_from_stats is not None
+            and self.complete_stats
+            and self.bleu_stats is not None
+            and self.chrf_stats is not None
+        ):
+            return backends.corpus_from_stats([self.bleu_stats], [self.chrf_stats])
+        return self.bleu_sum / self.rows, self.chrf_sum / self.rows
+
+
+def corpus_scores(scored: Iterable[dict[str, Any]]) -> tuple[float, float]:
+    totals = CorpusTotals()
+    for row in scored:
+        totals.add(row)
+    return totals.scores()
+
+
+def _engine_stats(
+    totals: CorpusTotals, computed: int, workers: int, elapsed: float
+) -> dict[str, Any]:
+    corpus_bleu, corpus_chrf = totals.scores()
+    return {
+        "backend": resolve_backends().describe(),
+        "rows": totals.rows,
+        "computed": computed,
+        "workers": workers,
+        "elapsed_sec": round(elapsed, 3),
+        "rows_per_sec": round(computed / elapsed, 1) if computed and elapsed > 0 else 0.0,
+        "corpus_bleu": float(corpus_bleu),
+        "corpus_chrf": float(corpus_chrf),
+    }
+
+
+def score_pairs(
+    references: Sequence[str],
+    hypotheses: Sequence[str],
+    workers: int = 0,
+    shard_size: int = 512,
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    if len(references) != len(hypotheses):
+        raise ValueError(
+            f"参考译文与候选译文数量不一致: {len(references)} != {len(hypotheses)}"
+        )
+    t0 = time.perf_counter()
+    scored, used_workers = _score_bulk(
+        list(zip(references, hypotheses)), workers, shard_size
+    )
+    totals = CorpusTotals()
+    for row in scored:
+        totals.add(row)
+    return scored, _engine_stats(
+        totals, len(scored), used_workers, time.perf_counter() - t0
+    )
+
+
+def _score_cached_chunk(
+    items: list[ScoreItem],
+    cache: MetricScoreCache | None,
+    workers: int,
+    shard_size: int,
+) -> tuple[list[dict[str, Any]], int, int]:
+    backend = resolve_backends().version_tag
+    keys = [
+        (sid, system_id, text_hash(reference), text_hash(hypothesis), backend)
+        for sid, system_id, reference, hypothesis in items
+    ]
+    found = cache.get_many(keys) if cache is not None else {}
+    scored: list[dict[str, Any] | None] = [
+        json.loads(found[key]) if key in found else None for key in keys
+    ]
+    missing = [i for i, row in enumerate(scored) if row is None]
+    fresh, used_workers = _score_bulk(
+        [(items[i][2], items[i][3]) for i in missing], workers, shard_size
+    )
+    for i, row in zip(missing, fresh):
+        scored[i] = row
+    if cache is not None and fresh:
+        cache.set_many(
+            (keys[i], json.dumps(row, ensure_ascii=False))
+            for i, row in zip(missing, fresh)
+        )
+    return [row for row in scored if row is not None], len(missing), used_workers
+
+
+def iter_scored_items(
+    items: Iterable[ScoreItem],
+    stats: dict[str, Any],
+    cache: MetricScoreCache | None = None,
+    workers: int = 0,
+    shard_size: int = 512,
+    chunk_rows: int = 8192,
+) -> Iterator[tuple[ScoreItem, dict[str, Any]]]:
+    t0 = time.perf_counter()
+    totals = CorpusTotals()
+    computed = 0
+    used_workers = 0
+    chunk_rows = max(1, int(chunk_rows))
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunk_rows))
+        if not chunk:
+            break
+        scored, misses, chunk_workers = _score_cached_chunk(
+            chunk, cache, workers, shard_size
+        )
+        computed += misses
+        used_workers = max(used_workers, chunk_workers)
+        for item, row in zip(chunk, scored):
+            totals.add(row)
+            yield item, row
+    stats.update(_engine_stats(totals, computed, used_workers, time.perf_counter() - t0))
+    stats["cache"] = {
+        "enabled": cache is not None,
+        "hits": totals.rows - computed if cache is not None else 0,
+        "misses": computed if cache is not None else 0,
+    }
+
+
+def score_items(
+    items: Sequence[ScoreItem],
+    cache: MetricScoreCache | None = None,
+    workers: int = 0,
+    shard_size: int = 512,
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    stats: dict[str, Any] = {}
+    rows = [
+        row
+        for _, row in iter_scored_items(
+            items, stats, cache, workers, shard_size, max(1, len(items))
+        )
+    ]
+    return rows, stats
@@ -16,3 +16,12 @@ def normalize_text(text: str) -> str:
 def stable_sid(text_zh: str, source: str, local_id: str) -> str:
     payload = f"{normalize_text(text_zh)}::{source}::{local_id}"
     return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def collapse_space(text: str) -> str:
+    return _SPACE_RE.sub(" ", text.strip())
+
+
+def content_key(*texts: str) -> str:
+    payload = "\x1f".join(collapse_space(text) for text in texts)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
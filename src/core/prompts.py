@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from string import Template
+from typing import Any, Callable
+
+
+DEFAULT_MAX_PREFIXES = 1024
+
+
+@dataclass(frozen=True, slots=True)
+class PromptTemplate:
+    name: str
+    text: str
+    sha: str
+
+    @property
+    def fields(self) -> tuple[str, ...]:
+        return _placeholders(self.text)[0]
+
+
+def _placeholders(text: str) -> tuple[tuple[str, ...], bool]:
+    names: list[str] = []
+    valid = True
+    for match in Template.pattern.finditer(text):
+        name = match.group("named") or match.group("braced")
+        if name is not None:
+            names.append(name)
+        elif match.group("invalid") is not None:
+            valid = False
+    return tuple(dict.fromkeys(names)), valid
+
+
+def _load(name: str, text: str, source: str) -> PromptTemplate:
+    if not text.strip():
+        raise ValueError(f"提示词模板为空: {source}")
+    fields, valid = _placeholders(text)
+    if fields and not valid:
+        raise ValueError(f"提示词模板占位符不合法: {source}")
+    return PromptTemplate(
+        name=name,
+        text=text,
+        sha=hashlib.sha256(text.encode("utf-8")).hexdigest()[:12],
+    )
+
+
+def _compile(template: PromptTemplate) -> tuple[Template, tuple[str, ...]]:
+    fields, valid = _placeholders(template.text)
+    if not valid:
+        raise ValueError(f"提示词模板占位符不合法: {template.name}")
+    return Template(template.text), fields
+
+
+class PromptRegistry:
+    def __init__(
+        self, prompt_dir: Path, max_prefixes: int = DEFAULT_MAX_PREFIXES
+    ) -> None:
+        self.prompt_dir = Path(prompt_dir)
+        self.max_prefixes = max(1, int(max_prefixes))
+        self._templates: dict[str, PromptTemplate] = {}
+        self._compiled: dict[str, tuple[Template, tuple[str, ...]]] = {}
+        self._prefixes: OrderedDict[tuple[Any, ...], str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.render_sec = 0.0
+        self.prefix_hits = 0
+        self.prefix_misses = 0
+        if self.prompt_dir.is_dir():
+            for path in sorted(self.prompt_dir.glob("*.txt")):
+                self._templates[path.stem] = _load(
+                    path.stem, path.read_text(encoding="utf-8"), str(path)
+                )
+
+    def register(self, name: str, text: str) -> PromptTemplate:
+        with self._lock:
+            existing = self._templates.get(name)
+            if existing is not None:
+                if existing.text != text:
+                    raise ValueError(f"提示词模板重复注册且内容不同: {name}")
+                return existing
+            template = _load(name, text, name)
+            self._templates[name] = template
+            return template
+
+    def get(self, name: str, default: str | None = None) -> PromptTemplate:
+        template = self._templates.get(name)
+        if template is not None:
+            return template
+        if default is None:
+            raise FileNotFoundError(
+                f"未找到提示词模板: {self.prompt_dir / (name + '.txt')}"
+            )
+        return self.register(name, default)
+
+    def text(self, name: str, default: str | None = None) -> str:
+        return self.get(name, default).text
+
+    def sha(self, name: str, default: str | None = None) -> str:
+        return self.get(name, default).sha
+
+    def _compiled_template(self, name: str) -> tuple[Template, tuple[str, ...]]:
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            compiled = _compile(self.get(name))
+            with self._lock:
+                self._compiled[name] = compiled
+        return compiled
+
+    def render(self, name: str, /, **fields: Any) -> str:
+        template, names = self._compiled_template(name)
+        missing = [field for field in names if field not in fields]
+        if missing:
+            raise ValueError(f"提示词模板 {name} 缺少字段: {missing}")
+        t0 = time.perf_counter()
+        rendered = template.substitute(fields)
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.renders += 1
+            self.render_sec += elapsed
+        return rendered
+
+    def prefix(self, key: tuple[Any, ...], build: Callable[[], str]) -> str:
+        with self._lock:
+            cached = self._prefixes.get(key)
+            if cached is not None:
+                self._prefixes.move_to_end(key)
+                self.prefix_hits += 1
+                return cached
+        t0 = time.perf_counter()
+        built = build()
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.prefix_misses += 1
+            self.renders += 1
+            self.render_sec += elapsed
+            cached = self._prefixes.setdefault(key, built)
+            self._prefixes.move_to_end(key)
+            while len(self._prefixes) > self.max_prefixes:
+                self._prefixes.popitem(last=False)
+            return cached
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "templates": len(self._templates),
+                "renders": self.renders,
+                "render_ms": round(self.render_sec * 1000, 3),
+                "prefix_hits": self.prefix_hits,
+                "prefix_misses": self.prefix_misses,
+                "prefix_entries": len(self._prefixes),
+                "hashes": {name: t.sha for name, t in sorted(self._templates.items())},
+            }
+
+
+_REGISTRIES: dict[Path, PromptRegistry] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_registry(prompt_dir: Path | str) -> PromptRegistry:
+    key = Path(prompt_dir).resolve()
+    with _REGISTRY_LOCK:
+        registry = _REGISTRIES.get(key)
+        if registry is None:
+            registry = PromptRegistry(key)
+            _REGISTRIES[key] = registry
+        return registry
+
+
+def reset_registries() -> None:
+    with _REGISTRY_LOCK:
+        _REGISTRIES.clear()
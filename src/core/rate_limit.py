@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+
+def estimate_tokens(text: str) -> int:
+    cjk = sum(1 for ch in text if "\u3400" <= ch <= "\u9fff")
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+class TokenBucket:
+    def __init__(self, rate_per_min: float, burst_sec: float = 10.0) -> None:
+        self.rate = max(1e-9, float(rate_per_min) / 60.0)
+        self.capacity = max(1.0, self.rate * float(burst_sec))
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        self._refill(now)
+        self.level -= min(float(amount), self.capacity)
+        if self.level >= 0:
+            return 0.0
+        return -self.level / self.rate
+
+    def peek(self, now: float) -> float:
+        return min(self.capacity, self.level + (now - self.updated) * self.rate)
+
+
+class EndpointLimiter:
+    def __init__(
+        self,
+        rpm: float = 0.0,
+        tpm: float = 0.0,
+        max_concurrent: int = 0,
+        burst_sec: float = 10.0,
+    ) -> None:
+        self.rpm = float(rpm)
+        self.tpm = float(tpm)
+        self.max_concurrent = int(max_concurrent)
+        self._requests = TokenBucket(rpm, burst_sec) if rpm > 0 else None
+        self._tokens = TokenBucket(tpm, burst_sec) if tpm > 0 else None
+        self._slots = (
+            threading.BoundedSemaphore(self.max_concurrent)
+            if self.max_concurrent > 0
+            else None
+        )
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.tokens = 0
+        self.throttled = 0
+        self.waited_sec = 0.0
+        self.max_wait_sec = 0.0
+        self.in_flight = 0
+
+    def _reserve(self, tokens: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            wait = 0.0
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1, now))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            self.requests += 1
+            self.tokens += int(tokens)
+            if wait > 0:
+                self.throttled += 1
+                self.waited_sec += wait
+                self.max_wait_sec = max(self.max_wait_sec, wait)
+            return wait
+
+    @contextmanager
+    def acquire(self, tokens: int) -> Iterator[float]:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        if self._slots is not None:
+            self._slots.acquire()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield wait
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            if self._slots is not None:
+                self._slots.release()
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "max_concurrent": self.max_concurrent,
+                "request_bucket": (
+                    round(self._requests.peek(now), 3)
+                    if self._requests is not None
+                    else None
+                ),
+                "token_bucket": (
+                    round(self._tokens.peek(now), 1)
+                    if self._tokens is not None
+                    else None
+                ),
+                "requests": self.requests,
+                "tokens": self.tokens,
+                "throttled": self.throttled,
+                "waited_sec": round(self.waited_sec, 3),
+                "max_wait_sec": round(self.max_wait_sec, 3),
+                "in_flight": self.in_flight,
+            }
+
+
+LimiterSettings = tuple[float, float, int, float]
+
+_LIMITERS: dict[tuple[str, LimiterSettings], EndpointLimiter] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def registry_stats(registry: dict[tuple[str, tuple[Any, ...]], Any]) -> dict[str, dict[str, Any]]:
+    per_endpoint = Counter(endpoint for endpoint, _ in registry)
+    return {
+        endpoint
+        if per_endpoint[endpoint] == 1
+        else f"{endpoint}|{','.join(f'{v:g}' for v in settings)}": item.stats()
+        for (endpoint, settings), item in registry.items()
+    }
+
+
+def get_limiter(endpoint: str, cfg: dict[str, Any] | None = None) -> EndpointLimiter:
+    cfg = cfg or {}
+    settings: LimiterSettings = (
+        float(cfg.get("rpm", 0) or 0),
+        float(cfg.get("tpm", 0) or 0),
+        int(cfg.get("max_concurrent", 0) or 0),
+        float(cfg.get("burst_sec", 10.0)),
+    )
+    with _REGISTRY_LOCK:
+        limiter = _LIMITERS.get((endpoint, settings))
+        if limiter is None:
+            rpm, tpm, max_concurrent, burst_sec = settings
+            limiter = EndpointLimiter(
+                rpm=rpm, tpm=tpm, max_concurrent=max_concurrent, burst_sec=burst_sec
+            )
+            _LIMITERS[(endpoint, settings)] = limiter
+        return limiter
+
+
+def rate_limit_stats() -> dict[str, dict[str, Any]]:
+    with _REGISTRY_LOCK:
+        limiters = dict(_LIMITERS)
+    return registry_stats(limiters)
+
+
+def reset_limiters() -> None:
+    with _REGISTRY_LOCK:
+        _LIMITERS.clear()
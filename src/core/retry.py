@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+from src.core.rate_limit import registry_stats
+
+
+_RETRYABLE_STATUS = {408, 409, 425, 429}
+_ENDPOINT_FAILURE_STATUS = {401, 403, 404}
+_RETRYABLE_NAMES = {
+    "APITimeoutError",
+    "APIConnectionError",
+    "Timeout",
+    "TimeoutException",
+    "ConnectError",
+    "ConnectTimeout",
+    "ReadTimeout",
+    "RemoteProtocolError",
+}
+
+
+def _status_code(exc: BaseException) -> int | None:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_sec(exc: BaseException) -> float | None:
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        raw_ms = headers.get("retry-after-ms")
+        if raw_ms:
+            return max(0.0, float(raw_ms) / 1000.0)
+        raw = headers.get("retry-after")
+        if not raw:
+            return None
+        try:
+            return max(0.0, float(raw))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(str(raw)).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def classify_error(exc: BaseException) -> str:
+    status = _status_code(exc)
+    if status is not None:
+        if status in _RETRYABLE_STATUS or status >= 500:
+            return "retryable"
+        if status in _ENDPOINT_FAILURE_STATUS:
+            return "endpoint_fatal"
+        return "fatal"
+    if type(exc).__name__ in _RETRYABLE_NAMES:
+        return "retryable"
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return "retryable"
+    return "fatal"
+
+
+def backoff_delay(
+    attempt: int,
+    base_sec: float,
+    max_sec: float,
+    retry_after: float | None = None,
+    rng: random.Random | None = None,
+) -> float:
+    if retry_after is not None:
+        return min(float(max_sec), float(retry_after))
+    ceiling = min(float(max_sec), float(base_sec) * (2 ** max(0, attempt)))
+    return ceiling * (0.5 + 0.5 * (rng or random).random())
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, cooldown_sec: float = 30.0) -> None:
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown_sec = float(cooldown_sec)
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.trips = 0
+        self.short_circuited = 0
+        self.retries = 0
+        self.retryable_errors = 0
+        self.fatal_errors = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown_sec:
+                self.state = "half_open"
+                self.probe_in_flight = False
+            if self.state == "half_open" and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self, kind: str) -> None:
+        with self._lock:
+            if kind == "retryable":
+                self.retryable_errors += 1
+            else:
+                self.fatal_errors += 1
+            if kind == "fatal":
+                self.probe_in_flight = False
+                return
+            self.consecutive_failures += 1
+            if self.state == "half_open" or (
+                self.state == "closed"
+                and self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self.trips += 1
+            self.probe_in_flight = False
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "trips": self.trips,
+                "consecutive_failures": self.consecutive_failures,
+                "short_circuited": self.short_circuited,
+                "retries": self.retries,
+                "retryable_errors": self.retryable_errors,
+                "fatal_errors": self.fatal_errors,
+            }
+
+
+BreakerSettings = tuple[int, float]
+
+_BREAKERS: dict[tuple[str, BreakerSettings], CircuitBreaker] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_breaker(endpoint: str, cfg: dict[str, Any] | None = None) -> CircuitBreaker:
+    cfg = cfg or {}
+    settings: BreakerSettings = (
+        int(cfg.get("failure_threshold", 5)),
+        float(cfg.get("cooldown_sec", 30.0)),
+    )
+    with _REGISTRY_LOCK:
+        breaker = _BREAKERS.get((endpoint, settings))
+        if breaker is None:
+            breaker = CircuitBreaker(
+                failure_threshold=settings[0], cooldown_sec=settings[1]
+            )
+            _BREAKERS[(endpoint, settings)] = breaker
+        return breaker
+
+
+def breaker_stats() -> dict[str, dict[str, Any]]:
+    with _REGISTRY_LOCK:
+        breakers = dict(_BREAKERS)
+    return registry_stats(breakers)
+
+
+def reset_breakers() -> None:
+    with _REGISTRY_LOCK:
+        _BREAKERS.clear()
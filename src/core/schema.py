@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Any
 
@@ -29,3 +29,45 @@ class SourceItem:
     @staticmethod
     def now_iso() -> str:
         return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass(slots=True)
+class TranslationRecord:
+    sid: str
+    system_id: str
+    text_zh: str
+    translation: str
+    prompt_version: str = ""
+    prompt_hash: str = ""
+
+
+@dataclass(slots=True)
+class PersonaGoldRecord:
+    sid: str
+    system_id: str
+    scores_gold: dict[str, int]
+    OV_gold: int
+    range: dict[str, int]
+    persona_outputs: list[dict[str, Any]] = field(default_factory=list)
+    skipped_personas: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class JudgeScoreRecord:
+    sid: str
+    system_id: str
+    scores_model: dict[str, int]
+    OV_model: int
+    judge_prompt_version: str = ""
+    judge_prompt_hash: str = ""
+    judge_mode: str = ""
+    icl_target_mtype: str = ""
+    icl_k: int = 0
+
+
+ARTIFACT_RECORDS: dict[str, type] = {
+    "eval_set": SourceItem,
+    "translations": TranslationRecord,
+    "persona_gold": PersonaGoldRecord,
+    "judge_scores": JudgeScoreRecord,
+}
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import multiprocessing
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from typing import Any, Iterable
+
+import numpy as np
+
+from src.core.schema import DIMENSIONS
+from src.core.stats import (
+    DEFAULT_CHUNK_ELEMS,
+    approximate_randomization_pvalue,
+    paired_bootstrap,
+)
+
+
+SIGNIFICANCE_METRICS = ("OV", *DIMENSIONS)
+
+PairTask = tuple[str, str, str, list[float], list[float], int, int, int]
+
+
+def task_seed(seed: int, *labels: str) -> list[int]:
+    return [int(seed), *(zlib.crc32(label.encode("utf-8")) for label in labels)]
+
+
+def _scores(row: dict[str, Any], score_key: str, ov_key: str) -> tuple[float, ...]:
+    return (
+        float(row[ov_key]),
+        *(float(row[score_key][metric]) for metric in SIGNIFICANCE_METRICS[1:]),
+    )
+
+
+def compare_pair(task: PairTask) -> dict[str, Any]:
+    system_a, system_b, metric, a_vals, b_vals, n_resamples, seed, chunk_elems = task
+    a = np.asarray(a_vals, dtype=np.float64)
+    b = np.asarray(b_vals, dtype=np.float64)
+    diffs = a - b
+    n = len(diffs)
+    mean_diff = float(diffs.mean()) if n else 0.0
+    std = float(diffs.std(ddof=1)) if n > 1 else 0.0
+    boot = paired_bootstrap(
+        diffs,
+        n_resamples,
+        task_seed(seed, system_a, system_b, metric, "bootstrap"),
+        chunk_elems,
+    )
+    return {
+        "system_a": system_a,
+        "system_b": system_b,
+        "metric": metric,
+        "n": n,
+        "mean_a": float(a.mean()) if n else 0.0,
+        "mean_b": float(b.mean()) if n else 0.0,
+        "mean_diff": mean_diff,
+        "cohens_d": mean_diff / std if std > 0 else 0.0,
+        "ci95": boot["ci95"],
+        "bootstrap_pvalue": boot["pvalue"],
+        "randomization_pvalue": approximate_randomization_pvalue(
+            diffs,
+            n_resamples,
+            task_seed(seed, system_a, system_b, metric, "randomization"),
+            chunk_elems,
+        ),
+    }
+
+
+def pair_tasks(
+    rows: Iterable[dict[str, Any]],
+    n_resamples: int,
+    seed: int,
+    chunk_elems: int = DEFAULT_CHUNK_ELEMS,
+    score_key: str = "scores_model",
+    ov_key: str = "OV_model",
+) -> list[PairTask]:
+    by_system: dict[str, dict[str, tuple[float, ...]]] = {}
+    for row in rows:
+        by_system.setdefault(str(row["system_id"]), {})[str(row["sid"])] = _scores(
+            row, score_key, ov_key
+        )
+    tasks: list[PairTask] = []
+    for system_a, system_b in combinations(sorted(by_system), 2):
+        left, right = by_system[system_a], by_system[system_b]
+        sids = sorted(set(left) & set(right))
+        for col, metric in enumerate(SIGNIFICANCE_METRICS):
+            tasks.append(
+                (
+                    system_a,
+                    system_b,
+                    metric,
+                    [left[sid][col] for sid in sids],
+                    [right[sid][col] for sid in sids],
+                    n_resamples,
+                    seed,
+                    chunk_elems,
+                )
+            )
+    return tasks
+
+
+def compare_systems(
+    rows: Iterable[dict[str, Any]],
+    n_resamples: int,
+    seed: int,
+    workers: int = 0,
+    chunk_elems: int = DEFAULT_CHUNK_ELEMS,
+    score_key: str = "scores_model",
+    ov_key: str = "OV_model",
+) -> list[dict[str, Any]]:
+    tasks = pair_tasks(rows, n_resamples, seed, chunk_elems, score_key, ov_key)
+    if workers > 0 and len(tasks) > 1:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)), mp_context=ctx
+        ) as pool:
+            return list(pool.map(compare_pair, tasks))
+    return [compare_pair(task) for task in tasks]
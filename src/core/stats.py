@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import math
+import random
+from typing import Any, Iterator, Sequence
+
+import numpy as np
+
+
+DEFAULT_CHUNK_ELEMS = 1 << 22
+
+
+def rankdata(values: Any, axis: int = -1) -> np.ndarray:
+    arr = np.moveaxis(np.asarray(values, dtype=np.float64), axis, -1)
+    n = arr.shape[-1]
+    if n == 0:
+        return np.moveaxis(arr.copy(), -1, axis)
+    order = np.argsort(arr, axis=-1, kind="stable")
+    ordered = np.take_along_axis(arr, order, axis=-1)
+    pos = np.broadcast_to(np.arange(n), arr.shape)
+    starts = np.ones(arr.shape, dtype=bool)
+    starts[..., 1:] = ordered[..., 1:] != ordered[..., :-1]
+    ends = np.ones(arr.shape, dtype=bool)
+    ends[..., :-1] = starts[..., 1:]
+    first = np.maximum.accumulate(np.where(starts, pos, 0), axis=-1)
+    last = np.minimum.accumulate(np.where(ends, pos, n - 1)[..., ::-1], axis=-1)[
+        ..., ::-1
+    ]
+    ranks = np.empty(arr.shape, dtype=np.float64)
+    np.put_along_axis(ranks, order, (first + last + 2) / 2.0, axis=-1)
+    return np.moveaxis(ranks, -1, axis)
+
+
+def _unit_rows(arr: np.ndarray) -> np.ndarray:
+    centered = arr - arr.mean(axis=-1, keepdims=True)
+    norms = np.sqrt(np.einsum("...i,...i->...", centered, centered))
+    constant = np.ptp(arr, axis=-1) == 0
+    safe = np.where(constant | (norms == 0), 1.0, norms)
+    centered = centered / safe[..., None]
+    centered[constant] = 0.0
+    return centered
+
+
+def pearson_rows(a: Any, b: Any) -> np.ndarray:
+    left = np.asarray(a, dtype=np.float64)
+    right = np.asarray(b, dtype=np.float64)
+    if left.shape != right.shape or left.shape[-1] < 2:
+        return np.zeros(left.shape[:-1], dtype=np.float64)
+    return np.einsum("...i,...i->...", _unit_rows(left), _unit_rows(right))
+
+
+def pearson(x: Sequence[float], y: Sequence[float]) -> float:
+    if len(x) != len(y) or len(x) < 2:
+        return 0.0
+    return float(pearson_rows(x, y))
+
+
+def spearman(x: Sequence[float], y: Sequence[float]) -> float:
+    if len(x) != len(y) or len(x) < 2:
+        return 0.0
+    return float(pearson_rows(rankdata(x), rankdata(y)))
+
+
+def spearman_matrix(xs: Any, ys: Any) -> np.ndarray:
+    left = np.atleast_2d(np.asarray(xs, dtype=np.float64))
+    right = np.atleast_2d(np.asarray(ys, dtype=np.float64))
+    if left.shape[-1] != right.shape[-1] or left.shape[-1] < 2:
+        return np.zeros((left.shape[0], right.shape[0]), dtype=np.float64)
+    return _unit_rows(rankdata(left)) @ _unit_rows(rankdata(right)).T
+
+
+def python_random_generator(seed: int) -> np.random.MT19937:
+    state = random.Random(seed).getstate()[1]
+    generator = np.random.MT19937()
+    generator.state = {
+        "bit_generator": "MT19937",
+        "state": {"key": np.asarray(state[:624], dtype=np.uint32), "pos": state[624]},
+    }
+    return generator
+
+
+def iter_bootstrap_indices(
+    n: int, n_bootstrap: int, seed: int, chunk_rows: int
+) -> Iterator[np.ndarray]:
+    if not 1 <= n < 1 << 32:
+        raise ValueError(f"bootstrap 样本量超出范围: {n}")
+    generator = python_random_generator(seed)
+    shift = 32 - n.bit_length()
+    pending = np.zeros(0, dtype=np.int64)
+    remaining = max(0, int(n_bootstrap))
+    while remaining:
+        rows = min(max(1, int(chunk_rows)), remaining)
+        need = rows * n
+        parts = [pending]
+        have = len(pending)
+        while have < need:
+            raw = (generator.random_raw(2 * (need - have) + 64) >> shift).astype(np.int64)
+            accepted = raw[raw < n]
+            parts.append(accepted)
+            have += len(accepted)
+        flat = np.concatenate(parts)
+        pending = flat[need:]
+        remaining -= rows
+        yield flat[:need].reshape(rows, n)
+
+
+def bootstrap_indices(n: int, n_bootstrap: int, seed: int) -> np.ndarray:
+    return np.concatenate(
+        list(iter_bootstrap_indices(n, n_bootstrap, seed, max(1, n_bootstrap)))
+    )
+
+
+def chunk_rows_for(n: int, chunk_elems: int = DEFAULT_CHUNK_ELEMS) -> int:
+    return max(1, int(chunk_elems) // max(1, n))
+
+
+def _resampled_ranks(codes: np.ndarray, n_codes: int, idx: np.ndarray) -> np.ndarray:
+    rows = idx.shape[0]
+    picked = codes[idx]
+    offsets = (np.arange(rows, dtype=np.int64) * n_codes)[:, None]
+    counts = np.bincount(
+        (picked + offsets).ravel(), minlength=rows * n_codes
+    ).reshape(rows, n_codes)
+    below = np.cumsum(counts, axis=1) - counts
+    return (
+        np.take_along_axis(below, picked, axis=1)
+        + (np.take_along_axis(counts, picked, axis=1) + 1) / 2.0
+    )
+
+
+def bootstrap_spearman(
+    x: Sequence[float],
+    y: Sequence[float],
+    n_bootstrap: int,
+    seed: int,
+    chunk_elems: int = DEFAULT_CHUNK_ELEMS,
+) -> np.ndarray:
+    left_values, left_codes = np.unique(
+        np.asarray(x, dtype=np.float64), return_inverse=True
+    )
+    right_values, right_codes = np.unique(
+        np.asarray(y, dtype=np.float64), return_inverse=True
+    )
+    total = max(1, int(n_bootstrap))
+    samples = np.empty(total, dtype=np.float64)
+    done = 0
+    for idx in iter_bootstrap_indices(
+        len(left_codes), total, seed, chunk_rows_for(len(left_codes), chunk_elems)
+    ):
+        samples[done : done + len(idx)] = pearson_rows(
+            _resampled_ranks(left_codes, len(left_values), idx),
+            _resampled_ranks(right_codes, len(right_values), idx),
+        )
+        done += len(idx)
+    return samples
+
+
+def percentile_ci(samples: np.ndarray) -> dict[str, float]:
+    ordered = np.sort(np.asarray(samples, dtype=np.float64))
+    return {
+        "low": float(ordered[int(0.025 * (len(ordered) - 1))]),
+        "high": float(ordered[int(0.975 * (len(ordered) - 1))]),
+        "mean": float(math.fsum(ordered) / len(ordered)),
+    }
+
+
+def bootstrap_ci_spearman(
+    x: Sequence[float],
+    y: Sequence[float],
+    n_bootstrap: int,
+    seed: int,
+    chunk_elems: int = DEFAULT_CHUNK_ELEMS,
+) -> dict[str, float]:
+    if len(x) != len(y) or len(x) < 2:
+        return {"low": 0.0, "high": 0.0, "mean": 0.0}
+    return percentile_ci(bootstrap_spearman(x, y, n_bootstrap, seed, chunk_elems))
+
+
+def permutation_pvalue_spearman(
+    x: Sequence[float],
+    y: Sequence[float],
+    n_permutations: int,
+    seed: Any,
+    chunk_elems: int = DEFAULT_CHUNK_ELEMS,
+) -> float:
+    if len(x) != len(y) or len(x) < 2:
+        return 1.0
+    left = _unit_rows(rankdata(x))
+    right = _unit_rows(rankdata(y))
+    observed = abs(float(left @ right)) - 1e-12
+    n = len(left)
+    total = max(1, int(n_permutations))
+    rows = chunk_rows_for(n, chunk_elems)
+    rng = np.random.default_rng(seed)
+    hits = 0
+    for start in range(0, total, rows):
+        count = min(rows, total - start)
+        perm = rng.permuted(np.tile(np.arange(n), (count, 1)), axis=1)
+        hits += int(np.count_nonzero(np.abs(right[perm] @ left) >= observed))
+    return (hits + 1) / (total + 1)
+
+
+def paired_bootstrap(
+    diffs: Sequence[float],
+    n_resamples: int,
+    seed: Any,
+    chunk_elems: int = DEFAULT_CHUNK_ELEMS,
+) -> dict[str, Any]:
+    values = np.asarray(diffs, dtype=np.float64)
+    n = len(values)
+    if n == 0:
+        return {"ci95": {"low": 0.0, "high": 0.0}, "pvalue": 1.0}
+    total = max(1, int(n_resamples))
+    rows = chunk_rows_for(n, chunk_elems)
+    rng = np.random.default_rng(seed)
+    means = np.empty(total, dtype=np.float64)
+    for start in range(0, total, rows):
+        count = min(rows, total - start)
+        means[start : start + count] = values[rng.integers(0, n, size=(count, n))].mean(
+            axis=1
+        )
+    ci = percentile_ci(means)
+    pvalue = 2.0 * min(float(np.mean(means <= 0.0)), float(np.mean(means >= 0.0)))
+    return {"ci95": {"low": ci["low"], "high": ci["high"]}, "pvalue": min(1.0, pvalue)}
+
+
+def approximate_randomization_pvalue(
+    diffs: Sequence[float],
+    n_resamples: int,
+    seed: Any,
+    chunk_elems: int = DEFAULT_CHUNK_ELEMS,
+) -> float:
+    values = np.asarray(diffs, dtype=np.float64)
+    n = len(values)
+    if n == 0:
+        return 1.0
+    observed = abs(float(values.mean())) - 1e-12
+    total = max(1, int(n_resamples))
+    rows = chunk_rows_for(n, chunk_elems)
+    rng = np.random.default_rng(seed)
+    hits = 0
+    for start in range(0, total, rows):
+        count = min(rows, total - start)
+        signs = rng.integers(0, 2, size=(count, n), dtype=np.int8) * 2 - 1
+        hits += int(np.count_nonzero(np.abs(signs @ values) / n >= observed))
+    return (hits + 1) / (total + 1)
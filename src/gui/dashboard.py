@@ -50,6 +50,8 @@ def load_dashboard_data(root: Path) -> dict[str, Any]:
             "translations": processed / "translations.jsonl",
             "translation_stats": processed / "translation_stats.jsonl",
             "persona_gold": processed / "persona_gold.jsonl",
+            "judge_persona_stats": processed / "judge_persona_stats.jsonl",
+            "judge_standard_stats": processed / "judge_standard_stats.jsonl",
             "judge_scores": processed / "judge_scores.jsonl",
             "metrics_traditional": processed / "metrics_traditional.jsonl",
             "data_quality": processed / "data_quality.jsonl",
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import importlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+@dataclass(slots=True)
+class HFJob:
+    model_name: str
+    texts: list[str]
+    batch_size: int = 8
+    max_retries: int = 1
+
+
+def hf_pool_config(config: dict[str, Any]) -> dict[str, int]:
+    cfg = config.get("hf_pool", {}) or {}
+    return {
+        "workers": max(0, int(cfg.get("workers", 0))),
+        "threads_per_worker": max(1, int(cfg.get("threads_per_worker", 1))),
+        "shard_size": max(1, int(cfg.get("shard_size", 64))),
+    }
+
+
+def _init_worker(threads: int) -> None:
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    try:
+        torch = importlib.import_module("torch")
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except Exception:
+        pass
+
+
+def _translate_shard(
+    model_name: str, texts: list[str], batch_size: int, max_retries: int
+) -> list[str | None]:
+    from src.pipeline.translate import _hf_translate_batch
+
+    return _hf_translate_batch(
+        model_name, texts, batch_size=batch_size, max_retries=max_retries
+    )
+
+
+def plan_shards(texts: list[str], batch_size: int, shard_size: int) -> list[list[int]]:
+    order = sorted(range(len(texts)), key=lambda i: (len(texts[i]), i))
+    batch_size = max(1, int(batch_size))
+    per_shard = max(batch_size, (max(1, int(shard_size)) // batch_size) * batch_size)
+    return [order[start : start + per_shard] for start in range(0, len(order), per_shard)]
+
+
+def plan_model_waves(models: list[str], workers: int) -> list[dict[str, int]]:
+    workers = max(1, int(workers))
+    waves: list[dict[str, int]] = []
+    for start in range(0, len(models), workers):
+        wave = models[start : start + workers]
+        base, extra = divmod(workers, len(wave))
+        waves.append({model: base + (i < extra) for i, model in enumerate(wave)})
+    return waves
+
+
+def translate_parallel(
+    jobs: list[HFJob],
+    workers: int,
+    threads_per_worker: int = 1,
+    shard_size: int = 64,
+    timings: list[float] | None = None,
+    on_result: Callable[[int, int, str | None], None] | None = None,
+) -> list[list[str | None]]:
+    t0 = time.perf_counter()
+    results: list[list[str | None]] = [[None] * len(job.texts) for job in jobs]
+    if timings is not None:
+        timings[:] = [0.0] * len(jobs)
+    models = list(dict.fromkeys(job.model_name for job in jobs if job.texts))
+    if not models:
+        return results
+    ctx = multiprocessing.get_context("spawn")
+    for wave in plan_model_waves(models, workers):
+        executors = {
+            model: ProcessPoolExecutor(
+                max_workers=procs,
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(int(threads_per_worker),),
+            )
+            for model, procs in wave.items()
+        }
+        try:
+            pending: dict[Future[list[str | None]], tuple[int, list[int]]] = {}
+            for job_idx, job in enumerate(jobs):
+                if job.model_name not in executors:
+                    continue
+                for shard in plan_shards(job.texts, job.batch_size, shard_size):
+                    future = executors[job.model_name].submit(
+                        _translate_shard,
+                        job.model_name,
+                        [job.texts[i] for i in shard],
+                        job.batch_size,
+                        job.max_retries,
+                    )
+                    pending[future] = (job_idx, shard)
+            for future in as_completed(pending):
+                job_idx, shard = pending[future]
+                for i, out in zip(shard, future.result()):
+                    results[job_idx][i] = out
+                    if on_result is not None:
+                        on_result(job_idx, i, out)
+                if timings is not None:
+                    timings[job_idx] = time.perf_counter() - t0
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+    return results
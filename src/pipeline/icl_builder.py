@@ -1,35 +1,48 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
-from src.core.io import read_jsonl, write_jsonl
+from src.core.io import artifact_order, iter_jsonl, merge_join, write_jsonl
 from src.core.schema import DIMENSIONS
 
 
 def run(config: dict[str, Any]) -> dict[str, Any]:
     _ = config
+    min_personas = int(config.get("judge", {}).get("icl", {}).get("min_personas", 2))
     processed = Path(config["paths"]["data_processed"])
-    persona_rows = read_jsonl(processed / "persona_gold.jsonl")
-    trans_rows = read_jsonl(processed / "translations.jsonl")
-    eval_rows = read_jsonl(processed / "eval_set.jsonl")
-    trans_map = {(r["sid"], r["system_id"]): r for r in trans_rows}
-    eval_map = {r["sid"]: r for r in eval_rows}
-
-    bank: list[dict[str, Any]] = []
-    for row in persona_rows:
-        ranges = row["range"]
-        if row["OV_gold"] < 4:
-            continue
-        if max(int(ranges[d]) for d in DIMENSIONS) > 1:
-            continue
-        trow = trans_map[(row["sid"], row["system_id"])]
-        erow = eval_map.get(row["sid"], {})
-        metaphor_type = erow.get("metaphor_meta", {}).get(
-            "metaphor_type", "mixed_other"
+    persona_path = processed / "persona_gold.jsonl"
+    trans_path = processed / "translations.jsonl"
+    eval_path = processed / "eval_set.jsonl"
+    row_order, sid_order = artifact_order(eval_path, trans_path)
+    count = 0
+
+    def _bank() -> Iterator[dict[str, Any]]:
+        nonlocal count
+        joined = merge_join(
+            merge_join(
+                iter_jsonl(persona_path), iter_jsonl(trans_path), row_order, row_order
+            ),
+            iter_jsonl(eval_path),
+            left_key=lambda pair: sid_order(pair[0]),
+            right_key=sid_order,
         )
-        bank.append(
-            {
+        for (row, trow), erow in joined:
+            ranges = row["range"]
+            if row["OV_gold"] < 4:
+                continue
+            if max(int(ranges[d]) for d in DIMENSIONS) > 1:
+                continue
+            n_personas = len(row.get("persona_outputs", [])) or 3
+            if n_personas < min_personas:
+                continue
+            if trow is None:
+                raise KeyError((row["sid"], row["system_id"]))
+            metaphor_type = (erow or {}).get("metaphor_meta", {}).get(
+                "metaphor_type", "mixed_other"
+            )
+            count += 1
+            yield {
                 "sid": row["sid"],
                 "system_id": row["system_id"],
                 "text_zh": trow["text_zh"],
@@ -39,12 +52,12 @@ def run(config: dict[str, Any]) -> dict[str, Any]:
                 "OV_gold": row["OV_gold"],
                 "gold_rationale": "High-consistency pseudo gold sample.",
                 "consistency_max_range": max(int(ranges[d]) for d in DIMENSIONS),
+                "consistency_personas": n_personas,
             }
-        )
 
     out_path = processed / "few_shot_bank.jsonl"
-    write_jsonl(out_path, bank)
-    return {"rows": len(bank), "few_shot_bank": str(out_path)}
+    write_jsonl(out_path, _bank())
+    return {"rows": count, "few_shot_bank": str(out_path)}
 
 
 if __name__ == "__main__":
@@ -1,11 +1,26 @@
 from __future__ import annotations
 
 import os
+import time
 from pathlib import Path
 from typing import Any
 
+from src.core.checkpoint import checkpoint_config, fingerprint, open_checkpoint
+from src.core.columnar import export_configured
 from src.core.io import read_jsonl, write_jsonl
-from src.core.llm_client import chat_json, llm_config_from_dict
+from src.core.llm_client import (
+    chat_json_many,
+    client_pool_stats,
+    configure_response_cache,
+    llm_config_from_dict,
+    prefix_share,
+    response_cache_stats,
+    send_order,
+)
+from src.core.normalize import content_key
+from src.core.prompts import PromptRegistry, get_registry
+from src.core.rate_limit import rate_limit_stats
+from src.core.retry import breaker_stats
 from src.core.schema import DIMENSIONS
 
 
@@ -26,91 +41,362 @@ def _ov(scores: dict[str, int]) -> int:
     return int(round(sum(w * s for w, s in zip(WEIGHTS, ordered))))
 
 
-def _persona_prompt_file(name: str) -> str:
+_USER_TEMPLATE = (
+    "中文原句：${text_zh}\n"
+    "译文：${translation}\n"
+    "请返回 JSON 字段：scores（包含 IF/EC/RE/CA/LE）、OV、evidence、rationale。"
+)
+_USER_TEMPLATE_VARIABLE_LAST = (
+    "请返回 JSON 字段：scores（包含 IF/EC/RE/CA/LE）、OV、evidence、rationale。\n"
+    "中文原句：${text_zh}\n"
+    "译文：${translation}"
+)
+_JOINT_USER_TEMPLATE = (
+    "中文原句：${text_zh}\n"
+    "译文：${translation}\n"
+    "请返回 JSON：professor、writer、reader 三个键，"
+    "各含 scores（包含 IF/EC/RE/CA/LE）、OV、evidence、rationale。"
+)
+
+
+_JOINT_USER_TEMPLATE_VARIABLE_LAST = (
+    "请返回 JSON：professor、writer、reader 三个键，"
+    "各含 scores（包含 IF/EC/RE/CA/LE）、OV、evidence、rationale。\n"
+    "中文原句：${text_zh}\n"
+    "译文：${translation}"
+)
+
+
+def _persona_prompt_name(name: str) -> str:
     return {
-        "professor": "persona_professor_v1.txt",
-        "writer": "persona_writer_v1.txt",
-        "reader": "persona_reader_v1.txt",
+        "professor": "persona_professor_v1",
+        "writer": "persona_writer_v1",
+        "reader": "persona_reader_v1",
     }[name]
 
 
+def _user_prompt(
+    registry: PromptRegistry, row: dict[str, Any], template: str = "persona_user"
+) -> str:
+    return registry.render(
+        template, text_zh=row["text_zh"], translation=row["translation"]
+    )
+
+
+def _joint_system_prompt(header: str, persona_prompts: dict[str, str]) -> str:
+    blocks = [f"[{persona}]\n{persona_prompts[persona].strip()}" for persona in PERSONAS]
+    return header.strip() + "\n\n" + "\n\n".join(blocks)
+
+
+def _joint_user_prompt(
+    registry: PromptRegistry, row: dict[str, Any], template: str = "persona_joint_user"
+) -> str:
+    return registry.render(
+        template, text_zh=row["text_zh"], translation=row["translation"]
+    )
+
+
+def _llm_scores(llm_json: dict[str, Any] | None) -> dict[str, int] | None:
+    if llm_json is None or not isinstance(llm_json.get("scores"), dict):
+        return None
+    return {
+        dim: max(1, min(5, int(llm_json["scores"].get(dim, 3)))) for dim in DIMENSIONS
+    }
+
+
+def _median_fixed(
+    first: dict[str, Any] | None, second: dict[str, Any] | None
+) -> bool:
+    first_scores = _llm_scores(first)
+    return first_scores is not None and first_scores == _llm_scores(second)
+
+
+def _valid_persona(item: Any) -> bool:
+    if not isinstance(item, dict) or not isinstance(item.get("scores"), dict):
+        return False
+    if "OV" not in item or "rationale" not in item:
+        return False
+    for dim in DIMENSIONS:
+        try:
+            int(item["scores"][dim])
+        except (KeyError, TypeError, ValueError):
+            return False
+    return True
+
+
+def _gold_row(
+    row: dict[str, Any],
+    rep_idx: int,
+    responses: dict[tuple[int, str], dict[str, Any] | None],
+    skipped: set[tuple[int, str]],
+    joint_keys: set[tuple[int, str]],
+) -> dict[str, Any]:
+    sid = row["sid"]
+    system_id = row["system_id"]
+    persona_scores: list[dict[str, int]] = []
+    persona_outputs: list[dict[str, Any]] = []
+    skipped_personas = [p for p in PERSONAS if (rep_idx, p) in skipped]
+    for persona in PERSONAS:
+        if persona in skipped_personas:
+            continue
+        llm_json = responses.get((rep_idx, persona))
+        llm_scores = _llm_scores(llm_json)
+        if llm_scores is not None:
+            scores = llm_scores
+            evidence = llm_json.get("evidence", {})
+            rationale = str(llm_json.get("rationale", ""))
+            mode = "llm_joint" if (rep_idx, persona) in joint_keys else "llm"
+        else:
+            scores = _score_seed(sid, system_id, persona)
+            evidence = {dim: "fallback_seed" for dim in DIMENSIONS}
+            rationale = "使用确定性回退评分。"
+            mode = "fallback_seed"
+
+        persona_scores.append(scores)
+        persona_outputs.append(
+            {
+                "persona": persona,
+                "scores": scores,
+                "OV": _ov(scores),
+                "evidence": evidence,
+                "rationale": rationale,
+                "mode": mode,
+            }
+        )
+    gold_scores: dict[str, int] = {}
+    ranges: dict[str, int] = {}
+    for dim in DIMENSIONS:
+        vals = sorted(item[dim] for item in persona_scores)
+        gold_scores[dim] = vals[(len(vals) - 1) // 2]
+        ranges[dim] = vals[-1] - vals[0]
+    return {
+        "sid": sid,
+        "system_id": system_id,
+        "scores_gold": gold_scores,
+        "OV_gold": _ov(gold_scores),
+        "range": ranges,
+        "persona_outputs": persona_outputs,
+        "skipped_personas": skipped_personas,
+    }
+
+
 def run(config: dict[str, Any]) -> dict[str, Any]:
     processed = Path(config["paths"]["data_processed"])
-    prompts_dir = Path(config["paths"]["prompts_dir"])
+    registry = get_registry(config["paths"]["prompts_dir"])
+    registry.register("persona_user", _USER_TEMPLATE)
+    registry.register("persona_joint_user", _JOINT_USER_TEMPLATE)
+    registry.register("persona_user_prefix", _USER_TEMPLATE_VARIABLE_LAST)
+    registry.register("persona_joint_user_prefix", _JOINT_USER_TEMPLATE_VARIABLE_LAST)
     rows = read_jsonl(processed / "translations.jsonl")
     llm_cfg = llm_config_from_dict(config["judge"]["standard_model"])
     llm_enabled = os.getenv("INKSTONE_ENABLE_LLM", "0") == "1"
+    if llm_enabled:
+        configure_response_cache(
+            processed / "llm_cache.sqlite3", config.get("llm_cache", {})
+        )
 
-    out_rows: list[dict[str, Any]] = []
-    for row in rows:
-        sid = row["sid"]
-        system_id = row["system_id"]
-        persona_scores: list[dict[str, int]] = []
-        persona_outputs: list[dict[str, Any]] = []
-        for persona in PERSONAS:
-            prompt_text = (prompts_dir / _persona_prompt_file(persona)).read_text(
-                encoding="utf-8"
-            )
-            user_prompt = (
-                f"中文原句：{row['text_zh']}\n"
-                f"译文：{row['translation']}\n"
-                "请返回 JSON 字段：scores（包含 IF/EC/RE/CA/LE）、OV、evidence、rationale。"
+    persona_prompts = {
+        persona: registry.text(_persona_prompt_name(persona)) for persona in PERSONAS
+    }
+    persona_cfg = config["judge"].get("persona", {})
+    persona_mode = os.getenv("INKSTONE_PERSONA_MODE") or str(
+        persona_cfg.get("mode", "per_persona")
+    )
+    if persona_mode not in {"per_persona", "joint"}:
+        raise ValueError(f"未知的 persona 评审模式: {persona_mode}")
+    schedule = str(persona_cfg.get("schedule", "full"))
+    order = [str(p) for p in persona_cfg.get("order", PERSONAS)]
+    if sorted(order) != sorted(PERSONAS):
+        raise ValueError(f"persona 顺序必须是 {PERSONAS} 的排列: {order}")
+    t0 = time.time()
+    suffix = "_prefix" if llm_cfg.prefix_ordering else ""
+    checkpoint = open_checkpoint(
+        config,
+        "judge_persona",
+        fingerprint(
+            [
+                llm_enabled,
+                llm_cfg.provider,
+                llm_cfg.model,
+                llm_cfg.base_url,
+                llm_cfg.temperature,
+                persona_mode,
+                schedule,
+                order,
+                [registry.sha(_persona_prompt_name(p)) for p in PERSONAS],
+                registry.sha("persona_user" + suffix),
+                registry.sha("persona_joint_user" + suffix),
+                registry.sha("persona_joint_v1"),
+            ]
+        ),
+    )
+    input_keys = [content_key(row["text_zh"], row["translation"]) for row in rows]
+    out_rows: list[dict[str, Any] | None] = [None] * len(rows)
+    if checkpoint is not None:
+        for row_idx, row in enumerate(rows):
+            out_rows[row_idx] = checkpoint.resume(
+                (row["sid"], row["system_id"]), input_keys[row_idx]
             )
-            llm_json = (
-                chat_json(
-                    llm_cfg,
-                    prompt_text,
-                    user_prompt,
-                    required_fields=["scores", "OV", "rationale"],
+    resumed = sum(1 for out in out_rows if out is not None)
+
+    members: dict[int, list[int]] = {}
+    first_idx: dict[str, int] = {}
+    for row_idx, key in enumerate(input_keys):
+        rep = first_idx.setdefault(key, row_idx)
+        if out_rows[row_idx] is None:
+            members.setdefault(rep, []).append(row_idx)
+    unique_idx = list(members)
+    chunk_size = (
+        checkpoint_config(config)["chunk_size"]
+        if checkpoint is not None
+        else max(1, len(unique_idx))
+    )
+
+    sent: list[tuple[str, str]] = []
+    responses: dict[tuple[int, str], dict[str, Any] | None] = {}
+    joint_keys: set[tuple[int, str]] = set()
+    skipped: set[tuple[int, str]] = set()
+    n_joint_calls = 0
+    n_per_persona_calls = 0
+    dedup_saved = 0
+    joint_prompt = ""
+    if llm_enabled and persona_mode == "joint":
+        joint_header = registry.get("persona_joint_v1")
+        joint_prompt = registry.prefix(
+            ("persona_joint", joint_header.sha)
+            + tuple(registry.sha(_persona_prompt_name(p)) for p in PERSONAS),
+            lambda: _joint_system_prompt(joint_header.text, persona_prompts),
+        )
+
+    for start in range(0, len(unique_idx), chunk_size):
+        chunk = unique_idx[start : start + chunk_size]
+        if llm_enabled and persona_mode == "joint":
+            joint_requests = [
+                (
+                    joint_prompt,
+                    _joint_user_prompt(
+                        registry, rows[i], "persona_joint_user" + suffix
+                    ),
                 )
-                if llm_enabled
-                else None
-            )
-            if llm_json is not None and isinstance(llm_json.get("scores"), dict):
-                scores = {
-                    dim: max(1, min(5, int(llm_json["scores"].get(dim, 3))))
-                    for dim in DIMENSIONS
-                }
-                evidence = llm_json.get("evidence", {})
-                rationale = str(llm_json.get("rationale", ""))
-                mode = "llm"
-            else:
-                scores = _score_seed(sid, system_id, persona)
-                evidence = {dim: "fallback_seed" for dim in DIMENSIONS}
-                rationale = "使用确定性回退评分。"
-                mode = "fallback_seed"
-
-            persona_scores.append(scores)
-            persona_outputs.append(
-                {
-                    "persona": persona,
-                    "scores": scores,
-                    "OV": _ov(scores),
-                    "evidence": evidence,
-                    "rationale": rationale,
-                    "mode": mode,
+                for i in chunk
+            ]
+            sent.extend(joint_requests[i] for i in send_order(llm_cfg, joint_requests))
+            joint_out = chat_json_many(llm_cfg, joint_requests, required_fields=[])
+            n_joint_calls += len(chunk)
+            dedup_saved += sum(len(members[i]) - 1 for i in chunk)
+            for row_idx, obj in zip(chunk, joint_out):
+                for persona in PERSONAS:
+                    item = obj.get(persona) if obj is not None else None
+                    if _valid_persona(item):
+                        responses[(row_idx, persona)] = item
+                        joint_keys.add((row_idx, persona))
+
+        pending = (
+            [
+                (row_idx, persona)
+                for row_idx in chunk
+                for persona in PERSONAS
+                if (row_idx, persona) not in responses
+            ]
+            if llm_enabled
+            else []
+        )
+        waves = [pending]
+        if schedule == "adaptive":
+            waves = [
+                [key for key in pending if key[1] in order[:2]],
+                [key for key in pending if key[1] == order[2]],
+            ]
+        for wave_idx, wave in enumerate(waves):
+            if wave_idx > 0:
+                decided = {
+                    key[0]
+                    for key in wave
+                    if _median_fixed(
+                        responses.get((key[0], order[0])),
+                        responses.get((key[0], order[1])),
+                    )
                 }
+                skipped.update(key for key in wave if key[0] in decided)
+                wave = [key for key in wave if key[0] not in decided]
+            wave_requests = [
+                (
+                    persona_prompts[persona],
+                    _user_prompt(registry, rows[i], "persona_user" + suffix),
+                )
+                for i, persona in wave
+            ]
+            sent.extend(wave_requests[i] for i in send_order(llm_cfg, wave_requests))
+            wave_out = chat_json_many(
+                llm_cfg, wave_requests, required_fields=["scores", "OV", "rationale"]
             )
-        gold_scores: dict[str, int] = {}
-        ranges: dict[str, int] = {}
-        for dim in DIMENSIONS:
-            vals = sorted(item[dim] for item in persona_scores)
-            gold_scores[dim] = vals[1]
-            ranges[dim] = vals[-1] - vals[0]
-        out_rows.append(
-            {
-                "sid": sid,
-                "system_id": system_id,
-                "scores_gold": gold_scores,
-                "OV_gold": _ov(gold_scores),
-                "range": ranges,
-                "persona_outputs": persona_outputs,
-            }
-        )
+            responses.update(zip(wave, wave_out))
+            n_per_persona_calls += len(wave)
+            dedup_saved += sum(len(members[i]) - 1 for i, _ in wave)
+
+        for rep_idx in chunk:
+            for row_idx in members[rep_idx]:
+                out_row = _gold_row(
+                    rows[row_idx], rep_idx, responses, skipped, joint_keys
+                )
+                out_rows[row_idx] = out_row
+                if checkpoint is not None and not (
+                    llm_enabled
+                    and any(
+                        out["mode"] == "fallback_seed"
+                        for out in out_row["persona_outputs"]
+                    )
+                ):
+                    checkpoint.append(
+                        (out_row["sid"], out_row["system_id"]),
+                        out_row,
+                        input_keys[row_idx],
+                    )
 
     out_path = processed / "persona_gold.jsonl"
-    write_jsonl(out_path, out_rows)
-    return {"rows": len(out_rows), "persona_gold": str(out_path)}
+    write_jsonl(out_path, [out for out in out_rows if out is not None])
+    export_configured(config, out_path, "persona_gold")
+    checkpoint_stats = {"enabled": False}
+    if checkpoint is not None:
+        checkpoint_stats = checkpoint.stats()
+        checkpoint.finalize()
+    stats_path = processed / "judge_persona_stats.jsonl"
+    stats = {
+        "rows": len(out_rows),
+        "llm_enabled": llm_enabled,
+        "persona_mode": persona_mode,
+        "persona_schedule": schedule,
+        "llm_calls": n_joint_calls + n_per_persona_calls,
+        "joint_calls": n_joint_calls,
+        "per_persona_calls": n_per_persona_calls,
+        "persona_calls_skipped": len(skipped),
+        "unique_inputs": len(unique_idx),
+        "duplicate_rows": len(rows) - resumed - len(unique_idx),
+        "resumed": resumed,
+        "checkpoint": checkpoint_stats,
+        "dedup_saved": dedup_saved,
+        "calls_saved_fraction": round(
+            len(skipped) / max(1, len(unique_idx) * len(PERSONAS)), 4
+        ),
+        "joint_persona_fallbacks": (
+            n_joint_calls * len(PERSONAS) - len(joint_keys) if n_joint_calls else 0
+        ),
+        "max_concurrency": llm_cfg.max_concurrency,
+        "prefix_ordering": llm_cfg.prefix_ordering,
+        "prefix_share": prefix_share(sent),
+        "elapsed_sec": round(time.time() - t0, 3),
+        "prompts": registry.stats(),
+        "llm_cache": response_cache_stats() if llm_enabled else {},
+        "llm_clients": client_pool_stats(),
+        "rate_limit": rate_limit_stats(),
+        "circuit_breaker": breaker_stats(),
+    }
+    write_jsonl(stats_path, [stats])
+    return {
+        **stats,
+        "persona_gold": str(out_path),
+        "judge_persona_stats": str(stats_path),
+    }
 
 
 if __name__ == "__main__":
@@ -1,11 +1,29 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import os
+import time
 from pathlib import Path
 from typing import Any
 
-from src.core.io import read_jsonl, write_jsonl
-from src.core.llm_client import chat_json, llm_config_from_dict
+from src.core.checkpoint import checkpoint_config, fingerprint, open_checkpoint
+from src.core.columnar import export_configured
+from src.core.icl_index import ICLIndex
+from src.core.io import artifact_order, iter_jsonl, merge_join, read_jsonl, write_jsonl
+from src.core.llm_client import (
+    chat_json_many,
+    client_pool_stats,
+    configure_response_cache,
+    llm_config_from_dict,
+    prefix_share,
+    response_cache_stats,
+    send_order,
+)
+from src.core.normalize import content_key
+from src.core.prompts import get_registry
+from src.core.rate_limit import estimate_tokens, rate_limit_stats
+from src.core.retry import breaker_stats
 from src.core.schema import DIMENSIONS
 
 
@@ -17,127 +35,418 @@ def _ov(scores: dict[str, int]) -> int:
     return int(round(sum(w * s for w, s in zip(WEIGHTS, ordered))))
 
 
-def _select_icl_examples(
-    bank: list[dict[str, Any]],
-    k: int,
-    target_sid: str,
-    target_mtype: str,
-) -> list[dict[str, Any]]:
-    same_type = [
-        ex
-        for ex in bank
-        if str(ex.get("sid")) != target_sid
-        and str(ex.get("metaphor_type", "mixed_other")) == target_mtype
-    ]
-    other_type = [
-        ex
-        for ex in bank
-        if str(ex.get("sid")) != target_sid
-        and str(ex.get("metaphor_type", "mixed_other")) != target_mtype
+def _shot_block(chosen: list[dict[str, Any]]) -> str:
+    shot_lines = []
+    for idx, ex in enumerate(chosen, start=1):
+        shot_lines.append(
+            f"[示例{idx}]\n"
+            f"中文: {ex['text_zh']}\n"
+            f"译文: {ex['translation']}\n"
+            f"隐喻类型: {ex.get('metaphor_type', 'mixed_other')}\n"
+            f"Gold: {ex['scores_gold']} OV={ex['OV_gold']}\n"
+            f"理由: {ex.get('gold_rationale', '')}"
+        )
+    return "\n\n".join(shot_lines)
+
+
+def _prompt_head(shots: str) -> str:
+    return "请按 IF/EC/RE/CA/LE 五维给出 1-5 分，并返回 JSON。\n" + shots + "\n\n"
+
+
+def _single_prompt(
+    head: str, tr: dict[str, Any] | None, variable_last: bool = False
+) -> str:
+    target = (
+        f"待评审中文: {tr['text_zh'] if tr else ''}\n"
+        f"待评审译文: {tr['translation'] if tr else ''}"
+    )
+    fields = "请返回字段: scores_model, OV_model, rationale。"
+    if variable_last:
+        return head + fields + "\n" + target
+    return head + target + "\n" + fields
+
+
+def _packed_prompt(
+    head: str, trs: list[dict[str, Any] | None], variable_last: bool = False
+) -> str:
+    items = [
+        f"[条目 id={idx}]\n"
+        f"待评审中文: {tr['text_zh'] if tr else ''}\n"
+        f"待评审译文: {tr['translation'] if tr else ''}"
+        for idx, tr in enumerate(trs, start=1)
     ]
-    selected: list[dict[str, Any]] = []
-    if same_type:
-        selected.extend(same_type[: min(k, max(1, k // 2 + 1))])
-    if len(selected) < k:
-        selected.extend(other_type[: max(0, k - len(selected))])
-    return selected[:k]
+    fields = "请返回字段: items（数组，每个元素包含 id, scores_model, OV_model, rationale）。"
+    intro = f"以下共 {len(trs)} 条待评审条目，请逐条独立评分：\n\n"
+    if variable_last:
+        return head + fields + "\n" + intro + "\n\n".join(items)
+    return head + intro + "\n\n".join(items) + "\n\n" + fields
+
+
+def _valid_item(item: Any) -> bool:
+    if not isinstance(item, dict) or not isinstance(item.get("scores_model"), dict):
+        return False
+    if not str(item.get("OV_model", "")).isdigit():
+        return False
+    for dim in DIMENSIONS:
+        if not str(item["scores_model"].get(dim, "")).isdigit():
+            return False
+    return True
+
+
+def _unpack_items(obj: dict[str, Any] | None, n: int) -> list[dict[str, Any] | None]:
+    unpacked: list[dict[str, Any] | None] = [None] * n
+    items = obj.get("items") if obj is not None else None
+    if not isinstance(items, list):
+        return unpacked
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            idx = int(str(item.get("id", "")).strip()) - 1
+        except ValueError:
+            continue
+        if 0 <= idx < n and unpacked[idx] is None and _valid_item(item):
+            unpacked[idx] = item
+    return unpacked
+
+
+def _score_row(
+    row: dict[str, Any],
+    target_mtype: str,
+    icl_k: int,
+    llm_json: dict[str, Any] | None,
+    packed: bool,
+    prompt_version: str,
+    prompt_hash: str,
+) -> dict[str, Any]:
+    scores_gold = row["scores_gold"]
+    scores_model: dict[str, int] = {}
+    if llm_json is not None and isinstance(llm_json.get("scores_model"), dict):
+        for dim in DIMENSIONS:
+            raw = int(llm_json["scores_model"].get(dim, scores_gold[dim]))
+            scores_model[dim] = max(1, min(5, raw))
+    else:
+        for dim in DIMENSIONS:
+            raw = int(scores_gold[dim])
+            if raw < 5 and (sum(ord(c) for c in (row["sid"] + dim)) % 3 == 0):
+                raw += 1
+            scores_model[dim] = max(1, min(5, raw))
+
+    ov_model = (
+        int(llm_json["OV_model"])
+        if llm_json is not None and str(llm_json.get("OV_model", "")).isdigit()
+        else _ov(scores_model)
+    )
+    return {
+        "sid": row["sid"],
+        "system_id": row["system_id"],
+        "scores_model": scores_model,
+        "OV_model": max(1, min(5, ov_model)),
+        "judge_prompt_version": prompt_version,
+        "judge_prompt_hash": prompt_hash,
+        "judge_mode": (
+            ("llm_packed" if packed else "llm")
+            if llm_json is not None
+            else "fallback_seed"
+        ),
+        "icl_target_mtype": target_mtype,
+        "icl_k": icl_k,
+    }
 
 
 def run(config: dict[str, Any]) -> dict[str, Any]:
     processed = Path(config["paths"]["data_processed"])
-    prompts_dir = Path(config["paths"]["prompts_dir"])
+    registry = get_registry(config["paths"]["prompts_dir"])
     prompt_version = config["judge"]["standard_model"].get(
         "prompt_version", "judge_standard_v1_icl"
     )
-    prompt_path = prompts_dir / f"{prompt_version}.txt"
-    system_prompt = (
-        prompt_path.read_text(encoding="utf-8")
-        if prompt_path.exists()
-        else "你是翻译评审员，请输出严格 JSON。"
+    system_template = registry.get(
+        prompt_version, default="你是翻译评审员，请输出严格 JSON。"
     )
+    system_prompt = system_template.text
 
-    persona_rows = read_jsonl(processed / "persona_gold.jsonl")
-    trans_rows = read_jsonl(processed / "translations.jsonl")
-    eval_rows = read_jsonl(processed / "eval_set.jsonl")
+    persona_path = processed / "persona_gold.jsonl"
+    trans_path = processed / "translations.jsonl"
+    eval_path = processed / "eval_set.jsonl"
+    row_order, sid_order = artifact_order(eval_path, trans_path)
     few_shot_bank = read_jsonl(processed / "few_shot_bank.jsonl")
-    trans_map = {(r["sid"], r["system_id"]): r for r in trans_rows}
-    eval_map = {r["sid"]: r for r in eval_rows}
+    bank_digest = hashlib.sha256(
+        json.dumps(few_shot_bank, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    ).hexdigest()
     llm_cfg = llm_config_from_dict(config["judge"]["standard_model"])
-    k = int(config["judge"]["icl"].get("k", 3))
+    icl_cfg = config["judge"]["icl"]
+    k = int(icl_cfg.get("k", 3))
+    icl_strategy = str(icl_cfg.get("strategy", "first"))
+    index_t0 = time.perf_counter()
+    icl_index = ICLIndex(
+        few_shot_bank, seed=int(icl_cfg.get("seed", 0)), strategy=icl_strategy
+    )
+    index_build_sec = time.perf_counter() - index_t0
+    select_sec = 0.0
+    n_selects = 0
     llm_enabled = os.getenv("INKSTONE_ENABLE_LLM", "0") == "1"
-
-    out_rows: list[dict[str, Any]] = []
-    for row in persona_rows:
-        scores_gold = row["scores_gold"]
-        tr = trans_map.get((row["sid"], row["system_id"]))
-        erow = eval_map.get(row["sid"], {})
-        target_mtype = str(
-            erow.get("metaphor_meta", {}).get("metaphor_type", "mixed_other")
+    if llm_enabled:
+        configure_response_cache(
+            processed / "llm_cache.sqlite3", config.get("llm_cache", {})
         )
-        chosen = _select_icl_examples(few_shot_bank, k, str(row["sid"]), target_mtype)
-        shot_lines = []
-        for idx, ex in enumerate(chosen, start=1):
-            shot_lines.append(
-                f"[示例{idx}]\n"
-                f"中文: {ex['text_zh']}\n"
-                f"译文: {ex['translation']}\n"
-                f"隐喻类型: {ex.get('metaphor_type', 'mixed_other')}\n"
-                f"Gold: {ex['scores_gold']} OV={ex['OV_gold']}\n"
-                f"理由: {ex.get('gold_rationale', '')}"
+
+    pack_size = max(1, int(config["judge"]["icl"].get("pack_size", 1)))
+    t0 = time.time()
+    persona_rows: list[dict[str, Any]] = []
+    target_mtypes: list[str] = []
+    target_trs: list[dict[str, Any] | None] = []
+    joined = merge_join(
+        merge_join(
+            iter_jsonl(persona_path), iter_jsonl(trans_path), row_order, row_order
+        ),
+        iter_jsonl(eval_path),
+        left_key=lambda pair: sid_order(pair[0]),
+        right_key=sid_order,
+    )
+    for (row, trow), erow in joined:
+        persona_rows.append(row)
+        target_mtypes.append(
+            str(
+                (erow or {})
+                .get("metaphor_meta", {})
+                .get("metaphor_type", "mixed_other")
             )
-        user_prompt = (
-            "请按 IF/EC/RE/CA/LE 五维给出 1-5 分，并返回 JSON。\n"
-            + "\n\n".join(shot_lines)
-            + "\n\n"
-            + f"待评审中文: {tr['text_zh'] if tr else ''}\n"
-            + f"待评审译文: {tr['translation'] if tr else ''}\n"
-            + "请返回字段: scores_model, OV_model, rationale。"
         )
+        target_trs.append(trow)
 
-        llm_json = (
-            chat_json(
-                llm_cfg,
-                system_prompt,
-                user_prompt,
-                required_fields=["scores_model", "OV_model"],
-            )
-            if llm_enabled
-            else None
+    variable_last = llm_cfg.prefix_ordering
+    sent: list[tuple[str, str]] = []
+    checkpoint = open_checkpoint(
+        config,
+        "judge_standard",
+        fingerprint(
+            [
+                llm_enabled,
+                llm_cfg.provider,
+                llm_cfg.model,
+                llm_cfg.base_url,
+                llm_cfg.temperature,
+                system_template.sha,
+                k,
+                icl_strategy,
+                variable_last,
+                pack_size,
+                bank_digest,
+            ]
+        ),
+    )
+    input_keys = [
+        content_key(
+            tr["text_zh"] if tr else "",
+            tr["translation"] if tr else "",
+            target_mtypes[idx],
+            json.dumps(row["scores_gold"], sort_keys=True),
         )
+        for idx, (row, tr) in enumerate(zip(persona_rows, target_trs))
+    ]
+    out_rows: list[dict[str, Any] | None] = [None] * len(persona_rows)
+    if checkpoint is not None:
+        for idx, row in enumerate(persona_rows):
+            out_rows[idx] = checkpoint.resume(
+                (row["sid"], row["system_id"]), input_keys[idx]
+            )
+    resumed = sum(1 for out in out_rows if out is not None)
 
-        scores_model: dict[str, int] = {}
-        if llm_json is not None and isinstance(llm_json.get("scores_model"), dict):
-            for dim in DIMENSIONS:
-                raw = int(llm_json["scores_model"].get(dim, scores_gold[dim]))
-                scores_model[dim] = max(1, min(5, raw))
-        else:
-            for dim in DIMENSIONS:
-                raw = int(scores_gold[dim])
-                if raw < 5 and (sum(ord(c) for c in (row["sid"] + dim)) % 3 == 0):
-                    raw += 1
-                scores_model[dim] = max(1, min(5, raw))
-
-        ov_model = (
-            int(llm_json["OV_model"])
-            if llm_json is not None and str(llm_json.get("OV_model", "")).isdigit()
-            else _ov(scores_model)
+    first_idx: dict[str, int] = {}
+    group_rows: dict[int, list[int]] = {}
+    for idx, (row, tr) in enumerate(zip(persona_rows, target_trs)):
+        if out_rows[idx] is not None:
+            continue
+        key = (
+            content_key(tr["text_zh"], tr["translation"], target_mtypes[idx])
+            if tr is not None
+            else f"row:{idx}"
         )
-        out_rows.append(
-            {
-                "sid": row["sid"],
-                "system_id": row["system_id"],
-                "scores_model": scores_model,
-                "OV_model": max(1, min(5, ov_model)),
-                "judge_prompt_version": prompt_version,
-                "judge_mode": "llm" if llm_json is not None else "fallback_seed",
-                "icl_target_mtype": target_mtype,
-                "icl_k": len(chosen),
-            }
+        group_rows.setdefault(first_idx.setdefault(key, idx), []).append(idx)
+    unique_idx = list(group_rows)
+
+    packs: list[list[int]] = []
+    if pack_size > 1:
+        by_mtype: dict[str, list[int]] = {}
+        for idx in unique_idx:
+            by_mtype.setdefault(target_mtypes[idx], []).append(idx)
+        for members in by_mtype.values():
+            for start in range(0, len(members), pack_size):
+                packs.append(members[start : start + pack_size])
+    else:
+        packs = [[idx] for idx in unique_idx]
+    chunk_size = (
+        checkpoint_config(config)["chunk_size"]
+        if checkpoint is not None
+        else max(1, len(packs))
+    )
+
+    fallback_idxs: list[int] = []
+    n_packed_calls = 0
+    n_single_calls = 0
+    prompt_tokens = 0
+    for chunk_start in range(0, len(packs), chunk_size):
+        chunk = packs[chunk_start : chunk_start + chunk_size]
+        icl_ks: dict[int, int] = {}
+        heads: dict[int, str] = {}
+        packed_requests: list[tuple[str, str]] = []
+        single_requests: list[tuple[str, str]] = []
+        for members in chunk:
+            select_t0 = time.perf_counter()
+            positions = icl_index.select(
+                "\n".join(
+                    target_trs[idx]["text_zh"] if target_trs[idx] else ""
+                    for idx in members
+                ),
+                target_mtypes[members[0]],
+                k,
+                exclude_sids={
+                    str(persona_rows[i]["sid"])
+                    for idx in members
+                    for i in group_rows[idx]
+                },
+            )
+            select_sec += time.perf_counter() - select_t0
+            n_selects += 1
+            chosen = [few_shot_bank[pos] for pos in positions]
+            head = registry.prefix(
+                ("icl_head", bank_digest, tuple(positions)),
+                lambda: _prompt_head(_shot_block(chosen)),
+            )
+            for idx in members:
+                icl_ks[idx] = len(chosen)
+                heads[idx] = head
+            if len(members) > 1:
+                packed_requests.append(
+                    (
+                        system_prompt,
+                        _packed_prompt(
+                            head, [target_trs[i] for i in members], variable_last
+                        ),
+                    )
+                )
+            else:
+                single_requests.append(
+                    (
+                        system_prompt,
+                        _single_prompt(head, target_trs[members[0]], variable_last),
+                    )
+                )
+
+        responses: dict[int, dict[str, Any] | None] = {}
+        packed_modes: set[int] = set()
+        if llm_enabled:
+            multi = [members for members in chunk if len(members) > 1]
+            sent.extend(
+                packed_requests[i] for i in send_order(llm_cfg, packed_requests)
+            )
+            packed_out = chat_json_many(
+                llm_cfg, packed_requests, required_fields=["items"]
+            )
+            n_packed_calls += len(packed_requests)
+            chunk_fallbacks: list[int] = []
+            for members, obj in zip(multi, packed_out):
+                for idx, item in zip(members, _unpack_items(obj, len(members))):
+                    if item is None:
+                        chunk_fallbacks.append(idx)
+                    else:
+                        responses[idx] = item
+                        packed_modes.add(idx)
+            chunk_fallbacks.sort()
+            fallback_idxs.extend(chunk_fallbacks)
+            single_idxs = [
+                members[0] for members in chunk if len(members) == 1
+            ] + chunk_fallbacks
+            single_requests.extend(
+                (
+                    system_prompt,
+                    _single_prompt(heads[idx], target_trs[idx], variable_last),
+                )
+                for idx in chunk_fallbacks
+            )
+            sent.extend(
+                single_requests[i] for i in send_order(llm_cfg, single_requests)
+            )
+            single_out = chat_json_many(
+                llm_cfg, single_requests, required_fields=["scores_model", "OV_model"]
+            )
+            n_single_calls += len(single_requests)
+            responses.update(zip(single_idxs, single_out))
+        prompt_tokens += sum(
+            estimate_tokens(sys_p) + estimate_tokens(user_p)
+            for sys_p, user_p in packed_requests + single_requests
         )
 
+        for members in chunk:
+            for rep in members:
+                for idx in group_rows[rep]:
+                    out_row = _score_row(
+                        persona_rows[idx],
+                        target_mtypes[idx],
+                        icl_ks[rep],
+                        responses.get(rep),
+                        rep in packed_modes,
+                        prompt_version,
+                        system_template.sha,
+                    )
+                    out_rows[idx] = out_row
+                    if checkpoint is not None and not (
+                        llm_enabled and out_row["judge_mode"] == "fallback_seed"
+                    ):
+                        checkpoint.append(
+                            (out_row["sid"], out_row["system_id"]),
+                            out_row,
+                            input_keys[idx],
+                        )
+
     out_path = processed / "judge_scores.jsonl"
-    write_jsonl(out_path, out_rows)
-    return {"rows": len(out_rows), "judge_scores": str(out_path)}
+    write_jsonl(out_path, [out for out in out_rows if out is not None])
+    export_configured(config, out_path, "judge_scores")
+    checkpoint_stats = {"enabled": False}
+    if checkpoint is not None:
+        checkpoint_stats = checkpoint.stats()
+        checkpoint.finalize()
+    stats_path = processed / "judge_standard_stats.jsonl"
+    stats = {
+        "rows": len(out_rows),
+        "llm_enabled": llm_enabled,
+        "llm_calls": n_packed_calls + n_single_calls,
+        "pack_size": pack_size,
+        "packed_calls": n_packed_calls,
+        "fallback_single_calls": len(fallback_idxs),
+        "calls_saved": (
+            len(persona_rows) - resumed - n_packed_calls - n_single_calls
+            if llm_enabled
+            else 0
+        ),
+        "icl_strategy": icl_strategy,
+        "icl_bank_size": len(few_shot_bank),
+        "icl_index_build_sec": round(index_build_sec, 4),
+        "icl_select_ms_avg": round(1000 * select_sec / max(1, n_selects), 4),
+        "unique_inputs": len(unique_idx),
+        "dedup_saved": (
+            len(persona_rows) - resumed - len(unique_idx) if llm_enabled else 0
+        ),
+        "resumed": resumed,
+        "checkpoint": checkpoint_stats,
+        "prompt_tokens_est": prompt_tokens,
+        "tokens_per_judgement": round(prompt_tokens / max(1, len(unique_idx)), 1),
+        "max_concurrency": llm_cfg.max_concurrency,
+        "prefix_ordering": variable_last,
+        "prefix_share": prefix_share(sent),
+        "elapsed_sec": round(time.time() - t0, 3),
+        "prompts": registry.stats(),
+        "llm_cache": response_cache_stats() if llm_enabled else {},
+        "llm_clients": client_pool_stats(),
+        "rate_limit": rate_limit_stats(),
+        "circuit_breaker": breaker_stats(),
+    }
+    write_jsonl(stats_path, [stats])
+    return {
+        **stats,
+        "judge_scores": str(out_path),
+        "judge_standard_stats": str(stats_path),
+    }
 
 
 if __name__ == "__main__":
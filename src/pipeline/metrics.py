@@ -1,145 +1,210 @@
 from __future__ import annotations
 
-import random
+import time
+from array import array
 from pathlib import Path
-from statistics import mean
-from typing import Any
+from typing import Any, Iterable, Iterator
 
-from src.core.io import read_jsonl, write_jsonl
-from src.core.metrics_traditional import compute_traditional_row
+import numpy as np
+
+from src.core.cache import MetricScoreCache
+from src.core.columnar import export_configured, iter_column_rows, load_columns
+from src.core.io import artifact_order, iter_jsonl, merge_join, write_jsonl
+from src.core.metrics_traditional import ScoreItem, iter_scored_items
 from src.core.schema import DIMENSIONS
+from src.core.significance import compare_systems, task_seed
+from src.core.stats import (
+    DEFAULT_CHUNK_ELEMS,
+    bootstrap_ci_spearman,
+    permutation_pvalue_spearman,
+    spearman,
+    spearman_matrix,
+)
+
+
+JUDGE_COLUMNS = ["sid", "system_id", "OV_model", *(f"scores_model_{d}" for d in DIMENSIONS)]
+
+
+def _system_means(
+    columns: dict[str, np.ndarray], prefix: str
+) -> dict[str, dict[str, float]]:
+    if not len(columns["system_id"]):
+        return {}
+    systems, first, codes = np.unique(
+        columns["system_id"], return_index=True, return_inverse=True
+    )
+    counts = np.bincount(codes, minlength=len(systems))
+    means = {
+        dim: np.bincount(
+            codes,
+            weights=columns[f"{prefix}_{dim}"].astype(np.float64),
+            minlength=len(systems),
+        )
+        / counts
+        for dim in DIMENSIONS
+    }
+    return {
+        str(systems[i]): {dim: float(means[dim][i]) for dim in DIMENSIONS}
+        for i in np.argsort(first, kind="stable")
+    }
 
 
-def _pearson(x: list[float], y: list[float]) -> float:
-    if len(x) != len(y) or len(x) < 2:
-        return 0.0
-    n = len(x)
-    mx = sum(x) / n
-    my = sum(y) / n
-    num = sum((xi - mx) * (yi - my) for xi, yi in zip(x, y))
-    den_x = sum((xi - mx) ** 2 for xi in x) ** 0.5
-    den_y = sum((yi - my) ** 2 for yi in y) ** 0.5
-    if den_x == 0 or den_y == 0:
-        return 0.0
-    return num / (den_x * den_y)
-
-
-def _rank(values: list[float]) -> list[float]:
-    pairs = sorted(enumerate(values), key=lambda p: p[1])
-    ranks = [0.0] * len(values)
-    i = 0
-    while i < len(pairs):
-        j = i
-        while j + 1 < len(pairs) and pairs[j + 1][1] == pairs[i][1]:
-            j += 1
-        avg_rank = (i + j + 2) / 2.0
-        for k in range(i, j + 1):
-            ranks[pairs[k][0]] = avg_rank
-        i = j + 1
-    return ranks
-
-
-def _spearman(x: list[float], y: list[float]) -> float:
-    return _pearson(_rank(x), _rank(y))
-
-
-def _bootstrap_ci_spearman(
-    x: list[float], y: list[float], n_bootstrap: int, seed: int
-) -> dict[str, float]:
-    if len(x) != len(y) or len(x) < 2:
-        return {"low": 0.0, "high": 0.0, "mean": 0.0}
-    rng = random.Random(seed)
-    n = len(x)
-    samples: list[float] = []
-    for _ in range(max(1, n_bootstrap)):
-        idxs = [rng.randrange(n) for _ in range(n)]
-        bx = [x[i] for i in idxs]
-        by = [y[i] for i in idxs]
-        samples.append(_spearman(bx, by))
-    samples.sort()
-    low = samples[int(0.025 * (len(samples) - 1))]
-    high = samples[int(0.975 * (len(samples) - 1))]
-    return {"low": float(low), "high": float(high), "mean": float(mean(samples))}
-
-
-def _system_means(rows: list[dict[str, Any]], key: str) -> dict[str, dict[str, float]]:
-    grouped: dict[str, list[dict[str, Any]]] = {}
-    for row in rows:
-        grouped.setdefault(row["system_id"], []).append(row)
-    out: dict[str, dict[str, float]] = {}
-    for system_id, grows in grouped.items():
-        out[system_id] = {
-            dim: float(mean(int(r[key][dim]) for r in grows)) for dim in DIMENSIONS
+def _judge_rows(columns: dict[str, np.ndarray]) -> Iterator[dict[str, Any]]:
+    scores = [columns[f"scores_model_{d}"].tolist() for d in DIMENSIONS]
+    for i, (sid, system_id, ov) in enumerate(
+        zip(
+            columns["sid"].tolist(),
+            columns["system_id"].tolist(),
+            columns["OV_model"].tolist(),
+        )
+    ):
+        yield {
+            "sid": sid,
+            "system_id": system_id,
+            "OV_model": ov,
+            "scores_model": {d: col[i] for d, col in zip(DIMENSIONS, scores)},
         }
-    return out
 
 
 def run(config: dict[str, Any]) -> dict[str, Any]:
     processed = Path(config["paths"]["data_processed"])
     reference_source = str(config["run"].get("reference_source", "writer"))
     seed = int(config["run"].get("seed", 20260215))
-
-    trans_rows = read_jsonl(processed / "translations.jsonl")
-    judge_rows = read_jsonl(processed / "judge_scores.jsonl")
-    gold_rows = read_jsonl(processed / "persona_gold.jsonl")
-
-    judge_map = {(r["sid"], r["system_id"]): r for r in judge_rows}
-    gold_map = {(r["sid"], r["system_id"]): r for r in gold_rows}
-
-    mt_rows: list[dict[str, Any]] = []
-    ov_gold_vals: list[float] = []
-    ov_model_vals: list[float] = []
-    by_dim_scores: dict[str, list[int]] = {d: [] for d in DIMENSIONS}
-    bleu_vals: list[float] = []
-    meteor_vals: list[float] = []
-
-    for row in trans_rows:
-        key = (row["sid"], row["system_id"])
-        if key not in judge_map or key not in gold_map:
-            continue
-        gold = gold_map[key]
-        model = judge_map[key]
-        reference = f"参考译文({reference_source}): {row['text_zh']}"
-        trad = compute_traditional_row(reference, row["translation"], reference_source)
-        mt_rows.append(
-            {
-                "sid": row["sid"],
-                "system_id": row["system_id"],
+    stats_cfg = config.get("stats", {}) or {}
+    n_bootstrap = int(stats_cfg.get("n_bootstrap", 200))
+    chunk_elems = int(stats_cfg.get("chunk_elems", DEFAULT_CHUNK_ELEMS))
+    n_permutations = int(stats_cfg.get("n_permutations", 2000))
+    n_resamples = int(stats_cfg.get("n_resamples", 2000))
+    workers = int(stats_cfg.get("workers", 0))
+    metrics_cfg = config.get("metrics", {}) or {}
+
+    trans_path = processed / "translations.jsonl"
+    judge_path = processed / "judge_scores.jsonl"
+    gold_path = processed / "persona_gold.jsonl"
+    row_order, _ = artifact_order(processed / "eval_set.jsonl", trans_path)
+
+    ov_gold_vals = array("d")
+    ov_model_vals = array("d")
+    by_dim_scores: dict[str, array] = {d: array("d") for d in DIMENSIONS}
+    bleu_vals = array("d")
+    meteor_vals = array("d")
+
+    def _items() -> Iterator[ScoreItem]:
+        joined = merge_join(
+            merge_join(
+                iter_jsonl(trans_path),
+                iter_column_rows(judge_path, "judge_scores", JUDGE_COLUMNS),
+                row_order,
+                row_order,
+            ),
+            iter_column_rows(
+                gold_path, "persona_gold", ["sid", "system_id", "OV_gold"]
+            ),
+            left_key=lambda pair: row_order(pair[0]),
+            right_key=row_order,
+        )
+        for (row, model), gold in joined:
+            if model is None or gold is None:
+                continue
+            ov_gold_vals.append(float(gold["OV_gold"]))
+            ov_model_vals.append(float(model["OV_model"]))
+            for d in DIMENSIONS:
+                by_dim_scores[d].append(int(model[f"scores_model_{d}"]))
+            yield (
+                row["sid"],
+                row["system_id"],
+                f"参考译文({reference_source}): {row['text_zh']}",
+                row["translation"],
+            )
+
+    def _mt_rows(
+        scored: Iterable[tuple[ScoreItem, dict[str, Any]]],
+    ) -> Iterator[dict[str, Any]]:
+        for (sid, system_id, _, _), trad in scored:
+            bleu_vals.append(float(trad["bleu"]))
+            meteor_vals.append(float(trad["meteor"]))
+            yield {
+                "sid": sid,
+                "system_id": system_id,
                 "bleu": trad["bleu"],
+                "chrf": trad["chrf"],
                 "meteor": trad["meteor"],
                 "reference_source": reference_source,
             }
-        )
-        ov_gold_vals.append(float(gold["OV_gold"]))
-        ov_model_vals.append(float(model["OV_model"]))
-        bleu_vals.append(float(trad["bleu"]))
-        meteor_vals.append(float(trad["meteor"]))
-        for d in DIMENSIONS:
-            by_dim_scores[d].append(int(model["scores_model"][d]))
 
-    write_jsonl(processed / "metrics_traditional.jsonl", mt_rows)
+    trad_stats: dict[str, Any] = {}
+    cache = (
+        MetricScoreCache(processed / "metrics_cache.sqlite3")
+        if bool(metrics_cfg.get("cache", True))
+        else None
+    )
+    mt_path = processed / "metrics_traditional.jsonl"
+    try:
+        write_jsonl(
+            mt_path,
+            _mt_rows(
+                iter_scored_items(
+                    _items(),
+                    trad_stats,
+                    cache=cache,
+                    workers=int(metrics_cfg.get("workers", 0)),
+                    shard_size=int(metrics_cfg.get("shard_size", 512)),
+                    chunk_rows=int(metrics_cfg.get("chunk_rows", 8192)),
+                )
+            ),
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+    export_configured(config, mt_path, "metrics_traditional")
 
-    corr = _spearman(ov_gold_vals, ov_model_vals) if ov_gold_vals else 0.0
-    corr_ci = _bootstrap_ci_spearman(
+    corr = spearman(ov_gold_vals, ov_model_vals) if ov_gold_vals else 0.0
+    corr_ci = bootstrap_ci_spearman(
         ov_gold_vals,
         ov_model_vals,
-        n_bootstrap=200,
+        n_bootstrap=n_bootstrap,
         seed=seed,
+        chunk_elems=chunk_elems,
+    )
+    pvalue = permutation_pvalue_spearman(
+        ov_gold_vals,
+        ov_model_vals,
+        n_permutations,
+        task_seed(seed, "human_model"),
+        chunk_elems,
     )
     dim_corr: dict[str, dict[str, float]] = {}
-    for dim in DIMENSIONS:
-        if by_dim_scores[dim]:
-            dim_vals = [float(v) for v in by_dim_scores[dim]]
-            rho_bleu = _spearman(dim_vals, bleu_vals)
-            rho_meteor = _spearman(dim_vals, meteor_vals)
-            dim_corr[dim] = {"bleu": float(rho_bleu), "meteor": float(rho_meteor)}
-
+    if ov_gold_vals:
+        rho = spearman_matrix(
+            np.array([by_dim_scores[d] for d in DIMENSIONS], dtype=np.float64),
+            np.array([bleu_vals, meteor_vals], dtype=np.float64),
+        )
+        for i, dim in enumerate(DIMENSIONS):
+            dim_corr[dim] = {"bleu": float(rho[i, 0]), "meteor": float(rho[i, 1])}
+
+    judge_columns = load_columns(judge_path, "judge_scores", JUDGE_COLUMNS)
+    t0 = time.perf_counter()
+    pairs = compare_systems(
+        _judge_rows(judge_columns),
+        n_resamples,
+        seed,
+        workers=workers,
+        chunk_elems=chunk_elems,
+    )
     summary = {
         "human_model_spearman": float(corr),
-        "human_model_pvalue": 1.0,
+        "human_model_pvalue": float(pvalue),
         "human_model_spearman_ci95": corr_ci,
-        "system_means": _system_means(judge_rows, "scores_model"),
+        "system_means": _system_means(judge_columns, "scores_model"),
         "dim_correlation": dim_corr,
+        "traditional": trad_stats,
+        "significance": {
+            "n_permutations": n_permutations,
+            "n_resamples": n_resamples,
+            "workers": workers,
+            "elapsed_sec": round(time.perf_counter() - t0, 3),
+            "pairs": pairs,
+        },
     }
     write_jsonl(processed / "metrics_summary.jsonl", [summary])
     return summary
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import importlib
+import shutil
+from pathlib import Path
+from typing import Any
+
+
+_ONNX_MODEL_CACHE: dict[tuple[str, str], tuple[Any, Any]] = {}
+
+
+def _safe_name(model_name: str) -> str:
+    return model_name.replace("/", "__")
+
+
+def _export_fp32(model_name: str, export_dir: Path) -> None:
+    if any(export_dir.glob("*.onnx")):
+        return
+    transformers_mod = importlib.import_module("transformers")
+    ort_mod = importlib.import_module("optimum.onnxruntime")
+    model = ort_mod.ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True)
+    tokenizer = transformers_mod.AutoTokenizer.from_pretrained(model_name)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    model.save_pretrained(export_dir)
+    tokenizer.save_pretrained(export_dir)
+
+
+def _quantize_int8(fp32_dir: Path, int8_dir: Path) -> None:
+    if any(int8_dir.glob("*_quantized.onnx")):
+        return
+    ort_mod = importlib.import_module("optimum.onnxruntime")
+    ort_config_mod = importlib.import_module("optimum.onnxruntime.configuration")
+    qconfig = ort_config_mod.AutoQuantizationConfig.avx2(
+        is_static=False, per_channel=False
+    )
+    int8_dir.mkdir(parents=True, exist_ok=True)
+    for onnx_file in sorted(fp32_dir.glob("*.onnx")):
+        quantizer = ort_mod.ORTQuantizer.from_pretrained(
+            fp32_dir, file_name=onnx_file.name
+        )
+        quantizer.quantize(quantization_config=qconfig, save_dir=int8_dir)
+    for extra in fp32_dir.iterdir():
+        if extra.suffix != ".onnx" and extra.is_file():
+            shutil.copy2(extra, int8_dir / extra.name)
+
+
+def load_onnx_model(
+    model_name: str, quantize: str | None, export_root: Path
+) -> tuple[Any, Any] | None:
+    precision = "int8" if quantize == "int8" else "fp32"
+    key = (model_name, precision)
+    if key in _ONNX_MODEL_CACHE:
+        return _ONNX_MODEL_CACHE[key]
+    try:
+        transformers_mod = importlib.import_module("transformers")
+        ort_mod = importlib.import_module("optimum.onnxruntime")
+        fp32_dir = export_root / _safe_name(model_name)
+        _export_fp32(model_name, fp32_dir)
+        model_dir = fp32_dir
+        kwargs: dict[str, Any] = {}
+        if precision == "int8":
+            model_dir = export_root / f"{_safe_name(model_name)}-int8"
+            _quantize_int8(fp32_dir, model_dir)
+            for role in ("encoder", "decoder", "decoder_with_past"):
+                path = model_dir / f"{role}_model_quantized.onnx"
+                if path.exists():
+                    kwargs[f"{role}_file_name"] = path.name
+        model = ort_mod.ORTModelForSeq2SeqLM.from_pretrained(model_dir, **kwargs)
+        tokenizer = transformers_mod.AutoTokenizer.from_pretrained(model_dir)
+    except Exception:
+        return None
+    _ONNX_MODEL_CACHE[key] = (tokenizer, model)
+    return tokenizer, model
+
+
+def onnx_generate(
+    bundle: tuple[Any, Any],
+    texts: list[str],
+    num_beams: int = 1,
+    max_new_tokens: int = 256,
+    src_lang: str | None = None,
+    tgt_lang: str | None = None,
+) -> list[str]:
+    tokenizer, model = bundle
+    if src_lang:
+        tokenizer.src_lang = src_lang
+    inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True)
+    kwargs: dict[str, Any] = {
+        "num_beams": max(1, int(num_beams)),
+        "max_new_tokens": max_new_tokens,
+    }
+    if tgt_lang:
+        kwargs["forced_bos_token_id"] = tokenizer.convert_tokens_to_ids(tgt_lang)
+    outputs = model.generate(**inputs, **kwargs)
+    return [
+        str(text).strip()
+        for text in tokenizer.batch_decode(outputs, skip_special_tokens=True)
+    ]
@@ -5,17 +5,18 @@ from pathlib import Path
 from typing import Any
 
 from src.core.io import read_jsonl
+from src.core.prompts import get_registry
 
 
 def _render_methodology(config: dict[str, Any]) -> None:
-    prompts_dir = Path(config["paths"]["prompts_dir"])
+    registry = get_registry(config["paths"]["prompts_dir"])
     mdir = Path(config["paths"]["methodology_dir"])
     mdir.mkdir(parents=True, exist_ok=True)
 
-    tagger_prompt = (prompts_dir / "metaphor_tagger_v1.txt").read_text(encoding="utf-8")
-    p_prof = (prompts_dir / "persona_professor_v1.txt").read_text(encoding="utf-8")
-    p_writer = (prompts_dir / "persona_writer_v1.txt").read_text(encoding="utf-8")
-    p_reader = (prompts_dir / "persona_reader_v1.txt").read_text(encoding="utf-8")
+    tagger_prompt = registry.text("metaphor_tagger_v1")
+    p_prof = registry.text("persona_professor_v1")
+    p_writer = registry.text("persona_writer_v1")
+    p_reader = registry.text("persona_reader_v1")
 
     (mdir / "01_data_construction.md").write_text(
         "# 数据构建\n\n"
@@ -81,6 +82,10 @@ def run(
         Path(config["paths"]["data_processed"]) / "translation_stats.jsonl"
     )
     trans_stats = trans_stats_rows[0] if trans_stats_rows else {}
+    system_secs = {
+        s.get("system_id"): s.get("elapsed_sec", 0.0)
+        for s in trans_stats.get("systems", [])
+    }
 
     books_enabled = "books" in source_counter
     books_files = sorted(Path(config["paths"]["data_raw_books"]).glob("*.txt"))
@@ -96,12 +101,15 @@ def run(
         "# 实验日志\n\n"
         f"- 人模 Spearman 相关: {metrics_summary.get('human_model_spearman', 0.0):.4f}\n"
         f"- 人模 Spearman 95%CI: {metrics_summary.get('human_model_spearman_ci95', {})}\n"
+        f"- 人模 Spearman 置换检验 p 值: {metrics_summary.get('human_model_pvalue', 1.0):.4f}\n"
+        f"- 传统指标: backend={metrics_summary.get('traditional', {}).get('backend', {})}, rows_per_sec={metrics_summary.get('traditional', {}).get('rows_per_sec', 0.0)}, corpus_bleu={metrics_summary.get('traditional', {}).get('corpus_bleu', 0.0):.2f}, corpus_chrf={metrics_summary.get('traditional', {}).get('corpus_chrf', 0.0):.2f}\n"
         f"- Fig2 Pearson r: {viz_stats.get('pearson_r', 0.0):.4f}\n"
         f"- Fig2 Spearman rho: {viz_stats.get('spearman_rho', 0.0):.4f}\n"
         f"- 数据来源计数: {source_counter}\n"
         f"- 数据质量: rows_after_dedup={quality.get('rows_after_dedup', 0)}, duplicates_removed={quality.get('duplicates_removed', 0)}\n"
         f"- 外部解析文件数: {parser_meta.get('n_files', 0)}\n"
         f"- 翻译统计: cache_hit={trans_stats.get('cache_hit', 0)}, hf_success={trans_stats.get('hf_success', 0)}, hf_fail={trans_stats.get('hf_fail', 0)}, llm_success={trans_stats.get('llm_success', 0)}, fallback_mock={trans_stats.get('fallback_mock', 0)}\n"
+        f"- 各系统翻译耗时: {system_secs}\n"
         f"- books 管线启用: {'是' if books_enabled else '否'}\n"
         f"- books 文件: {books_list}\n"
         "- 图表产物: reports/figures/fig1-fig4 (png/pdf)\n"
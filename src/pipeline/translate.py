@@ -1,17 +1,37 @@
 from __future__ import annotations
 
+import hashlib
 import importlib
+import json
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from src.core.cache import TranslationCache
+from src.core.checkpoint import fingerprint, open_checkpoint
+from src.core.columnar import export_configured
 from src.core.io import read_jsonl, write_jsonl
-from src.core.llm_client import chat_text, llm_config_from_dict
+from src.core.llm_client import (
+    chat_text_many,
+    client_pool_stats,
+    configure_response_cache,
+    llm_config_from_dict,
+    response_cache_stats,
+)
+from src.core.normalize import content_key
+from src.core.prompts import PromptRegistry, PromptTemplate, get_registry
+from src.core.rate_limit import rate_limit_stats
+from src.core.retry import breaker_stats
+from src.pipeline.hf_workers import HFJob, hf_pool_config, translate_parallel
+from src.pipeline.onnx_nmt import load_onnx_model, onnx_generate
 
 
 _HF_MODEL_CACHE: dict[str, Any] = {}
+_CACHE_FLUSH_EVERY = 256
 
 
 def _load_hf_model(model_name: str) -> Any | None:
@@ -34,6 +54,17 @@ def _load_hf_model(model_name: str) -> Any | None:
             return None
 
 
+def _hf_text(item: Any) -> str | None:
+    if isinstance(item, list) and item:
+        item = item[0]
+    if isinstance(item, dict):
+        if "translation_text" in item:
+            return str(item["translation_text"]).strip()
+        if "generated_text" in item:
+            return str(item["generated_text"]).strip()
+    return None
+
+
 def _hf_translate(model_name: str, text_zh: str, max_retries: int = 1) -> str | None:
     translator = _load_hf_model(model_name)
     if translator is None:
@@ -43,118 +74,443 @@ def _hf_translate(model_name: str, text_zh: str, max_retries: int = 1) -> str |
         try:
             result = translator(text_zh, max_new_tokens=256)
             if isinstance(result, list) and result:
-                first = result[0]
-                if isinstance(first, dict):
-                    if "translation_text" in first:
-                        return str(first["translation_text"]).strip()
-                    if "generated_text" in first:
-                        return str(first["generated_text"]).strip()
+                text = _hf_text(result[0])
+                if text is not None:
+                    return text
         except Exception:
             continue
     return None
 
 
+def _translate_in_buckets(
+    texts: list[str],
+    batch_size: int,
+    run_batch: Callable[[list[str]], list[str | None] | None],
+    run_one: Callable[[str], str | None],
+    on_result: Callable[[int, str | None], None] | None = None,
+) -> list[str | None]:
+    results: list[str | None] = [None] * len(texts)
+    batch_size = max(1, int(batch_size))
+    order = sorted(range(len(texts)), key=lambda i: (len(texts[i]), i))
+    for start in range(0, len(order), batch_size):
+        idxs = order[start : start + batch_size]
+        batch = [texts[i] for i in idxs]
+        try:
+            outputs = run_batch(batch)
+        except Exception:
+            outputs = None
+        if outputs is None or len(outputs) != len(batch):
+            outputs = [run_one(text) for text in batch]
+        else:
+            outputs = [
+                out if out else run_one(text) for text, out in zip(batch, outputs)
+            ]
+        for i, out in zip(idxs, outputs):
+            results[i] = out
+            if on_result is not None:
+                on_result(i, out)
+    return results
+
+
+def _hf_translate_batch(
+    model_name: str,
+    texts: list[str],
+    batch_size: int = 8,
+    max_retries: int = 1,
+    on_result: Callable[[int, str | None], None] | None = None,
+) -> list[str | None]:
+    translator = _load_hf_model(model_name)
+    if translator is None or not texts:
+        return [None] * len(texts)
+
+    def run_batch(batch: list[str]) -> list[str | None] | None:
+        raw = translator(batch, max_new_tokens=256, batch_size=len(batch))
+        if not isinstance(raw, list):
+            return None
+        return [_hf_text(item) for item in raw]
+
+    return _translate_in_buckets(
+        texts,
+        batch_size,
+        run_batch,
+        lambda text: _hf_translate(model_name, text, max_retries=max_retries),
+        on_result,
+    )
+
+
+def _onnx_translate_batch(
+    system: dict[str, Any],
+    texts: list[str],
+    on_result: Callable[[int, str | None], None] | None = None,
+) -> list[str | None]:
+    bundle = load_onnx_model(
+        str(system.get("model", "")),
+        system.get("quantize"),
+        Path(str(system.get("onnx_dir", "data/models/onnx"))),
+    )
+    if bundle is None or not texts:
+        return [None] * len(texts)
+    max_retries = int(system.get("max_retries", 1))
+
+    def run_batch(batch: list[str]) -> list[str | None]:
+        return list(
+            onnx_generate(
+                bundle,
+                batch,
+                num_beams=int(system.get("num_beams", 1)),
+                src_lang=system.get("src_lang"),
+                tgt_lang=system.get("tgt_lang"),
+            )
+        )
+
+    def run_one(text: str) -> str | None:
+        for _ in range(max(1, max_retries + 1)):
+            try:
+                out = run_batch([text])[0]
+                if out:
+                    return out
+            except Exception:
+                continue
+        return None
+
+    return _translate_in_buckets(
+        texts, int(system.get("batch_size", 8)), run_batch, run_one, on_result
+    )
+
+
+def _timed(
+    system_id: str, fn: Callable[..., list[str | None]], *args: Any, **kwargs: Any
+) -> dict[str, tuple[list[str | None], float]]:
+    t0 = time.perf_counter()
+    results = fn(*args, **kwargs)
+    return {system_id: (results, time.perf_counter() - t0)}
+
+
 def _mock_translate(text_zh: str, system_id: str) -> str:
     base = text_zh.replace("（", "(").replace("）", ")")
     return f"[{system_id}] {base}"
 
 
-def _load_prompt(prompt_dir: Path, prompt_version: str) -> str:
-    prompt_path = prompt_dir / f"{prompt_version}.txt"
-    if prompt_path.exists():
-        return prompt_path.read_text(encoding="utf-8")
-    return (
-        "你是一个中译英翻译器，请输出自然、准确、保留修辞意象的英文译文，仅返回译文。"
+_DEFAULT_PROMPT = (
+    "你是一个中译英翻译器，请输出自然、准确、保留修辞意象的英文译文，仅返回译文。"
+)
+_USER_TEMPLATE = "请把下面中文翻译成英文：\n${text_zh}"
+
+
+def _load_prompt(registry: PromptRegistry, prompt_version: str) -> PromptTemplate:
+    return registry.get(prompt_version, default=_DEFAULT_PROMPT)
+
+
+def _cache_tag(system: dict[str, Any], prompt_sha: str) -> str:
+    kind = str(system.get("kind"))
+    payload = json.dumps(
+        [
+            kind,
+            system.get("provider"),
+            system.get("model"),
+            system.get("base_url"),
+            system.get("temperature"),
+            prompt_sha if kind == "llm" else None,
+        ]
+        + (
+            [system.get("quantize"), system.get("num_beams", 1)]
+            if kind == "onnx_nmt"
+            else []
+        ),
+        ensure_ascii=False,
     )
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+    return f"{system.get('prompt_version', 'trans_v1')}:{digest}"
 
 
 def run(config: dict[str, Any]) -> dict[str, Any]:
     paths = config["paths"]
     systems = config["systems"]
     processed = Path(paths["data_processed"])
-    prompt_dir = Path(paths["prompts_dir"])
+    registry = get_registry(paths["prompts_dir"])
+    registry.register("trans_user", _USER_TEMPLATE)
     eval_rows = read_jsonl(processed / "eval_set.jsonl")
     cache = TranslationCache(processed / "cache.sqlite3")
     llm_enabled = os.getenv("INKSTONE_ENABLE_LLM", "0") == "1"
     hf_enabled = os.getenv("INKSTONE_ENABLE_HF", "0") == "1"
+    if llm_enabled:
+        configure_response_cache(
+            processed / "llm_cache.sqlite3", config.get("llm_cache", {})
+        )
     t0 = time.time()
+    system_by_id = {system["id"]: system for system in systems}
+
+    def _output_row(
+        sid: str, system_id: str, text_zh: str, translation: str
+    ) -> dict[str, Any]:
+        return {
+            "sid": sid,
+            "system_id": system_id,
+            "text_zh": text_zh,
+            "translation": translation,
+            "prompt_version": system_by_id[system_id].get("prompt_version", "trans_v1"),
+            "prompt_hash": prompts[system_id].sha,
+        }
 
     stats = {
         "cache_hit": 0,
         "hf_success": 0,
         "hf_fail": 0,
+        "onnx_success": 0,
+        "onnx_fail": 0,
         "llm_success": 0,
         "fallback_mock": 0,
+        "unique_sources": 0,
+        "dedup_saved": 0,
+    }
+
+    prompts = {
+        system["id"]: _load_prompt(registry, system.get("prompt_version", "trans_v1"))
+        for system in systems
+    }
+    cache_tags = {
+        system["id"]: _cache_tag(system, prompts[system["id"]].sha) for system in systems
     }
+    cached = cache.get_many(
+        (row["sid"], system["id"], cache_tags[system["id"]])
+        for row in eval_rows
+        for system in systems
+    )
+    eval_text = {row["sid"]: row["text_zh"] for row in eval_rows}
+    checkpoint = open_checkpoint(config, "translate", fingerprint(cache_tags))
+    resumed: set[tuple[str, str]] = set()
+    if checkpoint is not None:
+        for row in eval_rows:
+            for system in systems:
+                key = (row["sid"], system["id"])
+                done = checkpoint.resume(key, content_key(row["text_zh"]))
+                if done is not None:
+                    cached[(*key, cache_tags[system["id"]])] = str(done["translation"])
+                    resumed.add(key)
+    pending: list[tuple[str, str, str, str]] = []
+    system_stats: dict[str, dict[str, Any]] = {
+        system["id"]: {
+            "system_id": system["id"],
+            "kind": str(system.get("kind", "")),
+            "backend": "mock",
+            "rows": len(eval_rows),
+            "cache_hit": 0,
+            "computed": 0,
+            "elapsed_sec": 0.0,
+            "items_per_sec": 0.0,
+        }
+        for system in systems
+    }
+
+    def _store(sid: str, system_id: str, translated: str, used_mode: str) -> None:
+        nonlocal pending
+        cache_tag = cache_tags[system_id]
+        cached[(sid, system_id, cache_tag)] = translated
+        pending.append((sid, system_id, cache_tag, translated))
+        if len(pending) >= _CACHE_FLUSH_EVERY:
+            cache.set_many(pending)
+            pending = []
+        if checkpoint is not None:
+            text_zh = eval_text[sid]
+            checkpoint.append(
+                (sid, system_id),
+                _output_row(sid, system_id, text_zh, translated),
+                content_key(text_zh),
+            )
+        stats[used_mode] += 1
 
-    out_rows: list[dict[str, Any]] = []
+    hf_jobs: dict[str, dict[str, list[tuple[str, str]]]] = {}
+    onnx_jobs: dict[str, dict[str, list[tuple[str, str]]]] = {}
+    llm_jobs: dict[str, dict[str, list[tuple[str, str]]]] = {}
     for row in eval_rows:
         sid = row["sid"]
         text_zh = row["text_zh"]
+        source_key = content_key(text_zh)
         for system in systems:
             system_id = system["id"]
-            prompt_version = system.get("prompt_version", "trans_v1")
-            translated = cache.get(sid, system_id, prompt_version)
-            if translated is None:
-                used_mode = "fallback_mock"
-                if hf_enabled and str(system.get("kind")) == "hf_nmt":
-                    hf_result = _hf_translate(
-                        str(system.get("model", "")),
-                        text_zh,
-                        max_retries=int(system.get("max_retries", 1)),
-                    )
-                    if hf_result:
-                        translated = hf_result
-                        used_mode = "hf_success"
-                    else:
-                        translated = _mock_translate(text_zh, system_id)
-                        stats["hf_fail"] += 1
-                elif llm_enabled and str(system.get("kind")) == "llm":
-                    llm_cfg = llm_config_from_dict(system)
-                    system_prompt = _load_prompt(prompt_dir, prompt_version)
-                    user_prompt = f"请把下面中文翻译成英文：\n{text_zh}"
-                    llm_result = chat_text(llm_cfg, system_prompt, user_prompt)
-                    translated = (
-                        llm_result
-                        if llm_result
-                        else _mock_translate(text_zh, system_id)
-                    )
-                    if llm_result:
-                        used_mode = "llm_success"
+            if (sid, system_id) in resumed:
+                continue
+            if (sid, system_id, cache_tags[system_id]) in cached:
+                stats["cache_hit"] += 1
+                system_stats[system_id]["cache_hit"] += 1
+                continue
+            if hf_enabled and str(system.get("kind")) == "hf_nmt":
+                hf_jobs.setdefault(system_id, {}).setdefault(source_key, []).append(
+                    (sid, text_zh)
+                )
+            elif hf_enabled and str(system.get("kind")) == "onnx_nmt":
+                onnx_jobs.setdefault(system_id, {}).setdefault(
+                    source_key, []
+                ).append((sid, text_zh))
+            elif llm_enabled and str(system.get("kind")) == "llm":
+                llm_jobs.setdefault(system_id, {}).setdefault(
+                    source_key, []
+                ).append((sid, text_zh))
+            else:
+                _store(
+                    sid, system_id, _mock_translate(text_zh, system_id), "fallback_mock"
+                )
+
+    backends = {
+        **{system_id: ("hf", hf_jobs) for system_id in hf_jobs},
+        **{system_id: ("onnx", onnx_jobs) for system_id in onnx_jobs},
+        **{system_id: ("llm", llm_jobs) for system_id in llm_jobs},
+    }
+    groups = {
+        system_id: list(jobs[system_id].values())
+        for system_id, (_, jobs) in backends.items()
+    }
+    finished: dict[str, set[int]] = {system_id: set() for system_id in backends}
+    store_lock = threading.Lock()
+
+    def _fan_out(system_id: str, index: int, result: str | None) -> None:
+        backend = backends[system_id][0]
+        group = groups[system_id][index]
+        with store_lock:
+            if index in finished[system_id]:
+                return
+            finished[system_id].add(index)
+            stats["unique_sources"] += 1
+            stats["dedup_saved"] += len(group) - 1
+            if not result and backend != "llm":
+                stats[f"{backend}_fail"] += 1
+            for sid, text_zh in group:
+                if result:
+                    _store(sid, system_id, result, f"{backend}_success")
                 else:
-                    translated = _mock_translate(text_zh, system_id)
+                    _store(
+                        sid,
+                        system_id,
+                        _mock_translate(text_zh, system_id),
+                        "fallback_mock",
+                    )
 
-                cache.set(sid, system_id, prompt_version, translated)
-                stats[used_mode] += 1
-            else:
-                stats["cache_hit"] += 1
-            out_rows.append(
-                {
-                    "sid": sid,
-                    "system_id": system_id,
-                    "text_zh": text_zh,
-                    "translation": translated,
-                    "prompt_version": prompt_version,
-                }
+    streams: dict[str, Callable[[], dict[str, tuple[list[str | None], float]]]] = {}
+    hf_systems = [system for system in systems if hf_jobs.get(system["id"])]
+    hf_specs = {
+        system["id"]: HFJob(
+            model_name=str(system.get("model", "")),
+            texts=[group[0][1] for group in groups[system["id"]]],
+            batch_size=int(system.get("batch_size", 8)),
+            max_retries=int(system.get("max_retries", 1)),
+        )
+        for system in hf_systems
+    }
+    pool_cfg = hf_pool_config(config)
+    if pool_cfg["workers"] > 0 and hf_specs:
+        hf_ids = list(hf_specs)
+
+        def _hf_pool_stream() -> dict[str, tuple[list[str | None], float]]:
+            timings: list[float] = []
+            outputs = translate_parallel(
+                list(hf_specs.values()),
+                workers=pool_cfg["workers"],
+                threads_per_worker=pool_cfg["threads_per_worker"],
+                shard_size=pool_cfg["shard_size"],
+                timings=timings,
+                on_result=lambda job_idx, i, out: _fan_out(hf_ids[job_idx], i, out),
+            )
+            return dict(zip(hf_ids, zip(outputs, timings)))
+
+        streams["hf_pool"] = _hf_pool_stream
+    else:
+        for system_id, spec in hf_specs.items():
+            streams[system_id] = partial(
+                _timed,
+                system_id,
+                _hf_translate_batch,
+                spec.model_name,
+                spec.texts,
+                batch_size=spec.batch_size,
+                max_retries=spec.max_retries,
+                on_result=partial(_fan_out, system_id),
+            )
+    for system in systems:
+        system_id = system["id"]
+        if onnx_jobs.get(system_id):
+            streams[system_id] = partial(
+                _timed,
+                system_id,
+                _onnx_translate_batch,
+                system,
+                [group[0][1] for group in groups[system_id]],
+                on_result=partial(_fan_out, system_id),
+            )
+        elif llm_jobs.get(system_id):
+            streams[system_id] = partial(
+                _timed,
+                system_id,
+                chat_text_many,
+                llm_config_from_dict(system),
+                [
+                    (
+                        prompts[system_id].text,
+                        registry.render("trans_user", text_zh=group[0][1]),
+                    )
+                    for group in groups[system_id]
+                ],
+                on_result=partial(_fan_out, system_id),
             )
 
+    if streams:
+        with ThreadPoolExecutor(max_workers=len(streams)) as executor:
+            futures = [executor.submit(stream) for stream in streams.values()]
+            for future in as_completed(futures):
+                for system_id, (results, elapsed) in future.result().items():
+                    for index, result in enumerate(results):
+                        _fan_out(system_id, index, result)
+                    system_stats[system_id]["backend"] = backends[system_id][0]
+                    system_stats[system_id]["computed"] = len(results)
+                    system_stats[system_id]["elapsed_sec"] = round(elapsed, 3)
+                    system_stats[system_id]["items_per_sec"] = round(
+                        len(results) / max(elapsed, 1e-9), 2
+                    )
+
+    out_rows = [
+        _output_row(
+            row["sid"],
+            system["id"],
+            row["text_zh"],
+            cached[(row["sid"], system["id"], cache_tags[system["id"]])],
+        )
+        for row in eval_rows
+        for system in systems
+    ]
+    cache.set_many(pending)
+    cache.close()
+
     out_path = processed / "translations.jsonl"
     write_jsonl(out_path, out_rows)
+    export_configured(config, out_path, "translations")
+    checkpoint_stats = {"enabled": False}
+    if checkpoint is not None:
+        checkpoint_stats = checkpoint.stats()
+        checkpoint.finalize()
     stats_path = processed / "translation_stats.jsonl"
     write_jsonl(
         stats_path,
         [
             {
                 "rows": len(out_rows),
-                "elapsed_sec": round(time.time() - t0, 3),
+                "wall_sec": round(time.time() - t0, 3),
+                "systems": list(system_stats.values()),
                 "hf_enabled": hf_enabled,
+                "hf_pool_workers": pool_cfg["workers"],
                 "llm_enabled": llm_enabled,
                 **stats,
+                "resumed": len(resumed),
+                "checkpoint": checkpoint_stats,
+                "prompts": registry.stats(),
+                "llm_cache": response_cache_stats() if llm_enabled else {},
+                "llm_clients": client_pool_stats(),
+                "rate_limit": rate_limit_stats(),
+                "circuit_breaker": breaker_stats(),
             }
         ],
     )
     return {
         "rows": len(out_rows),
+        "resumed": len(resumed),
         "translations": str(out_path),
         "translation_stats": str(stats_path),
     }
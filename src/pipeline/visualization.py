@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 import matplotlib
 
@@ -9,41 +9,10 @@ matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 import numpy as np
 
-from src.core.io import read_jsonl
+from src.core.columnar import iter_column_rows
+from src.core.io import RowKey, artifact_order, iter_jsonl, merge_join, read_jsonl
 from src.core.schema import DIMENSIONS
-
-
-def _pearson(x: list[float], y: list[float]) -> float:
-    if len(x) != len(y) or len(x) < 2:
-        return 0.0
-    n = len(x)
-    mx = sum(x) / n
-    my = sum(y) / n
-    num = sum((xi - mx) * (yi - my) for xi, yi in zip(x, y))
-    den_x = sum((xi - mx) ** 2 for xi in x) ** 0.5
-    den_y = sum((yi - my) ** 2 for yi in y) ** 0.5
-    if den_x == 0 or den_y == 0:
-        return 0.0
-    return num / (den_x * den_y)
-
-
-def _rank(values: list[float]) -> list[float]:
-    pairs = sorted(enumerate(values), key=lambda p: p[1])
-    ranks = [0.0] * len(values)
-    i = 0
-    while i < len(pairs):
-        j = i
-        while j + 1 < len(pairs) and pairs[j + 1][1] == pairs[i][1]:
-            j += 1
-        avg_rank = (i + j + 2) / 2.0
-        for k in range(i, j + 1):
-            ranks[pairs[k][0]] = avg_rank
-        i = j + 1
-    return ranks
-
-
-def _spearman(x: list[float], y: list[float]) -> float:
-    return _pearson(_rank(x), _rank(y))
+from src.core.stats import pearson, spearman
 
 
 def _save_fig(fig: plt.Figure, base: Path) -> None:
@@ -53,7 +22,7 @@ def _save_fig(fig: plt.Figure, base: Path) -> None:
     plt.close(fig)
 
 
-def _fig1(eval_rows: list[dict[str, Any]], fig_dir: Path) -> None:
+def _fig1(eval_rows: Iterable[dict[str, Any]], fig_dir: Path) -> None:
     counts: dict[str, int] = {}
     for row in eval_rows:
         mtype = row["metaphor_meta"]["metaphor_type"]
@@ -67,23 +36,24 @@ def _fig1(eval_rows: list[dict[str, Any]], fig_dir: Path) -> None:
 
 
 def _fig2(
-    persona_rows: list[dict[str, Any]], judge_rows: list[dict[str, Any]], fig_dir: Path
+    persona_rows: Iterable[dict[str, Any]],
+    judge_rows: Iterable[dict[str, Any]],
+    row_order: RowKey,
+    fig_dir: Path,
 ) -> tuple[float, float]:
-    jmap = {(r["sid"], r["system_id"]): r for r in judge_rows}
     x, y = [], []
-    for row in persona_rows:
-        key = (row["sid"], row["system_id"])
-        if key in jmap:
+    for row, judged in merge_join(persona_rows, judge_rows, row_order, row_order):
+        if judged is not None:
             x.append(float(row["OV_gold"]))
-            y.append(float(jmap[key]["OV_model"]))
+            y.append(float(judged["OV_model"]))
     fig, ax = plt.subplots(figsize=(8, 6))
     ax.scatter(x, y, alpha=0.5)
     if len(x) >= 2 and len(set(x)) >= 2:
         z = np.polyfit(x, y, 1)
         p = np.poly1d(z)
         ax.plot(x, p(x), "r--", linewidth=1.5)
-        r = _pearson(x, y)
-        rho = _spearman(x, y)
+        r = pearson(x, y)
+        rho = spearman(x, y)
     else:
         r, rho = 0.0, 0.0
     ax.set_xlabel("OV_gold（Persona 聚合）")
@@ -144,14 +114,20 @@ def run(config: dict[str, Any]) -> dict[str, Any]:
     plt.rcParams["axes.unicode_minus"] = False
     processed = Path(config["paths"]["data_processed"])
     fig_dir = Path(config["paths"]["reports_dir"]) / "figures"
-    eval_rows = read_jsonl(processed / "eval_set.jsonl")
-    persona_rows = read_jsonl(processed / "persona_gold.jsonl")
-    judge_rows = read_jsonl(processed / "judge_scores.jsonl")
+    persona_path = processed / "persona_gold.jsonl"
+    judge_path = processed / "judge_scores.jsonl"
+    eval_path = processed / "eval_set.jsonl"
+    row_order, _ = artifact_order(eval_path, processed / "translations.jsonl")
     summary_rows = read_jsonl(processed / "metrics_summary.jsonl")
     summary = summary_rows[0] if summary_rows else {}
 
-    _fig1(eval_rows, fig_dir)
-    r, rho = _fig2(persona_rows, judge_rows, fig_dir)
+    _fig1(iter_jsonl(eval_path), fig_dir)
+    r, rho = _fig2(
+        iter_column_rows(persona_path, "persona_gold", ["sid", "system_id", "OV_gold"]),
+        iter_column_rows(judge_path, "judge_scores", ["sid", "system_id", "OV_model"]),
+        row_order,
+        fig_dir,
+    )
     _fig3(summary, fig_dir)
     _fig4(summary, fig_dir)
     return {"pearson_r": r, "spearman_rho": rho}
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+from src.core import llm_client
+from src.core.cache import ResponseCache, TranslationCache
+
+
+def test_translation_cache_bulk_roundtrip(tmp_path: Path) -> None:
+    rows = [(f"sid{i}", "system_a", "trans_v1", f"text {i}") for i in range(1200)]
+    with TranslationCache(tmp_path / "cache.sqlite3", chunk_size=100) as cache:
+        assert cache.set_many(rows) == len(rows)
+        found = cache.get_many([r[:3] for r in rows] + [("missing", "system_a", "trans_v1")])
+        assert len(found) == len(rows)
+        assert found[("sid7", "system_a", "trans_v1")] == "text 7"
+        cache.set("sid7", "system_a", "trans_v1", "updated")
+
+    with TranslationCache(tmp_path / "cache.sqlite3") as cache:
+        assert cache.get("sid7", "system_a", "trans_v1") == "updated"
+        assert cache.get("missing", "system_a", "trans_v1") is None
+
+
+def test_response_cache_eviction_and_ttl(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path / "llm.sqlite3", max_entries=3, evict_every=1)
+    for i in range(5):
+        cache.set(f"k{i}", f"v{i}")
+    stats = cache.stats()
+    assert stats["entries"] == 3
+    assert stats["evicted"] == 2
+    assert cache.get("k0") is None
+    assert cache.get("k4") == "v4"
+
+    cache.ttl_sec = 1e-9
+    assert cache.get("k4") is None
+    assert cache.stats()["expired"] == 1
+    cache.close()
+
+
+def test_chat_json_served_from_response_cache(tmp_path: Path, monkeypatch) -> None:
+    calls: list[str] = []
+
+    def fake_complete(config, system_prompt, user_prompt):
+        calls.append(user_prompt)
+        return '{"scores": {}, "OV": 3, "rationale": "ok"}'
+
+    monkeypatch.setattr(llm_client, "_complete", fake_complete)
+    llm_client.configure_response_cache(tmp_path / "llm.sqlite3")
+    cfg = llm_client.llm_config_from_dict({"model": "m1"})
+    fields = ["scores", "OV", "rationale"]
+    first = llm_client.chat_json(cfg, "sys", "user", required_fields=fields)
+    second = llm_client.chat_json(cfg, "sys", "user", required_fields=fields)
+    assert first == second and len(calls) == 1
+
+    other = llm_client.llm_config_from_dict({"model": "m2"})
+    llm_client.chat_json(other, "sys", "user", required_fields=fields)
+    llm_client.chat_json(cfg, "sys v2", "user", required_fields=fields)
+    assert len(calls) == 3
+    assert llm_client.response_cache_stats()["hits"] == 1
+    llm_client.configure_response_cache(tmp_path / "llm.sqlite3", {"enabled": False})
+
+
+def test_llm_client_registry_reuses_client(monkeypatch) -> None:
+    built: list[object] = []
+
+    def fake_build(config):
+        built.append(config)
+        return object()
+
+    monkeypatch.setattr(llm_client, "_build_client", fake_build)
+    llm_client.close_clients()
+    cfg = llm_client.llm_config_from_dict({"model": "m1", "base_url": "http://x/v1"})
+    same_endpoint = llm_client.llm_config_from_dict({"model": "m2", "base_url": "http://x/v1"})
+    assert llm_client.get_client(cfg) is llm_client.get_client(same_endpoint)
+    assert len(built) == 1
+    assert llm_client.client_pool_stats()["client_reuse"] == 1
+    for override in ({"pool_size": 32}, {"timeout": 5}):
+        other = llm_client.llm_config_from_dict(
+            {"model": "m1", "base_url": "http://x/v1", **override}
+        )
+        assert llm_client.get_client(other) is not llm_client.get_client(cfg)
+    assert len(built) == 3
+    llm_client.close_clients()
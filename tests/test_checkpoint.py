@@ -0,0 +1,95 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from src.core import llm_client
+from src.core.io import read_jsonl, write_jsonl
+from src.pipeline import judge_persona, translate
+
+
+def test_judge_persona_resumes_from_checkpoint(tmp_path: Path, monkeypatch) -> None:
+    calls: list[str] = []
+    verdict = {"scores": {d: 4 for d in ["IF", "EC", "RE", "CA", "LE"]}, "OV": 4, "rationale": "r"}
+
+    def fake_complete(config, system_prompt, user_prompt):
+        calls.append(user_prompt)
+        return json.dumps(verdict)
+
+    monkeypatch.setenv("INKSTONE_ENABLE_LLM", "1")
+    monkeypatch.setattr(llm_client, "_complete", fake_complete)
+    processed = tmp_path / "processed"
+    write_jsonl(
+        processed / "translations.jsonl",
+        [{"sid": f"s{i}", "system_id": "system_a", "text_zh": f"句子{i}", "translation": f"t{i}"} for i in range(4)],
+    )
+    config = {
+        "paths": {"data_processed": str(processed), "prompts_dir": "configs/prompts"},
+        "judge": {"standard_model": {"model": "m"}},
+        "llm_cache": {"enabled": False},
+        "checkpoint": {"enabled": True, "chunk_size": 1},
+    }
+    gold_row = judge_persona._gold_row
+    built: list[int] = []
+
+    def crashing_gold_row(*args):
+        built.append(1)
+        if len(built) == 3:
+            raise KeyboardInterrupt
+        return gold_row(*args)
+
+    monkeypatch.setattr(judge_persona, "_gold_row", crashing_gold_row)
+    with pytest.raises(KeyboardInterrupt):
+        judge_persona.run(config)
+    checkpoint_path = processed / "checkpoints" / "judge_persona.jsonl"
+    with checkpoint_path.open("a", encoding="utf-8") as f:
+        f.write('{"key": ["s2", "sys')
+
+    monkeypatch.setattr(judge_persona, "_gold_row", gold_row)
+    calls.clear()
+    result = judge_persona.run(config)
+    rows = read_jsonl(processed / "persona_gold.jsonl")
+
+    assert result["resumed"] == 2
+    assert result["checkpoint"]["truncated_tail"] is True
+    assert len(calls) == 2 * 3
+    assert [r["sid"] for r in rows] == ["s0", "s1", "s2", "s3"]
+    assert all(r["OV_gold"] == 4 for r in rows)
+    assert not checkpoint_path.exists()
+
+
+def test_translate_resumes_rows_finished_mid_stream(tmp_path: Path, monkeypatch) -> None:
+    calls: list[str] = []
+
+    def fake_complete(config, system_prompt, user_prompt):
+        calls.append(user_prompt)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return "EN:" + user_prompt.splitlines()[-1]
+
+    monkeypatch.setenv("INKSTONE_ENABLE_LLM", "1")
+    monkeypatch.setattr(llm_client, "_complete", fake_complete)
+    processed = tmp_path / "processed"
+    write_jsonl(
+        processed / "eval_set.jsonl",
+        [{"sid": f"s{i}", "text_zh": f"句子{i}"} for i in range(4)],
+    )
+    config = {
+        "paths": {"data_processed": str(processed), "prompts_dir": "configs/prompts"},
+        "systems": [{"id": "llm", "kind": "llm", "model": "m", "max_concurrency": 1}],
+        "llm_cache": {"enabled": False},
+        "checkpoint": {"enabled": True},
+    }
+    with pytest.raises(KeyboardInterrupt):
+        translate.run(config)
+    checkpoint_path = processed / "checkpoints" / "translate.jsonl"
+    assert len(read_jsonl(checkpoint_path)) == 1 + 2
+
+    calls.clear()
+    result = translate.run(config)
+    rows = read_jsonl(processed / "translations.jsonl")
+
+    assert result["resumed"] == 2
+    assert len(calls) == 2
+    assert [r["translation"] for r in rows] == [f"EN:句子{i}" for i in range(4)]
+    assert not checkpoint_path.exists()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.core.columnar import (
+    export_parquet,
+    iter_column_rows,
+    load_columns,
+    parquet_is_fresh,
+    parquet_path,
+)
+from src.core.io import write_jsonl
+from src.core.schema import DIMENSIONS
+
+
+def _judge_rows(n: int) -> list[dict]:
+    return [
+        {
+            "sid": f"s{i:03d}",
+            "system_id": f"system_{'ab'[i % 2]}",
+            "scores_model": {d: 1 + (i + j) % 5 for j, d in enumerate(DIMENSIONS)},
+            "OV_model": 1 + i % 5,
+            "judge_mode": "fallback_seed",
+            "rationale": "长文本" * 20,
+        }
+        for i in range(n)
+    ]
+
+
+def test_jsonl_and_parquet_project_the_same_numeric_columns(tmp_path: Path) -> None:
+    path = tmp_path / "judge_scores.jsonl"
+    rows = _judge_rows(7)
+    write_jsonl(path, rows)
+    columns = ["sid", "OV_model", "scores_model_IF"]
+    from_jsonl = load_columns(path, "judge_scores", columns)
+    assert from_jsonl["OV_model"].dtype == np.int64
+    assert from_jsonl["scores_model_IF"].tolist() == [r["scores_model"]["IF"] for r in rows]
+    assert [r["sid"] for r in iter_column_rows(path, "judge_scores", ["sid"], 3)] == [
+        r["sid"] for r in rows
+    ]
+    with pytest.raises(KeyError):
+        load_columns(path, "judge_scores", ["rationale"])
+
+    pytest.importorskip("pyarrow")
+    export_parquet(path, "judge_scores", row_group_rows=3)
+    assert parquet_is_fresh(path)
+    from_parquet = load_columns(path, "judge_scores", columns)
+    for name in columns:
+        assert from_parquet[name].tolist() == from_jsonl[name].tolist()
+
+    write_jsonl(path, rows[:2])
+    stat = parquet_path(path).stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert not parquet_is_fresh(path)
+    assert len(load_columns(path, "judge_scores", ["sid"])["sid"]) == 2
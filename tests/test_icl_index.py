@@ -0,0 +1,53 @@
+import random
+
+from src.core.icl_index import ICLIndex
+
+MTYPES = ["simile", "implicit", "personification"]
+
+
+def _reference_first(bank, k, exclude, target_mtype):
+    same = [ex for ex in bank if ex["sid"] not in exclude and ex["metaphor_type"] == target_mtype]
+    other = [ex for ex in bank if ex["sid"] not in exclude and ex["metaphor_type"] != target_mtype]
+    selected = same[: min(k, max(1, k // 2 + 1))]
+    if len(selected) < k:
+        selected.extend(other[: max(0, k - len(selected))])
+    return selected[:k]
+
+
+def _bank(n, seed=7):
+    rng = random.Random(seed)
+    chars = "春风月夜山水花鸟云雨心梦泪光影雪"
+    return [
+        {
+            "sid": f"s{i % (n // 2)}",
+            "metaphor_type": rng.choice(MTYPES),
+            "text_zh": "".join(rng.choice(chars) for _ in range(rng.randint(4, 12))),
+        }
+        for i in range(n)
+    ]
+
+
+def test_first_strategy_matches_linear_scan() -> None:
+    bank = _bank(60)
+    index = ICLIndex(bank, strategy="first")
+    for k in (1, 3, 5):
+        for sid in ("s0", "s3", "missing"):
+            for mtype in MTYPES + ["mixed_other"]:
+                got = [bank[pos] for pos in index.select("", mtype, k, {sid})]
+                assert got == _reference_first(bank, k, {sid}, mtype)
+
+
+def test_similarity_strategy_ranks_by_char_ngrams() -> None:
+    bank = _bank(400)
+    bank.append({"sid": "near", "metaphor_type": "simile", "text_zh": "月光如水照花影"})
+    bank.append({"sid": "self", "metaphor_type": "simile", "text_zh": "月光如水照花影"})
+    index = ICLIndex(bank, seed=3)
+
+    picked = index.select("月光如水照花影。", "simile", 3, exclude_sids={"self"})
+    assert len(picked) == 3 and len(set(picked)) == 3
+    assert bank[picked[0]]["sid"] == "near"
+    assert [bank[p]["metaphor_type"] for p in picked[:2]] == ["simile", "simile"]
+    assert bank[picked[2]]["metaphor_type"] != "simile"
+    assert all(bank[p]["sid"] != "self" for p in picked)
+    assert picked == ICLIndex(bank, seed=3).select("月光如水照花影。", "simile", 3, {"self"})
+    assert len(index.select("", "unknown_type", 4)) == 4
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from src.core.io import (
+    CODEC_PREFERENCE,
+    artifact_order,
+    get_codec,
+    iter_jsonl,
+    iter_records,
+    merge_join,
+    read_jsonl,
+    row_key,
+    sid_key,
+    write_jsonl,
+)
+from src.core.schema import JudgeScoreRecord, TranslationRecord
+
+
+def test_merge_join_streams_left_outer_matches() -> None:
+    left = [
+        {"sid": "a", "system_id": "x"},
+        {"sid": "a", "system_id": "y"},
+        {"sid": "c", "system_id": "x"},
+        {"sid": "d", "system_id": "x"},
+    ]
+    right = [
+        {"sid": "a", "system_id": "y", "v": 1},
+        {"sid": "b", "system_id": "x", "v": 2},
+        {"sid": "c", "system_id": "x", "v": 3},
+        {"sid": "c", "system_id": "x", "v": 4},
+    ]
+    joined = [(l["sid"], r and r["v"]) for l, r in merge_join(left, right)]
+    assert joined == [("a", None), ("a", 1), ("c", 4), ("d", None)]
+
+    evals = [{"sid": "a", "m": "simile"}, {"sid": "d", "m": "implicit"}]
+    by_sid = [r and r["m"] for _, r in merge_join(left, evals, sid_key, sid_key)]
+    assert by_sid == ["simile", "simile", None, "implicit"]
+
+    with pytest.raises(ValueError):
+        list(merge_join(list(reversed(left)), right))
+
+
+def test_artifact_order_follows_eval_and_system_order(tmp_path: Path) -> None:
+    eval_path = tmp_path / "eval_set.jsonl"
+    trans_path = tmp_path / "translations.jsonl"
+    write_jsonl(eval_path, [{"sid": sid} for sid in ["s9", "s1", "s5"]])
+    trans = [{"sid": sid, "system_id": s} for sid in ["s9", "s1", "s5"] for s in "ba"]
+    write_jsonl(trans_path, trans)
+    eval_before, trans_before = eval_path.read_bytes(), trans_path.read_bytes()
+
+    row_order, sid_order = artifact_order(eval_path, trans_path)
+    gold = [dict(row, v=i) for i, row in enumerate(trans) if i != 2]
+    joined = [
+        (l["sid"], l["system_id"], r and r["v"])
+        for l, r in merge_join(trans, gold, row_order, row_order)
+    ]
+    assert joined == [
+        ("s9", "b", 0), ("s9", "a", 1), ("s1", "b", None),
+        ("s1", "a", 3), ("s5", "b", 4), ("s5", "a", 5),
+    ]
+    evals = list(iter_jsonl(eval_path))
+    by_sid = [r["sid"] for _, r in merge_join(trans, evals, sid_order, sid_order)]
+    assert by_sid == [row["sid"] for row in trans]
+    with pytest.raises(ValueError):
+        list(merge_join(sorted(trans, key=row_key), gold, row_order, row_order))
+    assert eval_path.read_bytes() == eval_before and trans_path.read_bytes() == trans_before
+
+
+@pytest.mark.parametrize("name", CODEC_PREFERENCE)
+def test_codecs_round_trip_rows_and_typed_records(tmp_path: Path, name: str) -> None:
+    try:
+        codec = get_codec(name)
+    except ImportError:
+        pytest.skip(f"{name} 未安装")
+    rows = [
+        {
+            "sid": f"s{i}",
+            "system_id": "system_a",
+            "text_zh": "她的笑容像春风一样温暖。",
+            "translation": "Her smile was as warm as a spring breeze.",
+            "prompt_version": "trans_v1",
+            "extra": {"n": i, "x": 0.5},
+        }
+        for i in range(3)
+    ]
+    path = tmp_path / "rows.jsonl"
+    assert write_jsonl(path, rows, codec) == 3
+    assert "春风" in path.read_text(encoding="utf-8")
+    for reader in CODEC_PREFERENCE:
+        try:
+            assert list(iter_jsonl(path, get_codec(reader))) == rows
+        except ImportError:
+            continue
+
+    records = list(iter_records(path, TranslationRecord, codec))
+    assert records[1] == TranslationRecord(
+        sid="s1",
+        system_id="system_a",
+        text_zh=rows[1]["text_zh"],
+        translation=rows[1]["translation"],
+        prompt_version="trans_v1",
+    )
+    write_jsonl(path, [JudgeScoreRecord("s0", "b", {"IF": 4}, 4)], codec)
+    (judged,) = iter_records(path, JudgeScoreRecord, codec)
+    assert judged.scores_model == {"IF": 4} and judged.OV_model == 4 and judged.icl_k == 0
@@ -0,0 +1,124 @@
+import json
+from pathlib import Path
+
+from src.core import llm_client
+from src.core.io import read_jsonl, write_jsonl
+from src.pipeline import judge_persona, judge_standard
+
+
+def _write_inputs(processed: Path, n: int) -> None:
+    eval_rows, trans_rows, gold_rows = [], [], []
+    for i in range(n):
+        sid = f"s{i}"
+        mtype = "simile" if i % 2 == 0 else "implicit"
+        eval_rows.append({"sid": sid, "text_zh": f"句子{i}", "metaphor_meta": {"metaphor_type": mtype}})
+        trans_rows.append({"sid": sid, "system_id": "system_a", "text_zh": f"句子{i}", "translation": f"t{i}"})
+        gold_rows.append(
+            {
+                "sid": sid,
+                "system_id": "system_a",
+                "scores_gold": {d: 3 for d in ["IF", "EC", "RE", "CA", "LE"]},
+                "OV_gold": 3,
+                "range": {d: 0 for d in ["IF", "EC", "RE", "CA", "LE"]},
+            }
+        )
+    write_jsonl(processed / "eval_set.jsonl", eval_rows)
+    write_jsonl(processed / "translations.jsonl", trans_rows)
+    write_jsonl(processed / "persona_gold.jsonl", gold_rows)
+    write_jsonl(processed / "few_shot_bank.jsonl", [])
+
+
+def test_joint_persona_mode_falls_back_per_persona(tmp_path: Path, monkeypatch) -> None:
+    calls: list[str] = []
+    verdict = {"scores": {d: 5 for d in ["IF", "EC", "RE", "CA", "LE"]}, "OV": 5, "rationale": "ok"}
+
+    def fake_complete(config, system_prompt, user_prompt):
+        calls.append(system_prompt)
+        if "[professor]" in system_prompt:
+            return json.dumps({"professor": verdict, "writer": {"scores": {"IF": 5}}, "reader": verdict})
+        return json.dumps(verdict)
+
+    monkeypatch.setenv("INKSTONE_ENABLE_LLM", "1")
+    monkeypatch.setenv("INKSTONE_PERSONA_MODE", "joint")
+    monkeypatch.setattr(llm_client, "_complete", fake_complete)
+    processed = tmp_path / "processed"
+    _write_inputs(processed, 3)
+    config = {
+        "paths": {"data_processed": str(processed), "prompts_dir": "configs/prompts"},
+        "judge": {"standard_model": {"model": "m"}},
+        "llm_cache": {"enabled": False},
+    }
+    result = judge_persona.run(config)
+    rows = read_jsonl(processed / "persona_gold.jsonl")
+
+    assert result["joint_calls"] == 3 and result["per_persona_calls"] == 3
+    assert len(calls) == 6
+    modes = [[p["mode"] for p in r["persona_outputs"]] for r in rows]
+    assert modes == [["llm_joint", "llm", "llm_joint"]] * 3
+    assert all(r["OV_gold"] == 5 for r in rows)
+
+
+def test_adaptive_persona_schedule_skips_decided_rows(tmp_path: Path, monkeypatch) -> None:
+    calls: list[str] = []
+
+    def fake_complete(config, system_prompt, user_prompt):
+        calls.append(system_prompt)
+        agree = "句子0" in user_prompt
+        score = 4 if agree or "教授" in system_prompt else 2
+        return json.dumps({"scores": {d: score for d in ["IF", "EC", "RE", "CA", "LE"]}, "OV": score, "rationale": "r"})
+
+    monkeypatch.setenv("INKSTONE_ENABLE_LLM", "1")
+    monkeypatch.setattr(llm_client, "_complete", fake_complete)
+    processed = tmp_path / "processed"
+    _write_inputs(processed, 2)
+    config = {
+        "paths": {"data_processed": str(processed), "prompts_dir": "configs/prompts"},
+        "judge": {"standard_model": {"model": "m"}, "persona": {"schedule": "adaptive"}},
+        "llm_cache": {"enabled": False},
+    }
+    result = judge_persona.run(config)
+    rows = read_jsonl(processed / "persona_gold.jsonl")
+
+    assert len(calls) == 5
+    assert result["persona_calls_skipped"] == 1
+    assert rows[0]["skipped_personas"] == ["reader"]
+    assert rows[0]["scores_gold"]["IF"] == 4 and rows[0]["range"]["IF"] == 0
+    assert rows[1]["skipped_personas"] == []
+    assert rows[1]["scores_gold"]["IF"] == 2 and rows[1]["range"]["IF"] == 2
+
+
+def test_duplicate_inputs_are_judged_once(tmp_path: Path, monkeypatch) -> None:
+    calls: list[str] = []
+    verdict = {"scores": {d: 4 for d in ["IF", "EC", "RE", "CA", "LE"]}, "OV": 4, "rationale": "r"}
+
+    def fake_complete(config, system_prompt, user_prompt):
+        calls.append(user_prompt)
+        return json.dumps({**verdict, "scores_model": verdict["scores"], "OV_model": 4})
+
+    monkeypatch.setenv("INKSTONE_ENABLE_LLM", "1")
+    monkeypatch.setattr(llm_client, "_complete", fake_complete)
+    processed = tmp_path / "processed"
+    _write_inputs(processed, 4)
+    trans_rows = read_jsonl(processed / "translations.jsonl")
+    trans_rows[2]["text_zh"], trans_rows[2]["translation"] = " 句子0 ", "t0"
+    trans_rows[3]["text_zh"], trans_rows[3]["translation"] = "句子0", "T0"
+    write_jsonl(processed / "translations.jsonl", trans_rows)
+    config = {
+        "paths": {"data_processed": str(processed), "prompts_dir": "configs/prompts"},
+        "judge": {"standard_model": {"model": "m"}, "icl": {"k": 3}},
+        "llm_cache": {"enabled": False},
+    }
+
+    persona = judge_persona.run(config)
+    assert len(calls) == 3 * 3
+    assert persona["unique_inputs"] == 3 and persona["dedup_saved"] == 3
+    assert sum("T0" in prompt for prompt in calls) == 3
+    assert all(r["OV_gold"] == 4 for r in read_jsonl(processed / "persona_gold.jsonl"))
+
+    calls.clear()
+    standard = judge_standard.run(config)
+    rows = read_jsonl(processed / "judge_scores.jsonl")
+    assert standard["llm_calls"] == len(calls) == 3
+    assert standard["dedup_saved"] == 1
+    assert sum("T0" in prompt for prompt in calls) == 1
+    assert all(r["judge_mode"] == "llm" for r in rows)
@@ -0,0 +1,62 @@
+import json
+import re
+from pathlib import Path
+
+from src.core import llm_client
+from src.core.io import read_jsonl, write_jsonl
+from src.pipeline import judge_standard
+
+
+def _write_inputs(processed: Path, n: int) -> None:
+    eval_rows, trans_rows, gold_rows = [], [], []
+    for i in range(n):
+        sid = f"s{i}"
+        mtype = "simile" if i % 2 == 0 else "implicit"
+        eval_rows.append({"sid": sid, "text_zh": f"句子{i}", "metaphor_meta": {"metaphor_type": mtype}})
+        trans_rows.append({"sid": sid, "system_id": "system_a", "text_zh": f"句子{i}", "translation": f"t{i}"})
+        gold_rows.append(
+            {
+                "sid": sid,
+                "system_id": "system_a",
+                "scores_gold": {d: 3 for d in ["IF", "EC", "RE", "CA", "LE"]},
+                "OV_gold": 3,
+                "range": {d: 0 for d in ["IF", "EC", "RE", "CA", "LE"]},
+            }
+        )
+    write_jsonl(processed / "eval_set.jsonl", eval_rows)
+    write_jsonl(processed / "translations.jsonl", trans_rows)
+    write_jsonl(processed / "persona_gold.jsonl", gold_rows)
+    write_jsonl(processed / "few_shot_bank.jsonl", [])
+
+
+def test_packed_judging_falls_back_for_missing_items(tmp_path: Path, monkeypatch) -> None:
+    calls: list[str] = []
+    scores = {d: 4 for d in ["IF", "EC", "RE", "CA", "LE"]}
+
+    def fake_complete(config, system_prompt, user_prompt):
+        calls.append(user_prompt)
+        ids = [int(x) for x in re.findall(r"\[条目 id=(\d+)\]", user_prompt)]
+        if ids:
+            items = [{"id": i, "scores_model": scores, "OV_model": 4} for i in ids if i != 2]
+            return json.dumps({"items": items})
+        return json.dumps({"scores_model": scores, "OV_model": 4, "rationale": "single"})
+
+    monkeypatch.setenv("INKSTONE_ENABLE_LLM", "1")
+    monkeypatch.setattr(llm_client, "_complete", fake_complete)
+    processed = tmp_path / "processed"
+    _write_inputs(processed, 7)
+    config = {
+        "paths": {"data_processed": str(processed), "prompts_dir": str(tmp_path)},
+        "judge": {"standard_model": {"model": "m"}, "icl": {"k": 3, "pack_size": 3}},
+        "llm_cache": {"enabled": False},
+    }
+    result = judge_standard.run(config)
+    rows = read_jsonl(processed / "judge_scores.jsonl")
+
+    assert [r["sid"] for r in rows] == [f"s{i}" for i in range(7)]
+    assert all(r["OV_model"] == 4 for r in rows)
+    assert result["packed_calls"] == 2
+    assert result["fallback_single_calls"] == 2
+    assert result["llm_calls"] == len(calls) == 5
+    assert result["calls_saved"] == 2
+    assert sum(r["judge_mode"] == "llm_packed" for r in rows) == 4
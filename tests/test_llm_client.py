@@ -0,0 +1,100 @@
+from src.core import llm_client
+from src.core.rate_limit import TokenBucket, get_limiter, rate_limit_stats
+from src.core.retry import breaker_stats, classify_error, get_breaker
+
+
+def test_chat_json_many_preserves_order(monkeypatch) -> None:
+    def fake_complete(config, system_prompt, user_prompt):
+        return '{"idx": ' + user_prompt + "}"
+
+    monkeypatch.setattr(llm_client, "_complete", fake_complete)
+    cfg = llm_client.llm_config_from_dict({"model": "m1", "max_concurrency": 8})
+    requests = [("sys", str(i)) for i in range(50)]
+    results = llm_client.chat_json_many(cfg, requests, required_fields=["idx"])
+    assert [r["idx"] for r in results] == list(range(50))
+
+
+def test_prefix_ordering_groups_shared_prefixes(monkeypatch) -> None:
+    sent: list[tuple[str, str]] = []
+
+    def fake_complete(config, system_prompt, user_prompt):
+        sent.append((system_prompt, user_prompt))
+        return f'{{"echo": "{system_prompt}|{user_prompt}"}}'
+
+    monkeypatch.setattr(llm_client, "_complete", fake_complete)
+    cfg = llm_client.llm_config_from_dict(
+        {"model": "m1", "max_concurrency": 1, "prefix_ordering": True}
+    )
+    requests = [(persona, f"row{i}") for i in range(4) for persona in ("p1", "p2", "p3")]
+    results = llm_client.chat_json_many(cfg, requests, required_fields=["echo"])
+
+    assert [r["echo"] for r in results] == [f"{s}|{u}" for s, u in requests]
+    assert [s for s, _ in sent] == ["p1"] * 4 + ["p2"] * 4 + ["p3"] * 4
+    assert llm_client.prefix_share(requests, llm_client.prefix_order(requests)) > (
+        llm_client.prefix_share(requests)
+    )
+
+
+def test_token_bucket_reserves_and_schedules_waits() -> None:
+    bucket = TokenBucket(rate_per_min=60, burst_sec=2)
+    now = bucket.updated
+    assert bucket.reserve(1, now) == 0.0
+    assert bucket.reserve(1, now) == 0.0
+    assert abs(bucket.reserve(1, now) - 1.0) < 1e-6
+    assert abs(bucket.reserve(1, now) - 2.0) < 1e-6
+    assert bucket.peek(now + 10) == bucket.capacity
+
+
+def test_registries_keep_separate_state_per_endpoint_settings() -> None:
+    endpoint = "openai_compatible|http://registry-test/v1"
+    slow = get_limiter(endpoint, {"rpm": 60})
+    assert get_limiter(endpoint, {"rpm": 60}) is slow
+    assert get_limiter(endpoint, {"rpm": 600}) is not slow
+    assert endpoint not in rate_limit_stats()
+    assert f"{endpoint}|60,0,0,10" in rate_limit_stats()
+
+    strict = get_breaker(endpoint, {"failure_threshold": 1})
+    assert get_breaker(endpoint, {"failure_threshold": 1}) is strict
+    assert strict.failure_threshold == 1
+    assert endpoint in breaker_stats()
+    assert get_breaker(endpoint, {"failure_threshold": 5}).failure_threshold == 5
+    assert f"{endpoint}|1,30" in breaker_stats()
+
+
+def test_circuit_breaker_trips_and_short_circuits(monkeypatch) -> None:
+    class APITimeoutError(Exception):
+        pass
+
+    calls: list[int] = []
+
+    class FakeCompletions:
+        def create(self, **kwargs):
+            calls.append(1)
+            raise APITimeoutError("timeout")
+
+    class FakeClient:
+        class chat:
+            completions = FakeCompletions()
+
+    monkeypatch.setattr(llm_client, "get_client", lambda config: FakeClient())
+    cfg = llm_client.llm_config_from_dict(
+        {
+            "model": "m1",
+            "base_url": "http://breaker-test/v1",
+            "max_retries": 1,
+            "retry": {"backoff_base_sec": 0, "breaker_threshold": 3},
+        }
+    )
+    assert llm_client.chat_text(cfg, "sys", "a") is None
+    assert llm_client.chat_text(cfg, "sys", "b") is None
+    assert llm_client.chat_text(cfg, "sys", "c") is None
+    assert len(calls) == 3
+    stats = breaker_stats()[llm_client.endpoint_key(cfg)]
+    assert stats["state"] == "open" and stats["trips"] == 1
+    assert stats["retries"] >= 1 and stats["short_circuited"] >= 1
+
+    monkeypatch.setattr(llm_client, "get_client", lambda config: None)
+    assert llm_client.chat_text(cfg, "sys", "d") is None
+    assert breaker_stats()[llm_client.endpoint_key(cfg)] == stats
+    assert classify_error(APITimeoutError()) == "retryable"
+    assert classify_error(ValueError()) == "fatal"
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from src.core.cache import MetricScoreCache
+from src.core.metrics_traditional import (
+    _overlap_meteor,
+    resolve_backends,
+    score_items,
+    score_pairs,
+    sentence_bleu,
+    sentence_meteor,
+)
+
+
+def test_score_pairs_matches_sentence_api_and_reports_backend() -> None:
+    refs = ["the cat sat on the mat", "spring wind greens the south bank", "a"]
+    hyps = ["the cat sat on mat", "the spring wind is green", "b c"]
+    scored, stats = score_pairs(refs, hyps, shard_size=2)
+    assert [row["bleu"] for row in scored] == [
+        sentence_bleu(r, h) for r, h in zip(refs, hyps)
+    ]
+    assert [row["meteor"] for row in scored] == [
+        sentence_meteor(r, h) for r, h in zip(refs, hyps)
+    ]
+    assert all(0.0 <= row["chrf"] <= 100.0 for row in scored)
+    assert stats["rows"] == 3
+    assert stats["backend"] == resolve_backends().describe()
+    assert 0.0 <= stats["corpus_bleu"] <= 100.0
+    assert stats["corpus_chrf"] > 0.0
+    assert resolve_backends() is resolve_backends()
+
+    with pytest.raises(ValueError):
+        score_pairs(refs, hyps[:2])
+
+
+def test_score_items_only_scores_new_or_changed_translations(tmp_path: Path) -> None:
+    items = [
+        ("s1", "system_a", "the cat sat on the mat", "the cat sat on mat"),
+        ("s1", "system_b", "the cat sat on the mat", "a cat is on the mat"),
+        ("s2", "system_a", "spring wind greens the bank", "the spring wind"),
+    ]
+    with MetricScoreCache(tmp_path / "metrics_cache.sqlite3") as cache:
+        first, first_stats = score_items(items, cache=cache)
+        second, second_stats = score_items(items, cache=cache)
+        changed = items[:2] + [("s2", "system_a", items[2][2], "spring wind greens")]
+        third, third_stats = score_items(changed, cache=cache)
+        assert cache.count() == 4
+
+    assert first_stats["cache"] == {"enabled": True, "hits": 0, "misses": 3}
+    assert second_stats["cache"] == {"enabled": True, "hits": 3, "misses": 0}
+    assert third_stats["cache"] == {"enabled": True, "hits": 2, "misses": 1}
+    assert second == first
+    assert second_stats["corpus_bleu"] == first_stats["corpus_bleu"]
+    assert third[:2] == first[:2]
+    fresh, _ = score_pairs([items[2][2]], ["spring wind greens"])
+    assert third[2]["bleu"] == fresh[0]["bleu"]
+
+
+def test_corpus_scores_fall_back_when_sacrebleu_internals_are_missing(monkeypatch) -> None:
+    from src.core import metrics_traditional
+
+    pytest.importorskip("sacrebleu")
+
+    def renamed(*args):
+        raise AttributeError("_extract_corpus_statistics")
+
+    monkeypatch.setattr(metrics_traditional, "_sacrebleu_corpus_fns", renamed)
+    resolve_backends.cache_clear()
+    try:
+        backends = resolve_backends()
+        assert backends.bleu == "sacrebleu" and backends.corpus == "sentence_mean"
+        refs = ["the cat sat on the mat", "spring wind greens the south bank"]
+        hyps = ["the cat sat on mat", "the spring wind is green"]
+        scored, stats = score_pairs(refs, hyps)
+        assert stats["corpus_bleu"] == sum(row["bleu"] for row in scored) / 2
+    finally:
+        resolve_backends.cache_clear()
+
+
+def test_meteor_backend_is_chosen_once_at_resolve_time() -> None:
+    backends = resolve_backends()
+    refs = ["the cat sat on the mat", "spring wind"]
+    hyps = ["a dog lay on a rug", "spring wind"]
+    if backends.meteor == "nltk":
+        nltk_data = pytest.importorskip("nltk.data")
+        assert nltk_data.find("corpora/wordnet")
+    else:
+        scored, _ = score_pairs(refs, hyps)
+        assert [row["meteor"] for row in scored] == [
+            _overlap_meteor(r, h) for r, h in zip(refs, hyps)
+        ]
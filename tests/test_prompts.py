@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import pytest
+
+from src.core.prompts import PromptRegistry
+
+
+def test_registry_loads_once_renders_and_reuses_prefixes(tmp_path: Path) -> None:
+    (tmp_path / "greet_v1.txt").write_text("你好，${name}！", encoding="utf-8")
+    (tmp_path / "plain_v1.txt").write_text("固定提示词\n", encoding="utf-8")
+    registry = PromptRegistry(tmp_path)
+    (tmp_path / "plain_v1.txt").write_text("已修改\n", encoding="utf-8")
+
+    assert registry.text("plain_v1") == "固定提示词\n"
+    assert registry.get("greet_v1").fields == ("name",)
+    assert registry.render("greet_v1", name="$世界") == "你好，$世界！"
+    with pytest.raises(ValueError):
+        registry.render("greet_v1")
+    with pytest.raises(FileNotFoundError):
+        registry.get("missing_v1")
+    assert registry.sha("missing_v1", default="默认") == registry.sha("fallback", default="默认")
+
+    builds: list[int] = []
+    for _ in range(3):
+        registry.prefix(("head", 1), lambda: str(builds.append(1)))
+    stats = registry.stats()
+    assert len(builds) == 1
+    assert stats["prefix_hits"] == 2 and stats["prefix_misses"] == 1
+    assert stats["renders"] == 2
+
+    small = PromptRegistry(tmp_path, max_prefixes=2)
+    for i in (1, 2, 1, 3):
+        small.prefix(("head", i), lambda i=i: f"p{i}")
+    assert small.stats()["prefix_entries"] == 2
+    assert small.prefix(("head", 1), lambda: "rebuilt") == "p1"
+    assert small.prefix(("head", 2), lambda: "rebuilt") == "rebuilt"
+
+
+def test_registry_rejects_empty_templates_and_malformed_renders(tmp_path: Path) -> None:
+    (tmp_path / "empty_v1.txt").write_text("  \n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        PromptRegistry(tmp_path)
+    (tmp_path / "empty_v1.txt").write_text("价格 $5", encoding="utf-8")
+    registry = PromptRegistry(tmp_path)
+    assert registry.text("empty_v1") == "价格 $5"
+    with pytest.raises(ValueError):
+        registry.render("empty_v1")
+    (tmp_path / "bad_v1.txt").write_text("${name} 价格 $5", encoding="utf-8")
+    with pytest.raises(ValueError):
+        PromptRegistry(tmp_path)
+    with pytest.raises(ValueError):
+        registry.register("bad_inline", "${text_zh} 的 ${")
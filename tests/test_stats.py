@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import random
+from statistics import mean
+
+import numpy as np
+
+from src.core.significance import compare_systems
+from src.core.stats import (
+    approximate_randomization_pvalue,
+    bootstrap_ci_spearman,
+    bootstrap_indices,
+    paired_bootstrap,
+    pearson,
+    permutation_pvalue_spearman,
+    rankdata,
+    spearman,
+    spearman_matrix,
+)
+
+
+def _reference_spearman(x: list[float], y: list[float]) -> float:
+    def ranks(values: list[float]) -> list[float]:
+        return [
+            sum(v < value for v in values) + (sum(v == value for v in values) + 1) / 2
+            for value in values
+        ]
+
+    rx, ry = ranks(x), ranks(y)
+    mx, my = mean(rx), mean(ry)
+    num = sum((a - mx) * (b - my) for a, b in zip(rx, ry))
+    den = (sum((a - mx) ** 2 for a in rx) * sum((b - my) ** 2 for b in ry)) ** 0.5
+    return num / den if den else 0.0
+
+
+def test_rankdata_averages_ties_along_rows() -> None:
+    assert rankdata([3, 1, 3, 2]).tolist() == [3.5, 1.0, 3.5, 2.0]
+    assert rankdata([[2, 2, 1], [1, 2, 3]]).tolist() == [[2.5, 2.5, 1.0], [1.0, 2.0, 3.0]]
+
+
+def test_correlations_match_reference_and_degenerate_cases() -> None:
+    rng = random.Random(7)
+    x = [float(rng.randint(1, 5)) for _ in range(60)]
+    y = [v + rng.random() for v in x]
+    z = [rng.random() for _ in x]
+    assert abs(spearman(x, y) - _reference_spearman(x, y)) < 1e-12
+    matrix = spearman_matrix([x, z], [y, z])
+    assert abs(matrix[0, 0] - _reference_spearman(x, y)) < 1e-12
+    assert abs(matrix[1, 1] - 1.0) < 1e-12
+    assert abs(matrix[0, 1] - _reference_spearman(x, z)) < 1e-12
+    assert spearman([3.0] * 5, [1.0, 2.0, 3.0, 4.0, 5.0]) == 0.0
+    assert pearson([1.0], [2.0]) == 0.0
+    assert abs(pearson([1.0, 2.0, 3.0], [2.0, 4.0, 6.0]) - 1.0) < 1e-12
+
+
+def test_bootstrap_reproduces_python_random_resamples() -> None:
+    rng = random.Random(11)
+    x = [float(rng.randint(1, 5)) for _ in range(40)]
+    y = [float(rng.randint(1, 5)) for _ in range(40)]
+    seed, n_bootstrap = 20260215, 50
+
+    ref_rng = random.Random(seed)
+    ref_idx = [[ref_rng.randrange(40) for _ in range(40)] for _ in range(n_bootstrap)]
+    assert np.array_equal(bootstrap_indices(40, n_bootstrap, seed), np.array(ref_idx))
+
+    samples = sorted(
+        _reference_spearman([x[i] for i in idx], [y[i] for i in idx]) for idx in ref_idx
+    )
+    for chunk_elems in (40, 400, 1 << 22):
+        ci = bootstrap_ci_spearman(x, y, n_bootstrap, seed, chunk_elems=chunk_elems)
+        assert abs(ci["low"] - samples[int(0.025 * (n_bootstrap - 1))]) < 1e-12
+        assert abs(ci["high"] - samples[int(0.975 * (n_bootstrap - 1))]) < 1e-12
+        assert abs(ci["mean"] - mean(samples)) < 1e-12
+
+
+def test_significance_tests_separate_real_and_null_differences() -> None:
+    rng = random.Random(3)
+    x = [float(i) for i in range(50)]
+    noise = [rng.random() for _ in x]
+    assert permutation_pvalue_spearman(x, x, 500, 1) < 0.01
+    assert permutation_pvalue_spearman([1.0] * 50, noise, 500, 1) == 1.0
+
+    shifted = [1.0 + rng.random() for _ in range(80)]
+    assert approximate_randomization_pvalue(shifted, 999, 2) == 1 / 1000
+    assert paired_bootstrap(shifted, 999, 2)["pvalue"] == 0.0
+    assert approximate_randomization_pvalue([0.0] * 80, 999, 2) == 1.0
+
+    rows = [
+        {
+            "sid": f"s{i}",
+            "system_id": system,
+            "OV_model": 4 if system == "b" else 2,
+            "scores_model": {d: 3 for d in ("IF", "EC", "RE", "CA", "LE")},
+        }
+        for i in range(30)
+        for system in ("a", "b", "c")
+    ]
+    pairs = {
+        (p["system_a"], p["system_b"], p["metric"]): p
+        for p in compare_systems(rows, 500, 7)
+    }
+    assert len(pairs) == 3 * 6
+    assert pairs[("a", "b", "OV")]["mean_diff"] == -2.0
+    assert pairs[("a", "b", "OV")]["randomization_pvalue"] < 0.01
+    assert pairs[("a", "c", "OV")]["randomization_pvalue"] == 1.0
+    assert pairs[("a", "b", "IF")]["cohens_d"] == 0.0
@@ -0,0 +1,125 @@
+import time
+
+from src.core.io import read_jsonl, write_jsonl
+from src.pipeline import translate
+from src.pipeline.hf_workers import plan_model_waves, plan_shards
+
+
+def test_hf_batch_maps_results_back_and_isolates_failures(monkeypatch) -> None:
+    batches: list[list[str]] = []
+
+    def fake_translator(inputs, max_new_tokens=256, batch_size=1):
+        items = inputs if isinstance(inputs, list) else [inputs]
+        if any("坏" in text for text in items):
+            raise RuntimeError("bad input")
+        batches.append(items)
+        return [{"translation_text": f"EN:{text}"} for text in items]
+
+    monkeypatch.setattr(translate, "_load_hf_model", lambda name: fake_translator)
+    texts = ["一二三四五", "一", "坏句子", "一二三", "一二", "一二三四"]
+    results = translate._hf_translate_batch("m", texts, batch_size=2)
+
+    assert results == ["EN:一二三四五", "EN:一", None, "EN:一二三", "EN:一二", "EN:一二三四"]
+    assert all(len(batch) <= 2 for batch in batches)
+    assert ["一", "一二"] in batches
+
+
+def test_worker_shards_reproduce_serial_batches(monkeypatch) -> None:
+    texts = [("字" * ((i * 7) % 11 + 1)) + str(i) for i in range(50)]
+    batches: list[list[str]] = []
+
+    def fake_translator(inputs, max_new_tokens=256, batch_size=1):
+        batches.append(list(inputs))
+        return [{"translation_text": text.upper()} for text in inputs]
+
+    monkeypatch.setattr(translate, "_load_hf_model", lambda name: fake_translator)
+    serial = translate._hf_translate_batch("m", texts, batch_size=4)
+    serial_batches, batches[:] = list(batches), []
+
+    shards = plan_shards(texts, batch_size=4, shard_size=10)
+    assert all(len(shard) == 8 for shard in shards[:-1])
+    sharded: list[str | None] = [None] * len(texts)
+    for shard in shards:
+        out = translate._hf_translate_batch("m", [texts[i] for i in shard], batch_size=4)
+        for i, value in zip(shard, out):
+            sharded[i] = value
+
+    assert sharded == serial
+    assert batches == serial_batches
+
+
+def test_onnx_batch_retries_empty_outputs_individually(monkeypatch) -> None:
+    calls: list[list[str]] = []
+
+    def fake_generate(bundle, texts, num_beams=1, src_lang=None, tgt_lang=None):
+        calls.append(list(texts))
+        if len(texts) > 1:
+            return ["" if "空" in text else f"EN:{text}" for text in texts]
+        return [f"EN1:{texts[0]}"]
+
+    monkeypatch.setattr(translate, "load_onnx_model", lambda *args: ("tok", "model"))
+    monkeypatch.setattr(translate, "onnx_generate", fake_generate)
+    system = {"id": "s", "kind": "onnx_nmt", "model": "m", "batch_size": 3}
+    results = translate._onnx_translate_batch(system, ["甲乙", "空", "甲"])
+
+    assert results == ["EN:甲乙", "EN1:空", "EN:甲"]
+    assert calls == [["空", "甲", "甲乙"], ["空"]]
+
+
+def test_systems_translate_concurrently_in_stable_order(tmp_path, monkeypatch) -> None:
+    intervals: list[tuple[float, float]] = []
+
+    def _record(start: float) -> None:
+        intervals.append((start, time.perf_counter()))
+
+    def slow_hf(model_name, texts, batch_size=8, max_retries=1, on_result=None):
+        start = time.perf_counter()
+        time.sleep(0.3)
+        _record(start)
+        return [f"hf:{text}" for text in texts]
+
+    def slow_llm(config, requests, on_result=None):
+        start = time.perf_counter()
+        time.sleep(0.3)
+        _record(start)
+        return [f"llm:{user.splitlines()[-1]}" for _, user in requests]
+
+    monkeypatch.setenv("INKSTONE_ENABLE_HF", "1")
+    monkeypatch.setenv("INKSTONE_ENABLE_LLM", "1")
+    monkeypatch.setattr(translate, "_hf_translate_batch", slow_hf)
+    monkeypatch.setattr(translate, "chat_text_many", slow_llm)
+    processed = tmp_path / "processed"
+    write_jsonl(
+        processed / "eval_set.jsonl",
+        [{"sid": f"s{i}", "text_zh": f"句{i}"} for i in range(3)],
+    )
+    config = {
+        "paths": {"data_processed": str(processed), "prompts_dir": "configs/prompts"},
+        "systems": [
+            {"id": "a", "kind": "hf_nmt", "model": "m1"},
+            {"id": "b", "kind": "hf_nmt", "model": "m2"},
+            {"id": "c", "kind": "llm", "model": "m3"},
+        ],
+        "llm_cache": {"enabled": False},
+    }
+    translate.run(config)
+
+    rows = read_jsonl(processed / "translations.jsonl")
+    assert [(r["sid"], r["system_id"]) for r in rows] == [
+        (f"s{i}", s) for i in range(3) for s in "abc"
+    ]
+    assert rows[2]["translation"] == "llm:句0"
+    assert len(intervals) == 3
+    assert max(start for start, _ in intervals) < min(end for _, end in intervals)
+    stats = read_jsonl(processed / "translation_stats.jsonl")[0]
+    per_system = {s["system_id"]: s for s in stats["systems"]}
+    assert per_system["c"]["backend"] == "llm" and per_system["a"]["computed"] == 3
+    assert per_system["b"]["elapsed_sec"] >= 0.3
+
+
+def test_model_waves_never_exceed_worker_budget() -> None:
+    assert plan_model_waves(["m1", "m2", "m3"], 2) == [{"m1": 1, "m2": 1}, {"m3": 2}]
+    assert plan_model_waves(["m1", "m2"], 5) == [{"m1": 3, "m2": 2}]
+    for workers in range(1, 6):
+        for wave in plan_model_waves(["m1", "m2", "m3"], workers):
+            assert sum(wave.values()) <= workers